@@ -0,0 +1,63 @@
+"""
+Compares per-note MarkDown rendering cost of markdown.markdown()
+and reused converters of MarkdownConverterPool.
+
+Usage (from notes_service directory):
+    python -m benchmarks.markdown_converter [--extensions tables fenced_code]
+"""
+
+import argparse
+import timeit
+
+import markdown
+
+from src.core.rendering import MarkdownConverterPool
+
+NOTES_AMOUNTS = (10, 100, 1000)
+REPEATS = 5
+
+NOTE_TEMPLATE = """# Daily routine {i}
+
+Some *emphasized* text with a [link](https://awesome-notes.com/{i}).
+
+- Running
+- Training
+- Eating
+
+```
+code block {i}
+```
+"""
+
+
+def per_note_microseconds(render, notes: list[str]) -> float:
+    best_total = min(timeit.repeat(lambda: render(notes), number=1, repeat=REPEATS))
+    return best_total / len(notes) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--extensions", nargs="*", default=[])
+    args = parser.parse_args()
+
+    converter_pool = MarkdownConverterPool(extensions=args.extensions)
+
+    def render_per_call(notes: list[str]) -> list[str]:
+        return [markdown.markdown(note, extensions=args.extensions) for note in notes]
+
+    print(f"extensions: {args.extensions or 'none'}")
+    print(
+        f"{'notes':>6} | {'markdown.markdown':>18} | {'converter pool':>15} | speedup"
+    )
+    for notes_amount in NOTES_AMOUNTS:
+        notes = [NOTE_TEMPLATE.format(i=i) for i in range(notes_amount)]
+        per_call = per_note_microseconds(render_per_call, notes)
+        pooled = per_note_microseconds(converter_pool.convert_many, notes)
+        print(
+            f"{notes_amount:>6} | {per_call:>15.1f} us | {pooled:>12.1f} us "
+            f"| {per_call / pooled:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
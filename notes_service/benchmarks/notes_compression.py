@@ -0,0 +1,144 @@
+"""
+Compares size and single note read latency of notes content stored
+uncompressed, compressed by pglz (PostgreSQL default) and by lz4.
+Requires running PostgreSQL configured by POSTGRES_* settings,
+benchmark data is kept in temporary tables.
+
+Usage (from notes_service directory):
+    python -m benchmarks.notes_compression [--notes 2000] [--reads 500]
+        [--modes uncompressed pglz lz4]
+"""
+
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from uuid import UUID, uuid4
+
+from sqlalchemy import URL, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from src.core.settings import postgres_settings
+from src.models.note import CONTENT_COMPRESSION_THRESHOLD
+
+# column storage clause of every mode, EXTERNAL moves large values out of line
+# without compression, as plain Text values would be without TOAST compression
+STORAGE_MODES = {
+    "uncompressed": "SET STORAGE EXTERNAL",
+    "pglz": "SET COMPRESSION pglz",
+    "lz4": "SET COMPRESSION lz4",
+}
+# sizes of pasted logs and long documents dominate the table, small notes are many
+NOTE_SIZES = (300, 300, 300, 4 * 1024, 16 * 1024, 64 * 1024)
+
+LOG_LINE_TEMPLATE = (
+    "2026-10-17T{hour:02}:{minute:02}:{second:02}.{millis:03}Z {level} "
+    "[request_id={request_id}] GET /note/by-id/{note_id} {status} {duration}ms\n"
+)
+
+
+def log_like_content(size: int, random_: random.Random) -> str:
+    lines, length = [], 0
+    while length < size:
+        line = LOG_LINE_TEMPLATE.format(
+            hour=random_.randrange(24),
+            minute=random_.randrange(60),
+            second=random_.randrange(60),
+            millis=random_.randrange(1000),
+            level=random_.choice(("INFO", "INFO", "INFO", "WARNING", "ERROR")),
+            request_id=f"{random_.getrandbits(48):012x}",
+            note_id=UUID(int=random_.getrandbits(128)),
+            status=random_.choice((200, 200, 304, 404)),
+            duration=random_.randrange(1, 300),
+        )
+        lines.append(line)
+        length += len(line)
+    return "".join(lines)[:size]
+
+
+async def prepare_table(
+    connection: AsyncConnection, table: str, storage: str, notes: list[tuple]
+) -> None:
+    await connection.execute(
+        text(
+            f"CREATE TEMPORARY TABLE {table} (id uuid PRIMARY KEY, content text) "
+            f"WITH (toast_tuple_target = {CONTENT_COMPRESSION_THRESHOLD})"
+        )
+    )
+    await connection.execute(
+        text(f"ALTER TABLE {table} ALTER COLUMN content {storage}")
+    )
+    await connection.execute(
+        text(f"INSERT INTO {table} (id, content) VALUES (:id, :content)"),
+        [{"id": note_id, "content": content} for note_id, content in notes],
+    )
+    await connection.execute(text(f"VACUUM ANALYZE {table}"))
+
+
+async def read_latencies_us(
+    connection: AsyncConnection, table: str, note_ids: list
+) -> list[float]:
+    query = text(f"SELECT content FROM {table} WHERE id = :id")
+    latencies = []
+    for note_id in note_ids:
+        started_at = time.perf_counter()
+        await connection.execute(query, {"id": note_id})
+        latencies.append((time.perf_counter() - started_at) * 1_000_000)
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=500)
+    # lz4 is available only in servers built with it (--with-lz4)
+    parser.add_argument(
+        "--modes", nargs="+", choices=STORAGE_MODES, default=list(STORAGE_MODES)
+    )
+    args = parser.parse_args()
+
+    random_ = random.Random(42)
+    notes = [
+        (uuid4(), log_like_content(random_.choice(NOTE_SIZES), random_))
+        for _ in range(args.notes)
+    ]
+    read_ids = [note_id for note_id, _ in random_.choices(notes, k=args.reads)]
+    raw_bytes = sum(len(content.encode()) for _, content in notes)
+
+    engine = create_async_engine(
+        URL.create(
+            drivername="postgresql+asyncpg",
+            host=postgres_settings.host,
+            port=postgres_settings.port,
+            username=postgres_settings.user,
+            password=postgres_settings.password,
+            database=postgres_settings.db,
+        ),
+        isolation_level="AUTOCOMMIT",
+    )
+    print(f"notes: {args.notes}, content: {raw_bytes / 1024 / 1024:.1f} MiB")
+    print(f"{'storage':>12} | {'table size':>10} | {'read p50':>9} | {'read p95':>9}")
+    try:
+        async with engine.connect() as connection:
+            for mode in args.modes:
+                storage = STORAGE_MODES[mode]
+                table = f"bench_notes_{mode}"
+                await prepare_table(connection, table, storage, notes)
+                table_size = await connection.scalar(
+                    text(f"SELECT pg_total_relation_size('{table}')")
+                )
+                # warms up buffers, so reads measure decompression, not disk
+                await read_latencies_us(connection, table, read_ids)
+                latencies = await read_latencies_us(connection, table, read_ids)
+                p95 = statistics.quantiles(latencies, n=20)[-1]
+                print(
+                    f"{mode:>12} | {table_size / 1024 / 1024:>6.1f} MiB "
+                    f"| {statistics.median(latencies):>6.0f} us | {p95:>6.0f} us"
+                )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
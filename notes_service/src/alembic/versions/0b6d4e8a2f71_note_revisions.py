@@ -0,0 +1,50 @@
+"""note revisions
+
+Revision ID: 0b6d4e8a2f71
+Revises: f7c3a9d05e18
+Create Date: 2026-10-17 19:42:26.118035
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0b6d4e8a2f71"
+down_revision: Union[str, None] = "f7c3a9d05e18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "note_revisions",
+        sa.Column("note_id", sa.UUID(), nullable=False),
+        sa.Column("number", sa.Integer(), nullable=False),
+        sa.Column("snapshot", sa.Text(), nullable=True),
+        sa.Column("delta", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column(
+            "replaced_at",
+            sa.DateTime(),
+            server_default=sa.text("TIMEZONE('utc', now())"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["note_id"], ["notes.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("note_id", "number"),
+    )
+    op.execute(
+        """
+        ALTER TABLE note_revisions
+        ALTER COLUMN snapshot SET COMPRESSION lz4,
+        SET (toast_tuple_target = 1024)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("note_revisions")
@@ -0,0 +1,158 @@
+"""note tags
+
+Revision ID: 3a7d2c9e5f10
+Revises: 9e1f5a7c3b42
+Create Date: 2026-10-17 21:14:52.306174
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "3a7d2c9e5f10"
+down_revision: Union[str, None] = "9e1f5a7c3b42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNT_TAGS_TRIGGERS = (
+    ("INSERT", "NEW TABLE AS new_notes"),
+    ("UPDATE", "OLD TABLE AS old_notes NEW TABLE AS new_notes"),
+    ("DELETE", "OLD TABLE AS old_notes"),
+)
+
+
+def set_updated_at_trigger(tracked_columns: tuple[str, ...]) -> str:
+    return f"""
+        CREATE TRIGGER notes_set_updated_at
+        BEFORE UPDATE OF {", ".join(tracked_columns)} ON notes
+        FOR EACH ROW
+        WHEN (
+            ({", ".join(f"OLD.{column}" for column in tracked_columns)})
+            IS DISTINCT FROM
+            ({", ".join(f"NEW.{column}" for column in tracked_columns)})
+        )
+        EXECUTE FUNCTION notes_set_updated_at()
+        """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # constant default, so existing rows are not rewritten
+    op.add_column(
+        "notes",
+        sa.Column(
+            "tags",
+            postgresql.ARRAY(sa.Text()),
+            server_default=sa.text("'{}'::text[]"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_notes_owner_id_tags",
+        "notes",
+        ["owner_id", "tags"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    # tag changes bump updated_at and version as other note changes do
+    op.execute("DROP TRIGGER notes_set_updated_at ON notes")
+    op.execute(set_updated_at_trigger(("title", "content", "owner_id", "tags")))
+
+    # existing notes have no tags, so counters start empty
+    op.create_table(
+        "note_tag_counts",
+        sa.Column("owner_id", sa.UUID(), nullable=False),
+        sa.Column("tag", sa.Text(), nullable=False),
+        sa.Column("notes_amount", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("owner_id", "tag"),
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION note_tag_counts_change(
+            owner_ids uuid[], tags text[], deltas integer[]
+        ) RETURNS void AS $$
+            INSERT INTO note_tag_counts (owner_id, tag, notes_amount)
+            SELECT owner_id, tag, sum(delta)
+            FROM unnest(owner_ids, tags, deltas) AS change(owner_id, tag, delta)
+            GROUP BY owner_id, tag
+            HAVING sum(delta) <> 0
+            ORDER BY owner_id, tag
+            ON CONFLICT (owner_id, tag)
+            DO UPDATE SET notes_amount = note_tag_counts.notes_amount
+                + EXCLUDED.notes_amount;
+
+            DELETE FROM note_tag_counts
+            WHERE (owner_id, tag) IN (SELECT * FROM unnest(owner_ids, tags))
+                AND notes_amount <= 0;
+        $$ LANGUAGE sql
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notes_count_tags() RETURNS trigger AS $$
+        DECLARE
+            owner_ids uuid[];
+            tags text[];
+            deltas integer[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(new_notes.owner_id), array_agg(note_tag), array_agg(1)
+                INTO owner_ids, tags, deltas
+                FROM new_notes, unnest(new_notes.tags) AS note_tag;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT array_agg(old_notes.owner_id), array_agg(note_tag), array_agg(-1)
+                INTO owner_ids, tags, deltas
+                FROM old_notes, unnest(old_notes.tags) AS note_tag;
+            ELSE
+                SELECT array_agg(owner_id), array_agg(note_tag), array_agg(delta)
+                INTO owner_ids, tags, deltas
+                FROM (
+                    SELECT new_notes.owner_id, note_tag, 1 AS delta
+                    FROM new_notes JOIN old_notes USING (id),
+                        unnest(new_notes.tags) AS note_tag
+                    WHERE (new_notes.owner_id, new_notes.tags)
+                        IS DISTINCT FROM (old_notes.owner_id, old_notes.tags)
+                    UNION ALL
+                    SELECT old_notes.owner_id, note_tag, -1
+                    FROM new_notes JOIN old_notes USING (id),
+                        unnest(old_notes.tags) AS note_tag
+                    WHERE (new_notes.owner_id, new_notes.tags)
+                        IS DISTINCT FROM (old_notes.owner_id, old_notes.tags)
+                ) AS changes;
+            END IF;
+            IF owner_ids IS NOT NULL THEN
+                PERFORM note_tag_counts_change(owner_ids, tags, deltas);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for operation, transition_tables in COUNT_TAGS_TRIGGERS:
+        op.execute(
+            f"""
+            CREATE TRIGGER notes_count_tags_on_{operation.lower()}
+            AFTER {operation} ON notes
+            REFERENCING {transition_tables}
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION notes_count_tags()
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for operation, _ in COUNT_TAGS_TRIGGERS:
+        op.execute(f"DROP TRIGGER notes_count_tags_on_{operation.lower()} ON notes")
+    op.execute("DROP FUNCTION notes_count_tags()")
+    op.execute("DROP FUNCTION note_tag_counts_change(uuid[], text[], integer[])")
+    op.drop_table("note_tag_counts")
+
+    op.execute("DROP TRIGGER notes_set_updated_at ON notes")
+    op.execute(set_updated_at_trigger(("title", "content", "owner_id")))
+    op.drop_index("ix_notes_owner_id_tags", table_name="notes", postgresql_using="gin")
+    op.drop_column("notes", "tags")
@@ -0,0 +1,41 @@
+"""notes title trigram index
+
+Revision ID: 40207f1e9db0
+Revises: 20a397699a7b
+Create Date: 2026-10-17 13:41:52.118430
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "40207f1e9db0"
+down_revision: Union[str, None] = "20a397699a7b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    # allows uuid owner_id to be the leading column of the GIN index
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS btree_gin"))
+    op.create_index(
+        "ix_notes_owner_id_title_trgm",
+        "notes",
+        ["owner_id", "title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_notes_owner_id_title_trgm", table_name="notes", postgresql_using="gin"
+    )
+    # extensions are kept, they might be used outside of this service
@@ -0,0 +1,68 @@
+"""notes revision number
+
+Revision ID: 5c8e1b3f7a26
+Revises: 3a7d2c9e5f10
+Create Date: 2026-10-17 22:41:08.517392
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5c8e1b3f7a26"
+down_revision: Union[str, None] = "3a7d2c9e5f10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "notes",
+        sa.Column(
+            "revision_number",
+            sa.Integer(),
+            server_default=sa.text("1"),
+            nullable=False,
+        ),
+    )
+    op.execute(
+        """
+        UPDATE notes SET revision_number = revisions.number + 1
+        FROM (
+            SELECT note_id, max(number) AS number
+            FROM note_revisions
+            GROUP BY note_id
+        ) AS revisions
+        WHERE notes.id = revisions.note_id
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notes_set_revision_number() RETURNS trigger AS $$
+        BEGIN
+            NEW.revision_number := OLD.revision_number + 1;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER notes_set_revision_number
+        BEFORE UPDATE OF content ON notes
+        FOR EACH ROW
+        WHEN (OLD.content IS DISTINCT FROM NEW.content)
+        EXECUTE FUNCTION notes_set_revision_number()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER notes_set_revision_number ON notes")
+    op.execute("DROP FUNCTION notes_set_revision_number()")
+    op.drop_column("notes", "revision_number")
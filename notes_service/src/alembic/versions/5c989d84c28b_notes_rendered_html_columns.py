@@ -0,0 +1,39 @@
+"""notes rendered html columns
+
+Revision ID: 5c989d84c28b
+Revises: 900ddbfa072e
+Create Date: 2026-10-17 11:03:48.215690
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5c989d84c28b"
+down_revision: Union[str, None] = "900ddbfa072e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("notes", sa.Column("content_html", sa.Text(), nullable=True))
+    # existing rows get version 0, so they are rendered lazily on the first read
+    op.add_column(
+        "notes",
+        sa.Column(
+            "renderer_version",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("notes", "renderer_version")
+    op.drop_column("notes", "content_html")
@@ -0,0 +1,48 @@
+"""note tombstones
+
+Revision ID: 7d2a9e4c1b63
+Revises: b3f1c7e25d90
+Create Date: 2026-10-17 15:11:42.906317
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2a9e4c1b63"
+down_revision: Union[str, None] = "b3f1c7e25d90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "note_tombstones",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("owner_id", sa.UUID(), nullable=False),
+        sa.Column(
+            "deleted_at",
+            sa.DateTime(),
+            server_default=sa.text("TIMEZONE('utc', now())"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_note_tombstones_owner_id_deleted_at_id",
+        "note_tombstones",
+        ["owner_id", "deleted_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_note_tombstones_owner_id_deleted_at_id", table_name="note_tombstones"
+    )
+    op.drop_table("note_tombstones")
@@ -0,0 +1,55 @@
+"""notes search vector content limit
+
+Revision ID: 8f2d6b0a4c19
+Revises: 5c8e1b3f7a26
+Create Date: 2026-10-17 23:05:37.084216
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "8f2d6b0a4c19"
+down_revision: Union[str, None] = "5c8e1b3f7a26"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def replace_search_vector(content: str) -> None:
+    # expressions of generated columns can not be altered, the column is
+    # added again and its index is dropped with the column
+    op.drop_column("notes", "search_vector")
+    op.add_column(
+        "notes",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('simple', title), 'A') || "
+                f"setweight(to_tsvector('simple', {content}), 'B')",
+                persisted=True,
+            ),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_notes_search_vector",
+        "notes",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    replace_search_vector("left(content, 100000)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    replace_search_vector("content")
@@ -0,0 +1,51 @@
+"""notes keyset pagination indexes
+
+Revision ID: 900ddbfa072e
+Revises: e2e67cffa500
+Create Date: 2026-10-17 10:12:31.402114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "900ddbfa072e"
+down_revision: Union[str, None] = "e2e67cffa500"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_notes_created_at_id", "notes", ["created_at", "id"], unique=False
+    )
+    op.create_index(
+        "ix_notes_updated_at_id", "notes", ["updated_at", "id"], unique=False
+    )
+    op.create_index(
+        "ix_notes_owner_id_created_at_id",
+        "notes",
+        ["owner_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notes_owner_id_updated_at_id",
+        "notes",
+        ["owner_id", "updated_at", "id"],
+        unique=False,
+    )
+    # owner_id is the leading column of the composite indexes above
+    op.drop_index(op.f("ix_notes_owner_id"), table_name="notes")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f("ix_notes_owner_id"), "notes", ["owner_id"], unique=False)
+    op.drop_index("ix_notes_owner_id_updated_at_id", table_name="notes")
+    op.drop_index("ix_notes_owner_id_created_at_id", table_name="notes")
+    op.drop_index("ix_notes_updated_at_id", table_name="notes")
+    op.drop_index("ix_notes_created_at_id", table_name="notes")
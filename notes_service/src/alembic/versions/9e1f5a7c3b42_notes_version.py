@@ -0,0 +1,53 @@
+"""notes version
+
+Revision ID: 9e1f5a7c3b42
+Revises: 0b6d4e8a2f71
+Create Date: 2026-10-17 20:31:08.472915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9e1f5a7c3b42"
+down_revision: Union[str, None] = "0b6d4e8a2f71"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # constant default, so existing rows are not rewritten
+    op.add_column(
+        "notes",
+        sa.Column("version", sa.Integer(), server_default=sa.text("1"), nullable=False),
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notes_set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := TIMEZONE('utc', now());
+            NEW.version := OLD.version + 1;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notes_set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := TIMEZONE('utc', now());
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.drop_column("notes", "version")
@@ -0,0 +1,44 @@
+"""notes unique title per owner
+
+Revision ID: b3f1c7e25d90
+Revises: 40207f1e9db0
+Create Date: 2026-10-17 14:02:11.384529
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b3f1c7e25d90"
+down_revision: Union[str, None] = "40207f1e9db0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # duplicates could slip through the former read-then-write check under
+    # concurrent requests, all but the oldest one get a distinguishing suffix
+    op.execute(
+        """
+        UPDATE notes
+        SET title = notes.title || ' (' || left(notes.id::text, 8) || ')'
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY owner_id, title ORDER BY created_at, id
+            ) AS position
+            FROM notes
+        ) AS ranked
+        WHERE notes.id = ranked.id AND ranked.position > 1
+        """
+    )
+    op.create_index(
+        "uq_notes_owner_id_title", "notes", ["owner_id", "title"], unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_notes_owner_id_title", table_name="notes")
@@ -0,0 +1,41 @@
+"""note tombstones per owner
+
+Revision ID: b6e0c4a8d213
+Revises: 8f2d6b0a4c19
+Create Date: 2026-10-17 23:32:19.645803
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b6e0c4a8d213"
+down_revision: Union[str, None] = "8f2d6b0a4c19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # notes moved to another owner leave a tombstone for every previous owner
+    op.drop_constraint("note_tombstones_pkey", "note_tombstones", type_="primary")
+    op.create_primary_key("note_tombstones_pkey", "note_tombstones", ["id", "owner_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # the latest tombstone of every note is kept
+    op.execute(
+        """
+        DELETE FROM note_tombstones
+        WHERE (id, owner_id) NOT IN (
+            SELECT DISTINCT ON (id) id, owner_id
+            FROM note_tombstones
+            ORDER BY id, deleted_at DESC
+        )
+        """
+    )
+    op.drop_constraint("note_tombstones_pkey", "note_tombstones", type_="primary")
+    op.create_primary_key("note_tombstones_pkey", "note_tombstones", ["id"])
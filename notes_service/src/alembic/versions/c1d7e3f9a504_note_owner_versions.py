@@ -0,0 +1,99 @@
+"""note owner versions
+
+Revision ID: c1d7e3f9a504
+Revises: b6e0c4a8d213
+Create Date: 2026-10-18 00:12:46.318907
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c1d7e3f9a504"
+down_revision: Union[str, None] = "b6e0c4a8d213"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BUMP_OWNER_VERSIONS_TRIGGERS = (
+    ("INSERT", "NEW TABLE AS new_notes"),
+    ("UPDATE", "OLD TABLE AS old_notes NEW TABLE AS new_notes"),
+    ("DELETE", "OLD TABLE AS old_notes"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "note_owner_versions",
+        sa.Column("owner_id", sa.UUID(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("owner_id"),
+    )
+    op.execute(
+        """
+        INSERT INTO note_owner_versions (owner_id, version)
+        SELECT owner_id, 1 FROM notes GROUP BY owner_id
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION note_owner_versions_bump(owner_ids uuid[])
+        RETURNS void AS $$
+            INSERT INTO note_owner_versions (owner_id, version)
+            SELECT DISTINCT owner_id, 1
+            FROM unnest(owner_ids) AS owner_id
+            ORDER BY owner_id
+            ON CONFLICT (owner_id)
+            DO UPDATE SET version = note_owner_versions.version + 1;
+        $$ LANGUAGE sql
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notes_bump_owner_versions() RETURNS trigger AS $$
+        DECLARE
+            owner_ids uuid[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                owner_ids := ARRAY(SELECT owner_id FROM new_notes);
+            ELSIF TG_OP = 'DELETE' THEN
+                owner_ids := ARRAY(SELECT owner_id FROM old_notes);
+            ELSE
+                owner_ids := ARRAY(
+                    SELECT unnest(ARRAY[old_notes.owner_id, new_notes.owner_id])
+                    FROM new_notes JOIN old_notes USING (id)
+                    WHERE new_notes.version <> old_notes.version
+                );
+            END IF;
+            IF cardinality(owner_ids) > 0 THEN
+                PERFORM note_owner_versions_bump(owner_ids);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for operation, transition_tables in BUMP_OWNER_VERSIONS_TRIGGERS:
+        op.execute(
+            f"""
+            CREATE TRIGGER notes_bump_owner_versions_on_{operation.lower()}
+            AFTER {operation} ON notes
+            REFERENCING {transition_tables}
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION notes_bump_owner_versions()
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for operation, _ in BUMP_OWNER_VERSIONS_TRIGGERS:
+        op.execute(
+            f"DROP TRIGGER notes_bump_owner_versions_on_{operation.lower()} ON notes"
+        )
+    op.execute("DROP FUNCTION notes_bump_owner_versions()")
+    op.execute("DROP FUNCTION note_owner_versions_bump(uuid[])")
+    op.drop_table("note_owner_versions")
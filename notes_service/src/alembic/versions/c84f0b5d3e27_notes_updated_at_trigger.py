@@ -0,0 +1,51 @@
+"""notes updated_at trigger
+
+Revision ID: c84f0b5d3e27
+Revises: 7d2a9e4c1b63
+Create Date: 2026-10-17 15:48:27.517094
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c84f0b5d3e27"
+down_revision: Union[str, None] = "7d2a9e4c1b63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notes_set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := TIMEZONE('utc', now());
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    # writes of rendered HTML only do not bump updated_at
+    op.execute(
+        """
+        CREATE TRIGGER notes_set_updated_at
+        BEFORE UPDATE OF title, content, owner_id ON notes
+        FOR EACH ROW
+        WHEN (
+            (OLD.title, OLD.content, OLD.owner_id)
+            IS DISTINCT FROM
+            (NEW.title, NEW.content, NEW.owner_id)
+        )
+        EXECUTE FUNCTION notes_set_updated_at()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER notes_set_updated_at ON notes")
+    op.execute("DROP FUNCTION notes_set_updated_at()")
@@ -0,0 +1,43 @@
+"""notes content compression
+
+Revision ID: e5a81f2c9d46
+Revises: c84f0b5d3e27
+Create Date: 2026-10-17 17:12:40.382915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a81f2c9d46"
+down_revision: Union[str, None] = "c84f0b5d3e27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # catalog only changes, existing values keep their compression
+    # until rewritten by tools.recompress_notes
+    op.execute(
+        """
+        ALTER TABLE notes
+        ALTER COLUMN content SET COMPRESSION lz4,
+        ALTER COLUMN content_html SET COMPRESSION lz4,
+        SET (toast_tuple_target = 1024)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        ALTER TABLE notes
+        ALTER COLUMN content SET COMPRESSION default,
+        ALTER COLUMN content_html SET COMPRESSION default,
+        RESET (toast_tuple_target)
+        """
+    )
@@ -0,0 +1,204 @@
+"""note bodies
+
+Revision ID: f7c3a9d05e18
+Revises: e5a81f2c9d46
+Create Date: 2026-10-17 18:05:13.640271
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f7c3a9d05e18"
+down_revision: Union[str, None] = "e5a81f2c9d46"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNT_BODY_REFS_TRIGGERS = (
+    ("INSERT", "NEW TABLE AS new_notes"),
+    ("UPDATE", "OLD TABLE AS old_notes NEW TABLE AS new_notes"),
+    ("DELETE", "OLD TABLE AS old_notes"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "note_bodies",
+        sa.Column("hash", sa.Text(), nullable=False),
+        sa.Column("content_html", sa.Text(), nullable=True),
+        sa.Column(
+            "renderer_version",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("hash"),
+    )
+    op.execute(
+        """
+        ALTER TABLE note_bodies
+        ALTER COLUMN content_html SET COMPRESSION lz4,
+        SET (toast_tuple_target = 1024)
+        """
+    )
+
+    op.add_column("notes", sa.Column("body_hash", sa.Text(), nullable=True))
+    # body_hash is not tracked by notes_set_updated_at trigger
+    op.execute(
+        """
+        UPDATE notes
+        SET body_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+        """
+    )
+    # the most recently rendered HTML of every body is kept
+    op.execute(
+        """
+        INSERT INTO note_bodies (hash, content_html, renderer_version, ref_count)
+        SELECT DISTINCT ON (body_hash)
+            body_hash,
+            content_html,
+            renderer_version,
+            count(*) OVER (PARTITION BY body_hash)
+        FROM notes
+        ORDER BY body_hash, content_html IS NULL, renderer_version DESC
+        """
+    )
+    op.alter_column("notes", "body_hash", nullable=False)
+    op.create_index("ix_notes_body_hash", "notes", ["body_hash"], unique=False)
+    op.create_foreign_key(
+        "notes_body_hash_fkey",
+        "notes",
+        "note_bodies",
+        ["body_hash"],
+        ["hash"],
+        deferrable=True,
+        initially="DEFERRED",
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notes_set_body_hash() RETURNS trigger AS $$
+        BEGIN
+            NEW.body_hash := encode(sha256(convert_to(NEW.content, 'UTF8')), 'hex');
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER notes_set_body_hash
+        BEFORE INSERT OR UPDATE OF content ON notes
+        FOR EACH ROW
+        EXECUTE FUNCTION notes_set_body_hash()
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION note_bodies_change_refs(
+            body_hashes text[], delta integer
+        ) RETURNS void AS $$
+            INSERT INTO note_bodies (hash, ref_count)
+            SELECT body_hash, delta * count(*)
+            FROM unnest(body_hashes) AS body_hash
+            GROUP BY body_hash
+            ORDER BY body_hash
+            ON CONFLICT (hash)
+            DO UPDATE SET ref_count = note_bodies.ref_count + EXCLUDED.ref_count;
+
+            DELETE FROM note_bodies WHERE hash = ANY(body_hashes) AND ref_count <= 0;
+        $$ LANGUAGE sql
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notes_count_body_refs() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM note_bodies_change_refs(
+                    ARRAY(SELECT body_hash FROM new_notes), 1
+                );
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM note_bodies_change_refs(
+                    ARRAY(SELECT body_hash FROM old_notes), -1
+                );
+            ELSE
+                -- new bodies go first, so bodies swapped by notes are kept
+                PERFORM note_bodies_change_refs(
+                    ARRAY(
+                        SELECT new_notes.body_hash
+                        FROM new_notes JOIN old_notes USING (id)
+                        WHERE new_notes.body_hash <> old_notes.body_hash
+                    ),
+                    1
+                );
+                PERFORM note_bodies_change_refs(
+                    ARRAY(
+                        SELECT old_notes.body_hash
+                        FROM new_notes JOIN old_notes USING (id)
+                        WHERE new_notes.body_hash <> old_notes.body_hash
+                    ),
+                    -1
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for operation, transition_tables in COUNT_BODY_REFS_TRIGGERS:
+        op.execute(
+            f"""
+            CREATE TRIGGER notes_count_body_refs_on_{operation.lower()}
+            AFTER {operation} ON notes
+            REFERENCING {transition_tables}
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION notes_count_body_refs()
+            """
+        )
+
+    op.drop_column("notes", "renderer_version")
+    op.drop_column("notes", "content_html")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column("notes", sa.Column("content_html", sa.Text(), nullable=True))
+    op.add_column(
+        "notes",
+        sa.Column(
+            "renderer_version",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+    op.execute("ALTER TABLE notes ALTER COLUMN content_html SET COMPRESSION lz4")
+
+    for operation, _ in COUNT_BODY_REFS_TRIGGERS:
+        op.execute(
+            f"DROP TRIGGER notes_count_body_refs_on_{operation.lower()} ON notes"
+        )
+    op.execute("DROP FUNCTION notes_count_body_refs()")
+    op.execute("DROP FUNCTION note_bodies_change_refs(text[], integer)")
+    op.execute("DROP TRIGGER notes_set_body_hash ON notes")
+    op.execute("DROP FUNCTION notes_set_body_hash()")
+
+    op.execute(
+        """
+        UPDATE notes
+        SET content_html = note_bodies.content_html,
+            renderer_version = note_bodies.renderer_version
+        FROM note_bodies
+        WHERE note_bodies.hash = notes.body_hash
+        """
+    )
+    op.drop_constraint("notes_body_hash_fkey", "notes", type_="foreignkey")
+    op.drop_index("ix_notes_body_hash", table_name="notes")
+    op.drop_column("notes", "body_hash")
+    op.drop_table("note_bodies")
@@ -1,11 +1,62 @@
 from typing import Annotated, TYPE_CHECKING
 from uuid import UUID
+from datetime import datetime, timezone
+from email.utils import format_datetime
 
-from fastapi import APIRouter, Path, HTTPException, Depends, status
+from fastapi import (
+    APIRouter,
+    Path,
+    Query,
+    Header,
+    HTTPException,
+    Depends,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from dependency_injector.wiring import Provide, inject
 
-from src.schemas.note import NoteOutputShema, NoteCreateShema, NoteUpdateShema
-from src.exceptions.service import NoteNotFoundError, NoteAlreadyExistsError
+from src.schemas.note import (
+    NoteOutputShema,
+    NoteCreateShema,
+    NoteUpdateShema,
+    NoteImportResultShema,
+    NoteBatchShema,
+    NoteBatchResultShema,
+    NotePageShema,
+    NoteSummaryPageShema,
+    NoteChangesShema,
+    NoteSearchPageShema,
+    NoteTitleSuggestionShema,
+    NoteRevisionPageShema,
+    NoteRevisionContentShema,
+    NoteTag,
+    NoteTagCountShema,
+    NoteQueryShema,
+    NoteSummaryShema,
+    NoteContentPatchShema,
+    NoteContentPatchResultShema,
+)
+from src.repositories.pagination import NoteOrderingField
+from src.core.settings import (
+    DEFAULT_NOTES_PAGE_SIZE,
+    MAX_NOTES_PAGE_SIZE,
+    DEFAULT_TITLE_SUGGESTIONS_AMOUNT,
+    MAX_TITLE_SUGGESTIONS_AMOUNT,
+    DEFAULT_REVISIONS_PAGE_SIZE,
+    MAX_NOTE_TAGS,
+    DEFAULT_TAG_COUNTS_AMOUNT,
+    MAX_TAG_COUNTS_AMOUNT,
+)
+from src.exceptions.service import (
+    NoteNotFoundError,
+    NoteAlreadyExistsError,
+    InvalidCursorError,
+    NoteRevisionNotFoundError,
+    NoteVersionConflictError,
+    InvalidContentPatchError,
+)
 from src.container import Container
 
 if TYPE_CHECKING:
@@ -15,13 +66,47 @@ if TYPE_CHECKING:
 notes_router = APIRouter()
 
 
+def http_date(value: datetime) -> str:
+    """Formats naive UTC datetime as HTTP date, e.g. for Last-Modified header"""
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of If-None-Match header value with ETag"""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
 @notes_router.get("/")
 @inject
 async def get_all(
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_NOTES_PAGE_SIZE)
+    ] = DEFAULT_NOTES_PAGE_SIZE,
+    cursor: str | None = None,
+    order_by: NoteOrderingField = NoteOrderingField.CREATED_AT,
     md_content_format: bool = False,
     note_service: "NoteService" = Depends(Provide[Container.note_service]),
-) -> list[NoteOutputShema]:
-    notes = await note_service.get_all(md_content_format=md_content_format)
+) -> NotePageShema:
+    try:
+        notes = await note_service.get_all(
+            limit=limit,
+            cursor=cursor,
+            order_by=order_by,
+            md_content_format=md_content_format,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
     return notes
 
@@ -30,33 +115,266 @@ async def get_all(
 @inject
 async def get_all_by_owner_id(
     owner_id: Annotated[UUID, Path()],
+    request: Request,
+    response: Response,
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_NOTES_PAGE_SIZE)
+    ] = DEFAULT_NOTES_PAGE_SIZE,
+    cursor: str | None = None,
+    order_by: NoteOrderingField = NoteOrderingField.CREATED_AT,
     md_content_format: bool = False,
+    tags: Annotated[list[NoteTag] | None, Query(max_length=MAX_NOTE_TAGS)] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
     note_service: "NoteService" = Depends(Provide[Container.note_service]),
-) -> list[NoteOutputShema]:
-    notes_by_owner_id = await note_service.get_all_by_owner_id(
-        owner_id=owner_id, md_content_format=md_content_format
+) -> NotePageShema:
+    # page of the collection is identified by the path and query
+    etag = await note_service.get_owner_notes_etag(
+        owner_id=owner_id, variant=f"{request.url.path}?{request.url.query}"
     )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    try:
+        notes_by_owner_id = await note_service.get_all_by_owner_id(
+            owner_id=owner_id,
+            limit=limit,
+            cursor=cursor,
+            order_by=order_by,
+            md_content_format=md_content_format,
+            tags=tags,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    response.headers["ETag"] = etag
+    return notes_by_owner_id
+
+
+@notes_router.get("/summaries")
+@inject
+async def get_summaries(
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_NOTES_PAGE_SIZE)
+    ] = DEFAULT_NOTES_PAGE_SIZE,
+    cursor: str | None = None,
+    order_by: NoteOrderingField = NoteOrderingField.CREATED_AT,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> NoteSummaryPageShema:
+    try:
+        notes = await note_service.get_summaries(
+            limit=limit, cursor=cursor, order_by=order_by
+        )
+    except InvalidCursorError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    return notes
+
+
+@notes_router.get("/summaries/by-owner-id/{owner_id}")
+@inject
+async def get_summaries_by_owner_id(
+    owner_id: Annotated[UUID, Path()],
+    request: Request,
+    response: Response,
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_NOTES_PAGE_SIZE)
+    ] = DEFAULT_NOTES_PAGE_SIZE,
+    cursor: str | None = None,
+    order_by: NoteOrderingField = NoteOrderingField.CREATED_AT,
+    tags: Annotated[list[NoteTag] | None, Query(max_length=MAX_NOTE_TAGS)] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> NoteSummaryPageShema:
+    etag = await note_service.get_owner_notes_etag(
+        owner_id=owner_id, variant=f"{request.url.path}?{request.url.query}"
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    try:
+        notes_by_owner_id = await note_service.get_summaries_by_owner_id(
+            owner_id=owner_id,
+            limit=limit,
+            cursor=cursor,
+            order_by=order_by,
+            tags=tags,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
+    response.headers["ETag"] = etag
     return notes_by_owner_id
 
 
+@notes_router.post("/query/by-owner-id/{owner_id}")
+@inject
+async def query_by_owner_id(
+    owner_id: Annotated[UUID, Path()],
+    note_query: NoteQueryShema,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> list[NoteSummaryShema]:
+    return await note_service.query_by_owner_id(
+        owner_id=owner_id, note_query=note_query
+    )
+
+
+@notes_router.get("/tags/by-owner-id/{owner_id}")
+@inject
+async def get_tag_counts(
+    owner_id: Annotated[UUID, Path()],
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_TAG_COUNTS_AMOUNT)
+    ] = DEFAULT_TAG_COUNTS_AMOUNT,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> list[NoteTagCountShema]:
+    return await note_service.get_tag_counts(owner_id=owner_id, limit=limit)
+
+
+@notes_router.get("/changes")
+@inject
+async def get_changes(
+    owner_id: UUID,
+    since: str | None = None,
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_NOTES_PAGE_SIZE)
+    ] = DEFAULT_NOTES_PAGE_SIZE,
+    md_content_format: bool = False,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> NoteChangesShema:
+    try:
+        changes = await note_service.get_changes(
+            owner_id=owner_id,
+            since=since,
+            limit=limit,
+            md_content_format=md_content_format,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    return changes
+
+
+@notes_router.get("/export/by-owner-id/{owner_id}")
+@inject
+async def export_by_owner_id(
+    owner_id: Annotated[UUID, Path()],
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> StreamingResponse:
+    return StreamingResponse(
+        note_service.export_by_owner_id(owner_id=owner_id),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="notes-{owner_id}.ndjson"'
+        },
+    )
+
+
+@notes_router.get("/search")
+@inject
+async def search(
+    owner_id: UUID,
+    q: Annotated[str, Query(min_length=1, max_length=256)],
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_NOTES_PAGE_SIZE)
+    ] = DEFAULT_NOTES_PAGE_SIZE,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> NoteSearchPageShema:
+    found_notes = await note_service.search(
+        owner_id=owner_id, query=q, limit=limit, offset=offset
+    )
+
+    return found_notes
+
+
+@notes_router.get("/typeahead")
+@inject
+async def suggest_titles(
+    owner_id: UUID,
+    q: Annotated[str, Query(min_length=1, max_length=256)],
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_TITLE_SUGGESTIONS_AMOUNT)
+    ] = DEFAULT_TITLE_SUGGESTIONS_AMOUNT,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> list[NoteTitleSuggestionShema]:
+    suggested_titles = await note_service.suggest_titles(
+        owner_id=owner_id, fragment=q, limit=limit
+    )
+
+    return suggested_titles
+
+
 @notes_router.get("/by-id/{note_id}")
 @inject
 async def get_one_by_id(
     note_id: Annotated[UUID, Path()],
+    response: Response,
     md_content_format: bool = False,
+    if_none_match: Annotated[str | None, Header()] = None,
     note_service: "NoteService" = Depends(Provide[Container.note_service]),
 ) -> NoteOutputShema:
     try:
+        if if_none_match is not None:
+            # checked by metadata only, content is not loaded and rendered
+            etag = await note_service.get_note_etag(
+                note_id=note_id, md_content_format=md_content_format
+            )
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
         note = await note_service.get_one_by_id(
             note_id=note_id, md_content_format=md_content_format
         )
     except NoteNotFoundError:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Note not found")
 
+    response.headers["ETag"] = note_service.note_etag(
+        note_id=note.id,
+        version=note.version,
+        md_content_format=md_content_format,
+    )
+    response.headers["Last-Modified"] = http_date(note.updated_at)
     return note
 
 
+@notes_router.get("/by-id/{note_id}/revisions")
+@inject
+async def get_revisions(
+    note_id: Annotated[UUID, Path()],
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_NOTES_PAGE_SIZE)
+    ] = DEFAULT_REVISIONS_PAGE_SIZE,
+    before: Annotated[int | None, Query(ge=1)] = None,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> NoteRevisionPageShema:
+    try:
+        revisions = await note_service.get_revisions(
+            note_id=note_id, limit=limit, before=before
+        )
+    except NoteNotFoundError:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Note not found")
+
+    return revisions
+
+
+@notes_router.get("/by-id/{note_id}/revisions/{number}")
+@inject
+async def get_revision(
+    note_id: Annotated[UUID, Path()],
+    number: Annotated[int, Path(ge=1)],
+    md_content_format: bool = False,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> NoteRevisionContentShema:
+    try:
+        revision = await note_service.get_revision(
+            note_id=note_id, number=number, md_content_format=md_content_format
+        )
+    except NoteRevisionNotFoundError:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Revision not found")
+
+    return revision
+
+
 @notes_router.post("/create/", status_code=201)
 @inject
 async def create_one(
@@ -74,23 +392,102 @@ async def create_one(
     return new_note_id
 
 
+@notes_router.post("/import/by-owner-id/{owner_id}")
+@inject
+async def import_by_owner_id(
+    owner_id: Annotated[UUID, Path()],
+    request: Request,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> NoteImportResultShema:
+    # body is newline-delimited JSON, consumed as a stream
+    import_result = await note_service.import_by_owner_id(
+        owner_id=owner_id, chunks=request.stream()
+    )
+
+    return import_result
+
+
 @notes_router.patch("/update/{note_id}")
 @inject
 async def update_one(
     note_id: Annotated[UUID, Path()],
     updated_note: NoteUpdateShema,
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
     note_service: "NoteService" = Depends(Provide[Container.note_service]),
 ) -> None:
+    # a single ETag of any representation of the note, "*" only requires the note
+    expected_version = None
+    if if_match is not None and if_match.strip() != "*":
+        expected_version = note_service.version_from_etag(if_match)
+        if expected_version is None:
+            raise HTTPException(
+                status.HTTP_412_PRECONDITION_FAILED,
+                detail="If-Match should be a single ETag of the note",
+            )
+
     try:
-        await note_service.update_one(note_id=note_id, updated_note=updated_note)
+        version = await note_service.update_one(
+            note_id=note_id,
+            updated_note=updated_note,
+            expected_version=expected_version,
+        )
     except NoteNotFoundError:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Note not found")
+    except NoteVersionConflictError:
+        raise HTTPException(
+            status.HTTP_412_PRECONDITION_FAILED,
+            detail="Note was changed since the version of If-Match",
+        )
     except NoteAlreadyExistsError:
         raise HTTPException(
             status.HTTP_409_CONFLICT,
             detail=f"User already has got a note with title - {updated_note.title}",
         )
 
+    response.headers["ETag"] = note_service.note_etag(
+        note_id=note_id, version=version, md_content_format=False
+    )
+
+
+@notes_router.patch("/update/{note_id}/content")
+@inject
+async def patch_content(
+    note_id: Annotated[UUID, Path()],
+    patch: NoteContentPatchShema,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> NoteContentPatchResultShema:
+    try:
+        patch_result = await note_service.patch_content(note_id=note_id, patch=patch)
+    except NoteNotFoundError:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Note not found")
+    except NoteVersionConflictError:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            detail="Note was changed since the base version of the patch",
+        )
+    except InvalidContentPatchError as e:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.msg)
+
+    return patch_result
+
+
+@notes_router.post("/batch/")
+@inject
+async def apply_batch(
+    batch: NoteBatchShema,
+    note_service: "NoteService" = Depends(Provide[Container.note_service]),
+) -> NoteBatchResultShema:
+    try:
+        batch_result = await note_service.apply_batch(batch=batch)
+    except NoteAlreadyExistsError:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            detail="Notes of the batch conflict with each other by titles",
+        )
+
+    return batch_result
+
 
 @notes_router.delete("/delete/{note_id}", status_code=204)
 @inject
@@ -26,6 +26,8 @@ class DeleteAllUserNotesCallback(BaseCallback):
         logger.info("Received messege on delete user`s notes")
         user_id = json.loads(message.body)["user_id"]
 
+        # acked only when all notes are deleted, a redelivered message
+        # after restart continues deletion from the remaining notes
         await self.note_service.delete_all_by_owner_id(owner_id=user_id)
         await message.ack()
 
@@ -4,6 +4,11 @@ from src.core.database import AsyncDatabase
 from src.repositories.note import NoteRepository
 from src.services.note import NoteService
 from src.core.broker import AsyncBroker
+from src.core.redis import AsyncRedis
+from src.core.rendering import MarkdownRenderingEngine, MarkdownConverterPool
+from src.core.render_cache import RenderCache, RedisRenderCache
+from src.core.note_cache import NoteCache
+from src.core.single_flight import SingleFlight
 from src.broker.callbacks import DeleteAllUserNotesCallback
 
 
@@ -19,8 +24,58 @@ class Container(containers.DeclarativeContainer):
         password=config.postgres_settings.password,
         db=config.postgres_settings.db,
     )
+    note_redis = providers.Singleton(
+        AsyncRedis,
+        host=config.redis_settings.host,
+        port=config.redis_settings.port,
+        username=config.redis_settings.user,
+        password=config.redis_settings.password,
+    )
+    render_cache = providers.Singleton(
+        RenderCache,
+        max_bytes=config.render_cache_settings.max_bytes,
+        second_tier=providers.Selector(
+            config.render_cache_settings.second_tier,
+            none=providers.Object(None),
+            redis=providers.Singleton(
+                RedisRenderCache,
+                redis=note_redis,
+                ttl=config.render_cache_settings.redis_ttl,
+            ),
+        ),
+    )
+    markdown_converter_pool = providers.Singleton(
+        MarkdownConverterPool,
+        extensions=config.markdown_rendering_settings.extensions,
+    )
+    markdown_rendering_engine = providers.Singleton(
+        MarkdownRenderingEngine,
+        pool_size=config.markdown_rendering_settings.pool_size,
+        inline_threshold=config.markdown_rendering_settings.inline_threshold,
+        converter_pool=markdown_converter_pool,
+        render_cache=render_cache,
+    )
+    note_cache = providers.Selector(
+        config.note_cache_settings.backend,
+        none=providers.Object(None),
+        redis=providers.Singleton(
+            NoteCache,
+            redis=note_redis,
+            ttl=config.note_cache_settings.ttl,
+            lock_timeout=config.note_cache_settings.lock_timeout,
+        ),
+    )
+    # shared by all service instances, so concurrent requests are deduplicated
+    note_single_flight = providers.Singleton(SingleFlight)
     note_repository = providers.Factory(NoteRepository, database=note_database)
-    note_service = providers.Factory(NoteService, repository=note_repository)
+    note_service = providers.Factory(
+        NoteService,
+        repository=note_repository,
+        rendering_engine=markdown_rendering_engine,
+        deletion_batch_size=config.note_deletion_settings.batch_size,
+        single_flight=note_single_flight,
+        note_cache=note_cache,
+    )
     note_broker = providers.Singleton(
         AsyncBroker,
         host=config.rabbitmq_settings.host,
@@ -0,0 +1,67 @@
+import json
+from difflib import SequenceMatcher
+
+# delta is a JSON list of operations applied to lines of the source text in order:
+# positive int copies that many lines, negative int skips that many lines,
+# string is inserted as is
+Delta = list[int | str]
+
+
+def make_delta(source: str, target: str) -> Delta:
+    """Returns line-based delta turning source into target"""
+    source_lines = source.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+
+    delta = []
+    matcher = SequenceMatcher(None, source_lines, target_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append(i2 - i1)
+            continue
+        if i2 > i1:
+            delta.append(i1 - i2)
+        if j2 > j1:
+            delta.append("".join(target_lines[j1:j2]))
+
+    return delta
+
+
+def apply_delta(source: str, delta: Delta) -> str:
+    source_lines = source.splitlines(keepends=True)
+
+    target, position = [], 0
+    for operation in delta:
+        if isinstance(operation, str):
+            target.append(operation)
+        elif operation > 0:
+            target.extend(source_lines[position : position + operation])
+            position += operation
+        else:
+            position -= operation
+
+    return "".join(target)
+
+
+def delta_size(delta: Delta) -> int:
+    """Length of delta serialized to JSON, to compare it with the full text"""
+    return len(json.dumps(delta, ensure_ascii=False, separators=(",", ":")))
+
+
+def apply_edits(source: str, edits: list[tuple[int, int, str]]) -> str:
+    """
+    Applies (offset, deleted length, inserted text) edits to source, offsets are
+    positions in source in characters, edits are ordered and do not overlap
+    """
+    target, position = [], 0
+    for offset, deleted, inserted in edits:
+        if offset < position or offset + deleted > len(source):
+            raise ValueError(
+                f"Edit at {offset} of {deleted} characters is out of order "
+                f"or out of text of {len(source)} characters"
+            )
+        target.append(source[position:offset])
+        target.append(inserted)
+        position = offset + deleted
+    target.append(source[position:])
+
+    return "".join(target)
@@ -0,0 +1,174 @@
+import time
+import asyncio
+from uuid import UUID, uuid4
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from pydantic import ValidationError
+from redis.exceptions import RedisError
+
+from src.schemas.note import NoteCachedShema
+from src.logger import logger
+
+if TYPE_CHECKING:
+    from src.core.redis import AsyncRedis
+
+
+# stores the loaded note only while the loader still holds the lock,
+# so a note invalidated during loading is not cached with outdated data
+STORE_IF_LOCKED_SCRIPT = """
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call("SET", KEYS[2], ARGV[2], "EX", ARGV[3])
+redis.call("SADD", KEYS[3], ARGV[4])
+redis.call("EXPIRE", KEYS[3], ARGV[3])
+redis.call("DEL", KEYS[1])
+return 1
+"""
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+INVALIDATE_OWNER_SCRIPT = """
+local note_ids = redis.call("SMEMBERS", KEYS[1])
+for _, note_id in ipairs(note_ids) do
+    redis.call("DEL", ARGV[1] .. note_id, ARGV[2] .. note_id)
+end
+redis.call("DEL", KEYS[1])
+return #note_ids
+"""
+
+
+class NoteCache:
+    """
+    Read-through Redis cache of single notes together with their rendered HTML.
+    Concurrent misses of the same note are collapsed: the first reader takes
+    a short lock and loads the note, the rest wait for it to appear in cache.
+    Redis failures are logged and treated as misses.
+    """
+
+    note_prefix = "note:"
+    lock_prefix = "note_lock:"
+    owner_prefix = "owner_notes:"
+
+    def __init__(
+        self,
+        redis: "AsyncRedis",
+        ttl: int,
+        lock_timeout: float,
+        lock_poll_interval: float = 0.05,
+    ) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.lock_poll_interval = lock_poll_interval
+
+        self._store_if_locked = redis.r.register_script(STORE_IF_LOCKED_SCRIPT)
+        self._release_lock = redis.r.register_script(RELEASE_LOCK_SCRIPT)
+        self._invalidate_owner = redis.r.register_script(INVALIDATE_OWNER_SCRIPT)
+
+    @property
+    def _lock_timeout_ms(self) -> int:
+        return int(self.lock_timeout * 1000)
+
+    def _note_key(self, note_id: UUID) -> str:
+        return f"{self.note_prefix}{note_id}"
+
+    def _lock_key(self, note_id: UUID) -> str:
+        return f"{self.lock_prefix}{note_id}"
+
+    def _owner_key(self, owner_id: UUID) -> str:
+        return f"{self.owner_prefix}{owner_id}"
+
+    async def _get(self, note_id: UUID) -> NoteCachedShema | None:
+        cached_note = await self.redis.r.get(self._note_key(note_id))
+        if cached_note is None:
+            return None
+        try:
+            return NoteCachedShema.model_validate_json(cached_note)
+        except ValidationError:
+            # cached before the note shema was changed, it is loaded again
+            return None
+
+    async def get_or_load(
+        self, note_id: UUID, load: Callable[[], Awaitable[NoteCachedShema]]
+    ) -> NoteCachedShema:
+        """Returns cached note, otherwise loads and caches it, load errors are raised"""
+        try:
+            cached_note = await self._get(note_id)
+            if cached_note is not None:
+                return cached_note
+
+            lock_token = uuid4().hex
+            wait_until = time.monotonic() + self.lock_timeout
+            while not await self.redis.r.set(
+                self._lock_key(note_id), lock_token, nx=True, px=self._lock_timeout_ms
+            ):
+                # the note is being loaded by another reader
+                await asyncio.sleep(self.lock_poll_interval)
+                cached_note = await self._get(note_id)
+                if cached_note is not None:
+                    return cached_note
+                if time.monotonic() > wait_until:
+                    # the loader is slow or the note is invalidated repeatedly
+                    return await load()
+        except RedisError:
+            logger.warning(f"Unable to read note note_id - {note_id} from redis")
+            return await load()
+
+        try:
+            note = await load()
+        except BaseException:
+            await self._release(note_id, lock_token)
+            raise
+
+        await self._store(note, lock_token)
+        return note
+
+    async def _store(self, note: NoteCachedShema, lock_token: str) -> None:
+        try:
+            await self._store_if_locked(
+                keys=[
+                    self._lock_key(note.id),
+                    self._note_key(note.id),
+                    self._owner_key(note.owner_id),
+                ],
+                args=[lock_token, note.model_dump_json(), self.ttl, str(note.id)],
+            )
+        except RedisError:
+            logger.warning(f"Unable to save note note_id - {note.id} to redis")
+
+    async def _release(self, note_id: UUID, lock_token: str) -> None:
+        try:
+            await self._release_lock(keys=[self._lock_key(note_id)], args=[lock_token])
+        except RedisError:
+            logger.warning(f"Unable to release lock of note note_id - {note_id}")
+
+    async def invalidate(self, *note_ids: UUID) -> None:
+        """Drops cached notes, notes being loaded at the moment are not cached"""
+        if not note_ids:
+            return
+
+        try:
+            await self.redis.r.delete(
+                *(self._note_key(note_id) for note_id in note_ids),
+                *(self._lock_key(note_id) for note_id in note_ids),
+            )
+        except RedisError:
+            logger.error(f"Unable to invalidate cached notes note_ids - {note_ids}")
+
+    async def invalidate_owner(self, owner_id: UUID) -> None:
+        """Drops all cached notes of the owner"""
+        try:
+            await self._invalidate_owner(
+                keys=[self._owner_key(owner_id)],
+                args=[self.note_prefix, self.lock_prefix],
+            )
+        except RedisError:
+            logger.error(
+                f"Unable to invalidate cached notes of owner owner_id - {owner_id}"
+            )
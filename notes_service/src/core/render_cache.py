@@ -0,0 +1,151 @@
+import sys
+import hashlib
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from redis.exceptions import RedisError
+
+from src.logger import logger
+
+if TYPE_CHECKING:
+    from src.core.redis import AsyncRedis
+
+
+class LRURenderCache:
+    """
+    In-process LRU cache of rendered HTML bounded by total size of cached values.
+    Least recently used entries are evicted when max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: OrderedDict[str, str] = OrderedDict()
+
+    @staticmethod
+    def _entry_size(key: str, content_html: str) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(content_html)
+
+    def get(self, key: str) -> str | None:
+        content_html = self._entries.get(key)
+        if content_html is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return content_html
+
+    def set(self, key: str, content_html: str) -> None:
+        entry_size = self._entry_size(key, content_html)
+        if entry_size > self.max_bytes:
+            # caching it would flush the whole cache
+            return
+
+        previous_html = self._entries.pop(key, None)
+        if previous_html is not None:
+            self.current_bytes -= self._entry_size(key, previous_html)
+
+        self._entries[key] = content_html
+        self.current_bytes += entry_size
+
+        while self.current_bytes > self.max_bytes:
+            evicted_key, evicted_html = self._entries.popitem(last=False)
+            self.current_bytes -= self._entry_size(evicted_key, evicted_html)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+        }
+
+
+class RedisRenderCache:
+    """Render cache tier shared by all notes service replicas"""
+
+    def __init__(self, redis: "AsyncRedis", ttl: int) -> None:
+        self.redis = redis
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        """Formats and returns key"""
+        return f"rendered_markdown:{key}"
+
+    async def get_many(self, keys: list[str]) -> dict[str, str]:
+        values = await self.redis.r.mget([self._key(key) for key in keys])
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def set_many(self, rendered: dict[str, str]) -> None:
+        async with self.redis.r.pipeline(transaction=False) as pipe:
+            for key, content_html in rendered.items():
+                pipe.setex(self._key(key), self.ttl, content_html)
+            await pipe.execute()
+
+
+class RenderCache:
+    """
+    Two tier cache of rendered MarkDown keyed by hash of the source
+    and renderer options: in-process LRU and optional shared Redis tier.
+    Redis failures are logged and treated as misses.
+    """
+
+    def __init__(
+        self, max_bytes: int, second_tier: RedisRenderCache | None = None
+    ) -> None:
+        self.lru = LRURenderCache(max_bytes=max_bytes)
+        self.second_tier = second_tier
+
+    @staticmethod
+    def key(content: str, options_fingerprint: str) -> str:
+        digest = hashlib.sha256(options_fingerprint.encode())
+        digest.update(b"\0")
+        digest.update(content.encode())
+        return digest.hexdigest()
+
+    async def get_many(self, keys: list[str]) -> dict[str, str]:
+        cached = {}
+        for key in keys:
+            content_html = self.lru.get(key)
+            if content_html is not None:
+                cached[key] = content_html
+
+        missed_keys = [key for key in keys if key not in cached]
+        if self.second_tier is None or not missed_keys:
+            return cached
+
+        try:
+            second_tier_cached = await self.second_tier.get_many(missed_keys)
+        except RedisError:
+            logger.warning("Unable to read rendered markdown from redis")
+            return cached
+
+        # warm up in-process tier
+        for key, content_html in second_tier_cached.items():
+            self.lru.set(key, content_html)
+
+        return cached | second_tier_cached
+
+    async def set_many(self, rendered: dict[str, str]) -> None:
+        for key, content_html in rendered.items():
+            self.lru.set(key, content_html)
+
+        if self.second_tier is None or not rendered:
+            return
+
+        try:
+            await self.second_tier.set_many(rendered)
+        except RedisError:
+            logger.warning("Unable to save rendered markdown to redis")
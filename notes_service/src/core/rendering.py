@@ -0,0 +1,174 @@
+import asyncio
+import multiprocessing
+from typing import TYPE_CHECKING, Generator
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import markdown
+
+from src.core.settings import MARKDOWN_RENDERER_VERSION
+from src.logger import logger
+
+if TYPE_CHECKING:
+    from src.core.render_cache import RenderCache
+
+# workers are not forked from the app process, as its threads (e.g. of database
+# and redis clients) may hold locks which would stay locked in the children
+WORKER_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+class MarkdownConverterPool:
+    """
+    Keeps pre-built markdown.Markdown converters for reuse.
+    Building one loads extensions and processor registries, so doing it
+    per document dominates rendering cost of small notes.
+    """
+
+    def __init__(self, extensions: list[str], max_idle: int = 1) -> None:
+        self.extensions = extensions
+        self.max_idle = max_idle
+
+        self._idle_converters = [self._build_converter() for _ in range(max_idle)]
+
+    def _build_converter(self) -> markdown.Markdown:
+        return markdown.Markdown(extensions=self.extensions)
+
+    @contextmanager
+    def acquire(self) -> Generator[markdown.Markdown, None, None]:
+        """Context manager, yields idle or new converter and then resets it"""
+        if self._idle_converters:
+            converter = self._idle_converters.pop()
+        else:
+            converter = self._build_converter()
+
+        try:
+            yield converter
+        finally:
+            converter.reset()
+            if len(self._idle_converters) < self.max_idle:
+                self._idle_converters.append(converter)
+
+    def convert_many(self, contents: list[str]) -> list[str]:
+        with self.acquire() as converter:
+            # reset clears per-document state e.g. footnotes and references
+            return [converter.reset().convert(content) for content in contents]
+
+
+# converter pool of the current rendering pool worker process
+_worker_converter_pool: MarkdownConverterPool | None = None
+
+
+def init_rendering_worker(extensions: list[str]) -> None:
+    global _worker_converter_pool
+    _worker_converter_pool = MarkdownConverterPool(extensions=extensions)
+
+
+def render_markdown_batch(contents: list[str]) -> list[str]:
+    """Renders several MarkDown documents, executed inside pool worker processes"""
+    return _worker_converter_pool.convert_many(contents)
+
+
+class MarkdownRenderingEngine:
+    """
+    MarkdownRenderingEngine is a class for rendering MarkDown to HTML
+    without blocking the event loop. Batches of documents shorter than
+    inline_threshold in total are rendered in place, the rest are offloaded
+    to a bounded process pool.
+    Rendered HTML is cached by hash of the source, so identical documents
+    are rendered once.
+    """
+
+    def __init__(
+        self,
+        pool_size: int,
+        inline_threshold: int,
+        converter_pool: MarkdownConverterPool,
+        render_cache: "RenderCache",
+    ) -> None:
+        self.pool_size = pool_size
+        self.inline_threshold = inline_threshold
+        self.converter_pool = converter_pool
+        self.render_cache = render_cache
+        # everything affecting produced HTML, is a part of cache keys
+        self.options_fingerprint = (
+            f"{MARKDOWN_RENDERER_VERSION}:markdown-{markdown.__version__}:"
+            f"{','.join(converter_pool.extensions)}"
+        )
+
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # created lazily, so importing the app does not spawn worker processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+                initializer=init_rendering_worker,
+                initargs=(self.converter_pool.extensions,),
+            )
+            logger.info(
+                f"Markdown rendering pool started with {self.pool_size} workers"
+            )
+        return self._executor
+
+    async def _render_in_pool(self, contents: list[str]) -> list[str]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), render_markdown_batch, contents
+            )
+        except BrokenProcessPool:
+            # a worker died, the pool is recreated on the next submission
+            logger.exception("Markdown rendering pool is broken, rendering inline")
+            self._executor = None
+            return self.converter_pool.convert_many(contents)
+
+    async def render(self, content: str) -> str:
+        [content_html] = await self.render_many([content])
+        return content_html
+
+    async def render_many(self, contents: list[str]) -> list[str]:
+        """Renders contents preserving their order"""
+        keys = [
+            self.render_cache.key(content, self.options_fingerprint)
+            for content in contents
+        ]
+        cached = await self.render_cache.get_many(list(dict.fromkeys(keys)))
+
+        # duplicates inside one batch are rendered once as well
+        uncached_contents = {}
+        for key, content in zip(keys, contents):
+            if key not in cached:
+                uncached_contents.setdefault(key, content)
+
+        rendered = {}
+        if uncached_contents:
+            rendered = dict(
+                zip(
+                    uncached_contents.keys(),
+                    await self._render_uncached(list(uncached_contents.values())),
+                )
+            )
+            await self.render_cache.set_many(rendered)
+
+        rendered |= cached
+        return [rendered[key] for key in keys]
+
+    async def _render_uncached(self, contents: list[str]) -> list[str]:
+        """
+        Batches shorter than inline_threshold in total are rendered in place,
+        larger ones are sent to the pool in one submission, so a page of many
+        small notes does not block the event loop either
+        """
+        if sum(len(content) for content in contents) < self.inline_threshold:
+            return self.converter_pool.convert_many(contents)
+        return await self._render_in_pool(contents)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        logger.info("Markdown rendering pool has shut down successfully ...")
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
@@ -43,3 +44,106 @@ class RabbitMQSettings(BaseSettings, PortAlwaysIntegerMixin):
 
 DELETE_NOTES_QUEUE_NAME = "delete_notes_queue"
 rabbitmq_settings = RabbitMQSettings()
+
+
+class MarkdownRenderingSettings(BaseSettings):
+    # amount of worker processes rendering large documents
+    pool_size: int = Field(2, alias="MARKDOWN_RENDERING_POOL_SIZE")
+    # batches of documents shorter than threshold (in characters, in total)
+    # are rendered inline
+    inline_threshold: int = Field(8192, alias="MARKDOWN_RENDERING_INLINE_THRESHOLD")
+    # markdown extensions names, e.g. ["tables", "fenced_code"]
+    extensions: list[str] = Field([], alias="MARKDOWN_EXTENSIONS")
+
+
+markdown_rendering_settings = MarkdownRenderingSettings()
+
+
+class RedisSettings(BaseSettings, PortAlwaysIntegerMixin):
+    host: str = Field("127.0.0.1", alias="REDIS_HOST")
+    port: int = Field(6379, alias="REDIS_PORT")
+    user: str = Field("default", alias="REDIS_USER")
+    password: str = Field("", alias="REDIS_USER_PASSWORD")
+
+
+redis_settings = RedisSettings()
+
+
+class RenderCacheSettings(BaseSettings):
+    # budget of in-process cache of rendered markdown
+    max_bytes: int = Field(64 * 1024 * 1024, alias="RENDER_CACHE_MAX_BYTES")
+    # "redis" enables cache tier shared by all service replicas
+    second_tier: Literal["none", "redis"] = Field(
+        "none", alias="RENDER_CACHE_SECOND_TIER"
+    )
+    redis_ttl: int = Field(24 * 60 * 60, alias="RENDER_CACHE_REDIS_TTL")
+
+
+render_cache_settings = RenderCacheSettings()
+
+
+class NoteCacheSettings(BaseSettings):
+    # "redis" enables read-through cache of single notes
+    backend: Literal["none", "redis"] = Field("none", alias="NOTE_CACHE_BACKEND")
+    ttl: int = Field(5 * 60, alias="NOTE_CACHE_TTL")
+    # how long one reader may load a missed note while others wait for it
+    lock_timeout: float = Field(2.0, alias="NOTE_CACHE_LOCK_TIMEOUT")
+
+
+note_cache_settings = NoteCacheSettings()
+
+
+class NoteDeletionSettings(BaseSettings):
+    # owner`s notes are deleted by batches of this size, each in own transaction
+    batch_size: int = Field(1000, alias="NOTES_DELETION_BATCH_SIZE")
+
+
+note_deletion_settings = NoteDeletionSettings()
+
+
+# notes listing pagination
+DEFAULT_NOTES_PAGE_SIZE = 50
+MAX_NOTES_PAGE_SIZE = 500
+
+# note tags, max amount of tags of a note and of a tag filter, max tag length
+MAX_NOTE_TAGS = 32
+MAX_TAG_LENGTH = 64
+# owner`s tags facet
+DEFAULT_TAG_COUNTS_AMOUNT = 100
+MAX_TAG_COUNTS_AMOUNT = 1000
+
+# notes queries, filters are nested up to depth levels (the top filter is level 1),
+# each with up to branches nested filters
+MAX_NOTE_FILTER_DEPTH = 4
+MAX_NOTE_FILTER_BRANCHES = 20
+MAX_NOTE_SORT_FIELDS = 3
+
+# note revisions listing
+DEFAULT_REVISIONS_PAGE_SIZE = 50
+
+# note content patches, max amount of edits in one patch
+MAX_CONTENT_PATCH_EDITS = 1000
+
+# notes streaming export, amount of notes fetched from server-side cursor at once
+EXPORT_NOTES_BATCH_SIZE = 500
+# notes import, amount of notes inserted by one statement
+IMPORT_NOTES_BATCH_SIZE = 500
+
+# notes batch changes, max amount of operations of all types in one batch
+MAX_NOTES_BATCH_OPERATIONS = 500
+
+# notes changes sync, changes younger than settle interval are not returned yet,
+# so changes committed late by concurrent transactions are not skipped by cursors
+CHANGES_SETTLE_SECONDS = 5
+# tombstones of deleted and moved notes older than that are pruned,
+# clients which have not synced for longer have to sync from scratch
+TOMBSTONES_RETENTION_DAYS = 90
+
+# notes titles typeahead
+DEFAULT_TITLE_SUGGESTIONS_AMOUNT = 10
+MAX_TITLE_SUGGESTIONS_AMOUNT = 50
+TITLE_SIMILARITY_THRESHOLD = 0.3
+
+# bump it when markdown rendering changes (extensions, markdown version etc.),
+# notes rendered by a previous version are re-rendered lazily on read
+MARKDOWN_RENDERER_VERSION = 1
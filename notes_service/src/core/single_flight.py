@@ -0,0 +1,52 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent identical calls within the process: while a call
+    with some key is in flight, calls with the same key await its result
+    instead of doing the work again. Keys are tuples, so related calls
+    can be forgotten together by a key prefix.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.shared_calls = 0
+
+        self._in_flight: dict[tuple[Hashable, ...], asyncio.Future] = {}
+
+    async def do(
+        self, key: tuple[Hashable, ...], call: Callable[[], Awaitable[T]]
+    ) -> T:
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.shared_calls += 1
+        else:
+            # a separate task, so cancellation of the first caller
+            # e.g. on client disconnect, does not fail the rest of them
+            future = asyncio.ensure_future(call())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._on_done(key, done))
+
+        return await asyncio.shield(future)
+
+    def _on_done(self, key: tuple[Hashable, ...], future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            # marks exception as retrieved, when all callers are gone
+            future.exception()
+
+    def forget(self, *key_prefix: Hashable) -> None:
+        """
+        Calls started before a change of data may return outdated results,
+        forgotten calls are completed, but not shared with new callers anymore
+        """
+        for key in [
+            key for key in self._in_flight if key[: len(key_prefix)] == key_prefix
+        ]:
+            del self._in_flight[key]
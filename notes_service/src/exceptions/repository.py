@@ -6,3 +6,11 @@ class DatabaseError(Exception):
 
 class NoSuchRowError(DatabaseError):
     pass
+
+
+class RowAlreadyExistsError(DatabaseError):
+    pass
+
+
+class StaleRowError(DatabaseError):
+    pass
@@ -10,3 +10,19 @@ class NoteNotFoundError(ServiceError):
 
 class NoteAlreadyExistsError(ServiceError):
     pass
+
+
+class InvalidCursorError(ServiceError):
+    pass
+
+
+class NoteRevisionNotFoundError(ServiceError):
+    pass
+
+
+class NoteVersionConflictError(ServiceError):
+    pass
+
+
+class InvalidContentPatchError(ServiceError):
+    pass
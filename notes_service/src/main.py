@@ -7,6 +7,11 @@ from src.api.endpoints.note import notes_router
 from src.core.settings import (
     postgres_settings,
     rabbitmq_settings,
+    markdown_rendering_settings,
+    redis_settings,
+    render_cache_settings,
+    note_cache_settings,
+    note_deletion_settings,
     DELETE_NOTES_QUEUE_NAME,
 )
 from src.container import Container
@@ -20,6 +25,12 @@ async def lifespan(app: FastAPI):
     )
     yield
     await app.container.note_broker().shutdown()
+    app.container.markdown_rendering_engine().shutdown()
+    if (
+        render_cache_settings.second_tier == "redis"
+        or note_cache_settings.backend == "redis"
+    ):
+        await app.container.note_redis().shutdown()
 
 
 def create_app() -> FastAPI:
@@ -28,6 +39,11 @@ def create_app() -> FastAPI:
         {
             "postgres_settings": postgres_settings.model_dump(),
             "rabbitmq_settings": rabbitmq_settings.model_dump(),
+            "markdown_rendering_settings": markdown_rendering_settings.model_dump(),
+            "redis_settings": redis_settings.model_dump(),
+            "render_cache_settings": render_cache_settings.model_dump(),
+            "note_cache_settings": note_cache_settings.model_dump(),
+            "note_deletion_settings": note_deletion_settings.model_dump(),
         }
     )
     app = FastAPI(lifespan=lifespan, root_path="/note")
@@ -1,22 +1,545 @@
+import hashlib
 from datetime import datetime
 from uuid import UUID, uuid4
 
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Text, text, UUID as SQL_UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Computed,
+    FetchedValue,
+    ForeignKey,
+    Index,
+    Text,
+    text,
+    cast,
+    event,
+    UUID as SQL_UUID,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR, REGCONFIG
 
 from src.core.database import Base
 
 SQL_TIMEZONE_NOW = text("TIMEZONE('utc', now())")
+# notes are written in different languages, so words are not stemmed
+SEARCH_CONFIG = "simple"
+SQL_SEARCH_CONFIG = cast(SEARCH_CONFIG, REGCONFIG)
+# tsvectors are limited to 1 MB, so only the beginning of MarkDown is indexed,
+# even the worst case (distinct one-letter words) of it fits the limit
+SEARCH_CONTENT_LIMIT = 100_000
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', title), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', "
+    f"left(content, {SEARCH_CONTENT_LIMIT})), 'B')"
+)
+# updated_at and version are bumped by a trigger when any of these columns
+# changes, so maintenance writes (e.g. recompressing content) keep them intact
+UPDATED_AT_TRACKED_COLUMNS = ("title", "content", "owner_id", "tags")
+# MarkDown and HTML of large notes are compressed by PostgreSQL (TOAST).
+# It is tried only for rows over ~2 KB (TOAST_TUPLE_THRESHOLD), smaller rows
+# are stored as is. Larger rows are compressed and moved out of line until they
+# fit CONTENT_COMPRESSION_THRESHOLD bytes (toast_tuple_target), not ~2 KB.
+CONTENT_COMPRESSION = "lz4"
+CONTENT_COMPRESSION_THRESHOLD = 1024
+# every REVISION_SNAPSHOT_INTERVAL-th revision of a note is saved in full,
+# so any revision is rebuilt by applying less than that many deltas
+REVISION_SNAPSHOT_INTERVAL = 20
+
+
+def content_hash(content: str) -> str:
+    """Key of note body with given MarkDown, see notes_set_body_hash trigger"""
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class NoteBody(Base):
+    """
+    Content-addressed body shared by all notes with identical MarkDown,
+    so the same content is rendered and its HTML is stored once. Only
+    rendering is deduplicated, MarkDown is still stored by every note.
+    """
+
+    __tablename__ = "note_bodies"
+
+    # content_hash of MarkDown
+    hash: Mapped[str] = mapped_column(Text, primary_key=True)
+    # content rendered to HTML, valid only for the current renderer_version
+    content_html: Mapped[str | None] = mapped_column(Text)
+    renderer_version: Mapped[int] = mapped_column(server_default=text("0"))
+    # amount of notes with the body, maintained by triggers on notes,
+    # bodies without notes are deleted
+    ref_count: Mapped[int]
 
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # keyset pagination indexes, see src.repositories.pagination
+        Index("ix_notes_created_at_id", "created_at", "id"),
+        Index("ix_notes_updated_at_id", "updated_at", "id"),
+        Index("ix_notes_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_notes_owner_id_updated_at_id", "owner_id", "updated_at", "id"),
+        Index("ix_notes_search_vector", "search_vector", postgresql_using="gin"),
+        # note titles are unique per owner, the database enforces it
+        Index("uq_notes_owner_id_title", "owner_id", "title", unique=True),
+        # typeahead index, requires pg_trgm and btree_gin (for owner_id) extensions
+        Index(
+            "ix_notes_owner_id_title_trgm",
+            "owner_id",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        # tag filters of owner`s notes, requires btree_gin extension (for owner_id)
+        Index("ix_notes_owner_id_tags", "owner_id", "tags", postgresql_using="gin"),
+    )
 
     id: Mapped[UUID] = mapped_column(SQL_UUID, primary_key=True, default=uuid4)
     title: Mapped[str]
-    # content field contains note`s in MarkDown format
+    # content field contains note`s in MarkDown format, it stays here
+    # and not in note_bodies, as search_vector is generated from it
     content: Mapped[str] = mapped_column(Text)
+    # distinct tags in the order given by the owner, counted in note_tag_counts
+    tags: Mapped[list[str]] = mapped_column(
+        ARRAY(Text), server_default=text("'{}'::text[]")
+    )
+    # maintained by notes_set_body_hash trigger, the body is created by
+    # the end of the statement, so the foreign key is checked on commit
+    body_hash: Mapped[str] = mapped_column(
+        Text,
+        ForeignKey("note_bodies.hash", deferrable=True, initially="DEFERRED"),
+        index=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+    # rendered HTML, written only by NoteRepository and loaded explicitly
+    body: Mapped[NoteBody] = relationship(viewonly=True, lazy="raise")
     created_at: Mapped[datetime] = mapped_column(server_default=SQL_TIMEZONE_NOW)
-    updated_at: Mapped[datetime] = mapped_column(server_default=SQL_TIMEZONE_NOW)
-    # This field is for relation with users table
-    owner_id: Mapped[UUID] = mapped_column(SQL_UUID, index=True)
+    # maintained by notes_set_updated_at trigger
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=SQL_TIMEZONE_NOW, server_onupdate=FetchedValue()
+    )
+    # optimistic concurrency control counter, bumped by notes_set_updated_at trigger,
+    # the ORM updates only the version it has loaded and fetches the new one
+    version: Mapped[int] = mapped_column(server_default=text("1"))
+    # number of the current revision, bumped by notes_set_revision_number trigger
+    # on the locked row, so concurrent writers never number revisions the same
+    revision_number: Mapped[int] = mapped_column(
+        server_default=text("1"), server_onupdate=FetchedValue()
+    )
+    # full-text search document, maintained by PostgreSQL and never loaded by default
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True), deferred=True
+    )
+    # This field is for relation with users table,
+    # owner_id lookups are served by the composite keyset indexes
+    owner_id: Mapped[UUID] = mapped_column(SQL_UUID)
+
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
+
+# the same DDL is executed by migrations, these are for create_all
+notes_set_updated_at_function = DDL(
+    """
+    CREATE OR REPLACE FUNCTION notes_set_updated_at() RETURNS trigger AS $$
+    BEGIN
+        NEW.updated_at := TIMEZONE('utc', now());
+        NEW.version := OLD.version + 1;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """
+)
+notes_set_updated_at_trigger = DDL(
+    f"""
+    CREATE TRIGGER notes_set_updated_at
+    BEFORE UPDATE OF {", ".join(UPDATED_AT_TRACKED_COLUMNS)} ON notes
+    FOR EACH ROW
+    WHEN (
+        ({", ".join(f"OLD.{column}" for column in UPDATED_AT_TRACKED_COLUMNS)})
+        IS DISTINCT FROM
+        ({", ".join(f"NEW.{column}" for column in UPDATED_AT_TRACKED_COLUMNS)})
+    )
+    EXECUTE FUNCTION notes_set_updated_at()
+    """
+)
+notes_set_body_hash_function = DDL(
+    """
+    CREATE OR REPLACE FUNCTION notes_set_body_hash() RETURNS trigger AS $$
+    BEGIN
+        NEW.body_hash := encode(sha256(convert_to(NEW.content, 'UTF8')), 'hex');
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """
+)
+notes_set_body_hash_trigger = DDL(
+    """
+    CREATE TRIGGER notes_set_body_hash
+    BEFORE INSERT OR UPDATE OF content ON notes
+    FOR EACH ROW
+    EXECUTE FUNCTION notes_set_body_hash()
+    """
+)
+notes_set_revision_number_function = DDL(
+    """
+    CREATE OR REPLACE FUNCTION notes_set_revision_number() RETURNS trigger AS $$
+    BEGIN
+        NEW.revision_number := OLD.revision_number + 1;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """
+)
+notes_set_revision_number_trigger = DDL(
+    """
+    CREATE TRIGGER notes_set_revision_number
+    BEFORE UPDATE OF content ON notes
+    FOR EACH ROW
+    WHEN (OLD.content IS DISTINCT FROM NEW.content)
+    EXECUTE FUNCTION notes_set_revision_number()
+    """
+)
+# references are counted once per statement, so bulk inserts and deletes
+# change every body once, bodies are locked in hash order to avoid deadlocks
+note_bodies_change_refs_function = DDL(
+    """
+    CREATE OR REPLACE FUNCTION note_bodies_change_refs(
+        body_hashes text[], delta integer
+    ) RETURNS void AS $$
+        INSERT INTO note_bodies (hash, ref_count)
+        SELECT body_hash, delta * count(*)
+        FROM unnest(body_hashes) AS body_hash
+        GROUP BY body_hash
+        ORDER BY body_hash
+        ON CONFLICT (hash)
+        DO UPDATE SET ref_count = note_bodies.ref_count + EXCLUDED.ref_count;
+
+        DELETE FROM note_bodies WHERE hash = ANY(body_hashes) AND ref_count <= 0;
+    $$ LANGUAGE sql
+    """
+)
+notes_count_body_refs_function = DDL(
+    """
+    CREATE OR REPLACE FUNCTION notes_count_body_refs() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM note_bodies_change_refs(
+                ARRAY(SELECT body_hash FROM new_notes), 1
+            );
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM note_bodies_change_refs(
+                ARRAY(SELECT body_hash FROM old_notes), -1
+            );
+        ELSE
+            -- new bodies go first, so bodies swapped by notes are kept
+            PERFORM note_bodies_change_refs(
+                ARRAY(
+                    SELECT new_notes.body_hash
+                    FROM new_notes JOIN old_notes USING (id)
+                    WHERE new_notes.body_hash <> old_notes.body_hash
+                ),
+                1
+            );
+            PERFORM note_bodies_change_refs(
+                ARRAY(
+                    SELECT old_notes.body_hash
+                    FROM new_notes JOIN old_notes USING (id)
+                    WHERE new_notes.body_hash <> old_notes.body_hash
+                ),
+                -1
+            );
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """
+)
+notes_count_body_refs_triggers = [
+    DDL(
+        f"""
+        CREATE TRIGGER notes_count_body_refs_on_{operation.lower()}
+        AFTER {operation} ON notes
+        REFERENCING {transition_tables}
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION notes_count_body_refs()
+        """
+    )
+    for operation, transition_tables in (
+        ("INSERT", "NEW TABLE AS new_notes"),
+        ("UPDATE", "OLD TABLE AS old_notes NEW TABLE AS new_notes"),
+        ("DELETE", "OLD TABLE AS old_notes"),
+    )
+]
+# tags of owner`s notes are counted once per statement as bodies are,
+# counters are locked in (owner_id, tag) order to avoid deadlocks
+note_tag_counts_change_function = DDL(
+    """
+    CREATE OR REPLACE FUNCTION note_tag_counts_change(
+        owner_ids uuid[], tags text[], deltas integer[]
+    ) RETURNS void AS $$
+        INSERT INTO note_tag_counts (owner_id, tag, notes_amount)
+        SELECT owner_id, tag, sum(delta)
+        FROM unnest(owner_ids, tags, deltas) AS change(owner_id, tag, delta)
+        GROUP BY owner_id, tag
+        HAVING sum(delta) <> 0
+        ORDER BY owner_id, tag
+        ON CONFLICT (owner_id, tag)
+        DO UPDATE SET notes_amount = note_tag_counts.notes_amount
+            + EXCLUDED.notes_amount;
+
+        DELETE FROM note_tag_counts
+        WHERE (owner_id, tag) IN (SELECT * FROM unnest(owner_ids, tags))
+            AND notes_amount <= 0;
+    $$ LANGUAGE sql
+    """
+)
+notes_count_tags_function = DDL(
+    """
+    CREATE OR REPLACE FUNCTION notes_count_tags() RETURNS trigger AS $$
+    DECLARE
+        owner_ids uuid[];
+        tags text[];
+        deltas integer[];
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg(new_notes.owner_id), array_agg(note_tag), array_agg(1)
+            INTO owner_ids, tags, deltas
+            FROM new_notes, unnest(new_notes.tags) AS note_tag;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT array_agg(old_notes.owner_id), array_agg(note_tag), array_agg(-1)
+            INTO owner_ids, tags, deltas
+            FROM old_notes, unnest(old_notes.tags) AS note_tag;
+        ELSE
+            SELECT array_agg(owner_id), array_agg(note_tag), array_agg(delta)
+            INTO owner_ids, tags, deltas
+            FROM (
+                SELECT new_notes.owner_id, note_tag, 1 AS delta
+                FROM new_notes JOIN old_notes USING (id),
+                    unnest(new_notes.tags) AS note_tag
+                WHERE (new_notes.owner_id, new_notes.tags)
+                    IS DISTINCT FROM (old_notes.owner_id, old_notes.tags)
+                UNION ALL
+                SELECT old_notes.owner_id, note_tag, -1
+                FROM new_notes JOIN old_notes USING (id),
+                    unnest(old_notes.tags) AS note_tag
+                WHERE (new_notes.owner_id, new_notes.tags)
+                    IS DISTINCT FROM (old_notes.owner_id, old_notes.tags)
+            ) AS changes;
+        END IF;
+        IF owner_ids IS NOT NULL THEN
+            PERFORM note_tag_counts_change(owner_ids, tags, deltas);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """
+)
+notes_count_tags_triggers = [
+    DDL(
+        f"""
+        CREATE TRIGGER notes_count_tags_on_{operation.lower()}
+        AFTER {operation} ON notes
+        REFERENCING {transition_tables}
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION notes_count_tags()
+        """
+    )
+    for operation, transition_tables in (
+        ("INSERT", "NEW TABLE AS new_notes"),
+        ("UPDATE", "OLD TABLE AS old_notes NEW TABLE AS new_notes"),
+        ("DELETE", "OLD TABLE AS old_notes"),
+    )
+]
+# versions of owners of written notes are bumped once per statement,
+# so every committed change of owner`s notes increases the owner`s version
+notes_bump_owner_versions_function = DDL(
+    """
+    CREATE OR REPLACE FUNCTION notes_bump_owner_versions() RETURNS trigger AS $$
+    DECLARE
+        owner_ids uuid[];
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            owner_ids := ARRAY(SELECT owner_id FROM new_notes);
+        ELSIF TG_OP = 'DELETE' THEN
+            owner_ids := ARRAY(SELECT owner_id FROM old_notes);
+        ELSE
+            -- both owners of moved notes, maintenance writes keep note versions
+            owner_ids := ARRAY(
+                SELECT unnest(ARRAY[old_notes.owner_id, new_notes.owner_id])
+                FROM new_notes JOIN old_notes USING (id)
+                WHERE new_notes.version <> old_notes.version
+            );
+        END IF;
+        IF cardinality(owner_ids) > 0 THEN
+            PERFORM note_owner_versions_bump(owner_ids);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """
+)
+notes_bump_owner_versions_triggers = [
+    DDL(
+        f"""
+        CREATE TRIGGER notes_bump_owner_versions_on_{operation.lower()}
+        AFTER {operation} ON notes
+        REFERENCING {transition_tables}
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION notes_bump_owner_versions()
+        """
+    )
+    for operation, transition_tables in (
+        ("INSERT", "NEW TABLE AS new_notes"),
+        ("UPDATE", "OLD TABLE AS old_notes NEW TABLE AS new_notes"),
+        ("DELETE", "OLD TABLE AS old_notes"),
+    )
+]
+notes_content_compression = DDL(
+    f"""
+    ALTER TABLE notes
+    ALTER COLUMN content SET COMPRESSION {CONTENT_COMPRESSION},
+    SET (toast_tuple_target = {CONTENT_COMPRESSION_THRESHOLD})
+    """
+)
+for ddl in (
+    notes_set_updated_at_function,
+    notes_set_updated_at_trigger,
+    notes_set_body_hash_function,
+    notes_set_body_hash_trigger,
+    notes_set_revision_number_function,
+    notes_set_revision_number_trigger,
+    note_bodies_change_refs_function,
+    notes_count_body_refs_function,
+    *notes_count_body_refs_triggers,
+    notes_count_tags_function,
+    *notes_count_tags_triggers,
+    notes_bump_owner_versions_function,
+    *notes_bump_owner_versions_triggers,
+    notes_content_compression,
+):
+    event.listen(Note.__table__, "after_create", ddl.execute_if(dialect="postgresql"))
+
+note_bodies_content_compression = DDL(
+    f"""
+    ALTER TABLE note_bodies
+    ALTER COLUMN content_html SET COMPRESSION {CONTENT_COMPRESSION},
+    SET (toast_tuple_target = {CONTENT_COMPRESSION_THRESHOLD})
+    """
+)
+event.listen(
+    NoteBody.__table__,
+    "after_create",
+    note_bodies_content_compression.execute_if(dialect="postgresql"),
+)
+
+
+class NoteTagCount(Base):
+    """
+    Amount of owner`s notes with the tag, maintained by triggers on notes,
+    so tag facets are read without scanning notes of the owner
+    """
+
+    __tablename__ = "note_tag_counts"
+
+    owner_id: Mapped[UUID] = mapped_column(SQL_UUID, primary_key=True)
+    tag: Mapped[str] = mapped_column(Text, primary_key=True)
+    notes_amount: Mapped[int]
+
+
+# the function is called by notes triggers, so it is created with its table
+event.listen(
+    NoteTagCount.__table__,
+    "after_create",
+    note_tag_counts_change_function.execute_if(dialect="postgresql"),
+)
+
+
+class NoteOwnerVersion(Base):
+    """
+    Counter of changes of owner`s notes, maintained by triggers on notes.
+    The row is locked till the end of the writing transaction, so versions
+    grow in commit order, unlike updated_at taken at the start of it.
+    """
+
+    __tablename__ = "note_owner_versions"
+
+    owner_id: Mapped[UUID] = mapped_column(SQL_UUID, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger)
+
+
+# the function is called by notes triggers, so it is created with its table
+note_owner_versions_bump_function = DDL(
+    """
+    CREATE OR REPLACE FUNCTION note_owner_versions_bump(owner_ids uuid[])
+    RETURNS void AS $$
+        INSERT INTO note_owner_versions (owner_id, version)
+        SELECT DISTINCT owner_id, 1
+        FROM unnest(owner_ids) AS owner_id
+        ORDER BY owner_id
+        ON CONFLICT (owner_id)
+        DO UPDATE SET version = note_owner_versions.version + 1;
+    $$ LANGUAGE sql
+    """
+)
+event.listen(
+    NoteOwnerVersion.__table__,
+    "after_create",
+    note_owner_versions_bump_function.execute_if(dialect="postgresql"),
+)
+
+
+class NoteRevision(Base):
+    """
+    Previous content of a note, the current revision is the note itself.
+    Revisions are saved as deltas to MarkDown of the next revision,
+    periodic ones (and ones with deltas not shorter than MarkDown) in full.
+    """
+
+    __tablename__ = "note_revisions"
+
+    note_id: Mapped[UUID] = mapped_column(
+        SQL_UUID, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True
+    )
+    # revisions of a note are numbered from 1 without gaps
+    number: Mapped[int] = mapped_column(primary_key=True)
+    # MarkDown of revisions saved in full
+    snapshot: Mapped[str | None] = mapped_column(Text)
+    # src.core.deltas delta turning MarkDown of the next revision into this one
+    delta: Mapped[list | None] = mapped_column(JSONB)
+    # when the revision was replaced by the next one
+    replaced_at: Mapped[datetime] = mapped_column(server_default=SQL_TIMEZONE_NOW)
+
+
+note_revisions_snapshot_compression = DDL(
+    f"""
+    ALTER TABLE note_revisions
+    ALTER COLUMN snapshot SET COMPRESSION {CONTENT_COMPRESSION},
+    SET (toast_tuple_target = {CONTENT_COMPRESSION_THRESHOLD})
+    """
+)
+event.listen(
+    NoteRevision.__table__,
+    "after_create",
+    note_revisions_snapshot_compression.execute_if(dialect="postgresql"),
+)
+
+
+class NoteTombstone(Base):
+    """
+    Note deleted or moved to another owner, lets syncing clients of the owner
+    know about it. Tombstones are kept for TOMBSTONES_RETENTION_DAYS and then
+    pruned by tools.prune_tombstones, clients which have not synced for longer
+    have to sync from scratch.
+    """
+
+    __tablename__ = "note_tombstones"
+    __table_args__ = (
+        Index(
+            "ix_note_tombstones_owner_id_deleted_at_id", "owner_id", "deleted_at", "id"
+        ),
+    )
+
+    # id of the deleted note, a moved note has a tombstone per previous owner
+    id: Mapped[UUID] = mapped_column(SQL_UUID, primary_key=True)
+    owner_id: Mapped[UUID] = mapped_column(SQL_UUID, primary_key=True)
+    deleted_at: Mapped[datetime] = mapped_column(server_default=SQL_TIMEZONE_NOW)
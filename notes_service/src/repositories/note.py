@@ -1,77 +1,1021 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, AsyncIterator, Sequence
 from uuid import UUID
+from datetime import datetime, timedelta
+from dataclasses import dataclass
 
+from asyncpg.exceptions import UniqueViolationError
 from sqlalchemy.exc import NoResultFound, IntegrityError
-from sqlalchemy import select, delete
+from sqlalchemy import (
+    Row,
+    cast,
+    Text,
+    UUID as SQL_UUID,
+    select,
+    delete,
+    update,
+    values,
+    column,
+    exists,
+    bindparam,
+    func,
+    or_,
+    any_,
+    tuple_,
+    inspect,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute, aliased, joinedload, load_only
+from sqlalchemy.orm.exc import StaleDataError
 
-from src.models.note import Note
-from src.exceptions.repository import DatabaseError, NoSuchRowError
-from src.repositories.specifications import Specification
+from src.models.note import (
+    Note,
+    NoteBody,
+    NoteOwnerVersion,
+    NoteRevision,
+    NoteTagCount,
+    NoteTombstone,
+    SQL_SEARCH_CONFIG,
+    REVISION_SNAPSHOT_INTERVAL,
+)
+from src.core.deltas import make_delta, apply_delta, delta_size
+from src.exceptions.repository import (
+    DatabaseError,
+    NoSuchRowError,
+    RowAlreadyExistsError,
+    StaleRowError,
+)
+from src.repositories.specifications import Specification, NoteSearchSpecification
+from src.repositories.pagination import KeysetPage, TombstonePosition
+from src.logger import logger
 
 if TYPE_CHECKING:
     from core.database import AsyncDatabase
 
 
+@dataclass
+class NoteBatchResult:
+    # id, owner_id and title of inserted notes, conflicting ones are skipped
+    created: list[Row]
+    # id of every updated note with "updated" and "note_exists" flags
+    updated: list[Row]
+    deleted_ids: list[UUID]
+
+
+@dataclass
+class RenderedBodies:
+    # HTML by hash of note body (content_hash of MarkDown)
+    contents: dict[str, str]
+    renderer_version: int
+
+
 class NoteRepository:
     model = Note
+    search_headline_options = "MaxFragments=2, MaxWords=30, MinWords=10"
 
     def __init__(self, database: "AsyncDatabase"):
         self.db = database
 
-    async def get_all(self) -> list[Note]:
+    def _select(self, columns: Sequence[InstrumentedAttribute] | None = None):
+        """
+        Selects notes loading only given columns (and primary key) if any,
+        otherwise loads notes with their bodies
+        """
+        query = select(self.model)
+        if columns is not None:
+            query = query.options(load_only(*columns, raiseload=True))
+        else:
+            query = query.options(joinedload(self.model.body))
+        return query
+
+    async def get_all(
+        self,
+        page: KeysetPage | None = None,
+        columns: Sequence[InstrumentedAttribute] | None = None,
+    ) -> list[Note]:
         async with self.db.get_session() as session:
-            query = select(self.model)
+            query = self._select(columns)
+            if page is not None:
+                query = page.apply(query)
             notes = await session.scalars(query)
 
             return notes.all()
 
-    async def filter_by(self, specification: Specification) -> list[Note]:
+    async def filter_by(
+        self,
+        specification: Specification,
+        page: KeysetPage | None = None,
+        columns: Sequence[InstrumentedAttribute] | None = None,
+    ) -> list[Note]:
         async with self.db.get_session() as session:
-            query = select(self.model).where(*specification.is_satisfied())
+            # sorted specifications order and limit the query by themselves,
+            # so they are not combined with pages
+            query = specification.apply(self._select(columns))
+            if page is not None:
+                query = page.apply(query)
             filtered_notes = await session.scalars(query)
 
             return filtered_notes.all()
 
+    async def stream_by(
+        self, specification: Specification, batch_size: int
+    ) -> AsyncIterator[Sequence[Note]]:
+        """
+        Yields satisfying notes by batches of batch_size read from server-side cursor,
+        so only one batch is kept in memory. Session stays open until iteration ends.
+        """
+        query = (
+            select(self.model)
+            .where(*specification.is_satisfied())
+            .order_by(self.model.created_at, self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async with self.db.get_session() as session:
+            notes = await session.stream_scalars(query)
+            async for notes_batch in notes.partitions():
+                yield notes_batch
+                # loaded notes are not needed by the session anymore
+                session.expunge_all()
+
+    async def search(
+        self, specification: NoteSearchSpecification, limit: int, offset: int = 0
+    ) -> list[Row]:
+        """
+        Returns rows with note`s metadata, rank and headline ordered by rank.
+        Headlines are built only for the requested page.
+        """
+        rank = func.ts_rank_cd(self.model.search_vector, specification.ts_query)
+        ranked_page = (
+            select(self.model.id, rank.label("rank"))
+            .where(*specification.is_satisfied())
+            .order_by(rank.desc(), self.model.id)
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
+        query = (
+            select(
+                self.model.id,
+                self.model.title,
+                self.model.owner_id,
+                self.model.created_at,
+                self.model.updated_at,
+                ranked_page.c.rank,
+                func.ts_headline(
+                    SQL_SEARCH_CONFIG,
+                    self.model.content,
+                    specification.ts_query,
+                    self.search_headline_options,
+                ).label("headline"),
+            )
+            .join(ranked_page, self.model.id == ranked_page.c.id)
+            .order_by(ranked_page.c.rank.desc(), self.model.id)
+        )
+        async with self.db.get_session() as session:
+            found_notes = await session.execute(query)
+
+            return found_notes.all()
+
+    async def search_titles(
+        self,
+        owner_id: UUID,
+        fragment: str,
+        similarity_threshold: float,
+        limit: int,
+    ) -> list[Row]:
+        """
+        Returns rows with id, title and similarity of owner`s notes whose titles
+        start with fragment or are similar to it, prefix matches go first.
+        Both conditions are served by ix_notes_owner_id_title_trgm.
+        """
+        escaped_fragment = (
+            fragment.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        is_prefix_match = self.model.title.ilike(f"{escaped_fragment}%", escape="\\")
+        similarity = func.similarity(self.model.title, fragment)
+        query = (
+            select(self.model.id, self.model.title, similarity.label("similarity"))
+            .where(
+                self.model.owner_id == owner_id,
+                or_(self.model.title.bool_op("%")(fragment), is_prefix_match),
+            )
+            .order_by(is_prefix_match.desc(), similarity.desc(), self.model.title)
+            .limit(limit)
+        )
+        async with self.db.get_session() as session:
+            # "%" operator matches titles with similarity above this threshold,
+            # set_config(..., true) scopes it to the current transaction
+            await session.execute(
+                select(
+                    func.set_config(
+                        "pg_trgm.similarity_threshold", str(similarity_threshold), True
+                    )
+                )
+            )
+            suggested_titles = await session.execute(query)
+
+            return suggested_titles.all()
+
+    async def get_tag_counts(self, owner_id: UUID, limit: int) -> list[Row]:
+        """
+        Returns rows with tag and notes_amount of owner`s most used tags,
+        read from counters maintained by triggers, not from owner`s notes
+        """
+        query = (
+            select(NoteTagCount.tag, NoteTagCount.notes_amount)
+            .where(NoteTagCount.owner_id == owner_id)
+            .order_by(NoteTagCount.notes_amount.desc(), NoteTagCount.tag)
+            .limit(limit)
+        )
+        async with self.db.get_session() as session:
+            tag_counts = await session.execute(query)
+
+            return tag_counts.all()
+
     async def get_one_by_id(self, note_id: UUID) -> Note:
         async with self.db.get_session() as session:
-            query = select(self.model).where(self.model.id == note_id)
+            query = self._select().where(self.model.id == note_id)
             note = await session.execute(query)
             try:
                 return note.scalar_one()
             except NoResultFound as e:
                 raise NoSuchRowError(f"Unable to find row with id - {note_id}") from e
 
-    async def create_one(self, note: Note) -> UUID:
+    async def get_version(self, note_id: UUID) -> int:
+        """Returns version of the note without loading the note itself"""
         async with self.db.get_session() as session:
-            session.add(note)
+            query = select(self.model.version).where(self.model.id == note_id)
+            version = await session.execute(query)
+            try:
+                return version.scalar_one()
+            except NoResultFound as e:
+                raise NoSuchRowError(f"Unable to find row with id - {note_id}") from e
+
+    async def get_owner_version(self, owner_id: UUID) -> int:
+        """
+        Returns version of owner`s notes, it increases whenever any of owner`s
+        notes is created, changed, deleted or moved, 0 if there were none
+        """
+        query = select(NoteOwnerVersion.version).where(
+            NoteOwnerVersion.owner_id == owner_id
+        )
+        async with self.db.get_session() as session:
+            owner_version = await session.scalar(query)
+
+            return owner_version or 0
+
+    @staticmethod
+    async def _save_rendered_bodies(
+        session: AsyncSession, rendered_bodies: RenderedBodies | None
+    ) -> None:
+        """
+        Saves HTML of note bodies in one executemany round trip. Bodies
+        already rendered by the renderer_version (e.g. shared with other notes)
+        are skipped. Bodies of notes written in the same transaction
+        are created by the end of the writing statement.
+        """
+        if rendered_bodies is None or not rendered_bodies.contents:
+            return
+
+        bodies_table = NoteBody.__table__
+        await session.execute(
+            update(bodies_table)
+            .where(
+                bodies_table.c.hash == bindparam("b_hash"),
+                bodies_table.c.renderer_version < rendered_bodies.renderer_version,
+            )
+            .values(
+                content_html=bindparam("b_content_html"),
+                renderer_version=rendered_bodies.renderer_version,
+            ),
+            [
+                {"b_hash": body_hash, "b_content_html": content_html}
+                for body_hash, content_html in rendered_bodies.contents.items()
+            ],
+        )
 
+    def _column_values(self, note: Note) -> dict:
+        """Returns values of columns set on a new note, others get their defaults"""
+        return {
+            key: getattr(note, key)
+            for key in self.model.__mapper__.column_attrs.keys()
+            if key in note.__dict__
+        }
+
+    async def create_one(
+        self, note: Note, rendered_bodies: RenderedBodies | None = None
+    ) -> UUID:
+        """
+        Inserts note in one round trip, title uniqueness per owner is checked
+        by uq_notes_owner_id_title index, conflicting insert returns no rows
+        """
+        query = (
+            insert(self.model)
+            .values(**self._column_values(note))
+            .on_conflict_do_nothing(index_elements=["owner_id", "title"])
+            .returning(self.model.id)
+        )
+        async with self.db.get_session() as session:
             try:
-                await session.flush()
-                new_note_id = note.id
+                new_note_id = await session.scalar(query)
+                if new_note_id is not None:
+                    await self._save_rendered_bodies(session, rendered_bodies)
                 await session.commit()
             except IntegrityError as e:
                 await session.rollback()
                 raise DatabaseError("Error during saving row") from e
 
+            if new_note_id is None:
+                logger.warning(
+                    f"Unable to save note, title {note.title} is taken "
+                    f"for owner_id - {note.owner_id}"
+                )
+                raise RowAlreadyExistsError("Row with same fields already exists")
+
             return new_note_id
 
-    async def update_one(self, note: Note) -> None:
+    async def create_many(self, notes: list[Note]) -> list[str]:
+        """
+        Inserts notes by one multi-row statement, notes with titles taken by
+        their owners are skipped. Returns titles of inserted notes
+        """
+        query = (
+            insert(self.model)
+            .values([self._column_values(note) for note in notes])
+            .on_conflict_do_nothing(index_elements=["owner_id", "title"])
+            .returning(self.model.title)
+        )
+        async with self.db.get_session() as session:
+            try:
+                inserted_titles = await session.scalars(query)
+                inserted_titles = inserted_titles.all()
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                raise DatabaseError("Error during saving rows") from e
+
+            return inserted_titles
+
+    def _update_many_query(self, updated_notes: list[dict]):
+        """
+        UPDATE ... FROM (VALUES ...) of several notes, None values keep current ones.
+        Notes whose new title is taken by the owner are skipped. Selects status
+        of every given note, as RETURNING has no rows for skipped ones.
+        """
+        batch_columns = (
+            column("id", SQL_UUID),
+            column("title", Text),
+            column("content", Text),
+            column("owner_id", SQL_UUID),
+            column("tags", ARRAY(Text)),
+        )
+        batch_values = values(*batch_columns, name="batch_values").data(
+            [
+                tuple(updated_note[batch_column.name] for batch_column in batch_columns)
+                for updated_note in updated_notes
+            ]
+        )
+        # columns of NULLs only would be resolved as text otherwise
+        batch = select(
+            *(
+                cast(batch_values.c[batch_column.name], batch_column.type).label(
+                    batch_column.name
+                )
+                for batch_column in batch_columns
+            )
+        ).cte("batch")
+        new_title = func.coalesce(batch.c.title, self.model.title)
+        new_owner_id = func.coalesce(batch.c.owner_id, self.model.owner_id)
+        other_note = aliased(self.model)
+        updated = (
+            update(self.model)
+            .where(
+                self.model.id == batch.c.id,
+                ~exists().where(
+                    other_note.owner_id == new_owner_id,
+                    other_note.title == new_title,
+                    other_note.id != self.model.id,
+                ),
+            )
+            .values(
+                title=new_title,
+                content=func.coalesce(batch.c.content, self.model.content),
+                owner_id=new_owner_id,
+                tags=func.coalesce(batch.c.tags, self.model.tags),
+            )
+            .returning(self.model.id, self.model.owner_id)
+        ).cte("updated")
+
+        return select(
+            batch.c.id,
+            updated.c.id.is_not(None).label("updated"),
+            updated.c.owner_id,
+            # sees notes as they were before the update
+            exists().where(self.model.id == batch.c.id).label("note_exists"),
+        ).select_from(batch.outerjoin(updated, updated.c.id == batch.c.id))
+
+    async def apply_batch(
+        self,
+        new_notes: list[Note],
+        updated_notes: list[dict],
+        deleted_note_ids: list[UUID],
+        rendered_bodies: RenderedBodies | None = None,
+    ) -> NoteBatchResult:
+        """
+        Deletes, updates and creates notes in one transaction with one statement
+        per operation type. Deletion goes first, so updated and created notes
+        can reuse titles of deleted ones.
+        """
+        result = NoteBatchResult(created=[], updated=[], deleted_ids=[])
+        async with self.db.get_session() as session:
+            try:
+                if deleted_note_ids:
+                    deleted_ids = await session.scalars(
+                        self._delete_with_tombstones(
+                            self.model.id
+                            == any_(
+                                bindparam(
+                                    "deleted_note_ids",
+                                    deleted_note_ids,
+                                    type_=ARRAY(SQL_UUID),
+                                )
+                            )
+                        )
+                    )
+                    result.deleted_ids = deleted_ids.all()
+                if updated_notes:
+                    new_contents = {
+                        updated_note["id"]: updated_note["content"]
+                        for updated_note in updated_notes
+                        if updated_note["content"] is not None
+                    }
+                    # all updated notes are locked, as their previous owners
+                    # get tombstones when notes are moved
+                    previous_contents = await self._lock_contents(
+                        session, [updated_note["id"] for updated_note in updated_notes]
+                    )
+                    updated = await session.execute(
+                        self._update_many_query(updated_notes)
+                    )
+                    result.updated = updated.all()
+                    await self._save_move_tombstones(
+                        session,
+                        [
+                            (row.id, previous_contents[row.id].owner_id, row.owner_id)
+                            for row in result.updated
+                            if row.updated
+                        ],
+                    )
+                    await self._save_revisions(
+                        session,
+                        previous_contents,
+                        {
+                            row.id: new_contents[row.id]
+                            for row in result.updated
+                            if row.updated and row.id in new_contents
+                        },
+                    )
+                if new_notes:
+                    created = await session.execute(
+                        insert(self.model)
+                        .values([self._column_values(note) for note in new_notes])
+                        .on_conflict_do_nothing(index_elements=["owner_id", "title"])
+                        .returning(self.model.id, self.model.owner_id, self.model.title)
+                    )
+                    result.created = created.all()
+                await self._save_rendered_bodies(session, rendered_bodies)
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                # e.g. two updated notes swap their titles
+                if isinstance(e.orig.__cause__, UniqueViolationError):
+                    logger.warning(f"Unable to save rows detail - {e.detail}")
+                    raise RowAlreadyExistsError(
+                        "Row with same fields already exists"
+                    ) from e
+                raise DatabaseError("Error during saving rows") from e
+
+            return result
+
+    async def update_one(
+        self,
+        note: Note,
+        rendered_bodies: RenderedBodies | None = None,
+        base_updated_at: datetime | None = None,
+    ) -> None:
+        """
+        Saves changes of the note. If base_updated_at is given, the note is saved
+        only if it was not changed since that version, and note.updated_at is
+        refreshed, so the caller knows the version it has saved.
+        """
         async with self.db.get_session() as session:
             session.add(note)
 
             try:
+                previous_contents = {}
+                if (
+                    base_updated_at is not None
+                    or inspect(note).attrs.content.history.has_changes()
+                ):
+                    previous_contents = await self._lock_contents(session, [note.id])
+                if base_updated_at is not None:
+                    locked_note = previous_contents.get(note.id)
+                    if locked_note is None:
+                        raise NoSuchRowError(f"Unable to find row with id - {note.id}")
+                    if locked_note.updated_at != base_updated_at:
+                        raise StaleRowError(
+                            f"Row with id - {note.id} was changed "
+                            f"since {base_updated_at.isoformat()}"
+                        )
+                previous_owner_ids = inspect(note).attrs.owner_id.history.deleted
+                await session.flush()
+                await self._save_move_tombstones(
+                    session,
+                    (
+                        [(note.id, previous_owner_ids[0], note.owner_id)]
+                        if previous_owner_ids
+                        else []
+                    ),
+                )
+                await self._save_revisions(
+                    session, previous_contents, {note.id: note.content}
+                )
+                await self._save_rendered_bodies(session, rendered_bodies)
+                if base_updated_at is not None:
+                    await session.refresh(note, attribute_names=["updated_at"])
                 await session.commit()
+            except StaleDataError as e:
+                # the version the note was loaded with has been replaced
+                await session.rollback()
+                raise StaleRowError(
+                    f"Row with id - {note.id} was changed since it was loaded"
+                ) from e
             except IntegrityError as e:
                 await session.rollback()
+                if isinstance(e.orig.__cause__, UniqueViolationError):
+                    logger.warning(f"Unable to save row detail - {e.detail}")
+                    raise RowAlreadyExistsError(
+                        "Row with same fields already exists"
+                    ) from e
                 raise DatabaseError("Error during saving row") from e
 
+    async def update_by_id(
+        self,
+        note_id: UUID,
+        values: dict,
+        expected_version: int | None = None,
+        rendered_bodies: RenderedBodies | None = None,
+    ) -> Row:
+        """
+        Updates the note by one UPDATE ... RETURNING without loading it first,
+        only if its version is expected_version (if given). Replaced MarkDown
+        for the note revision is locked and returned by the same statement.
+        Returns id, owner_id, previous_owner_id and version of the updated note.
+        """
+        # MarkDown before the update, as _lock_contents returns it,
+        # is transferred only if it is replaced
+        revision_columns = (
+            (self.model.content, self.model.revision_number)
+            if "content" in values
+            else ()
+        )
+        previous = (
+            select(self.model.id, self.model.owner_id, *revision_columns)
+            .where(self.model.id == note_id)
+            .with_for_update(of=self.model)
+            .subquery("previous")
+        )
+        query = (
+            update(self.model)
+            .where(self.model.id == previous.c.id)
+            # nothing to change, the statement still checks existence and version
+            .values(**(values or {"id": self.model.id}))
+            .returning(
+                self.model.id,
+                self.model.owner_id,
+                self.model.version,
+                previous.c.owner_id.label("previous_owner_id"),
+                *(previous.c[column.name] for column in revision_columns),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if expected_version is not None:
+            query = query.where(self.model.version == expected_version)
+
+        async with self.db.get_session() as session:
+            try:
+                updated = await session.execute(query)
+                updated = updated.one_or_none()
+                if updated is None:
+                    # the only case of the second round trip
+                    current_version = await session.scalar(
+                        select(self.model.version).where(self.model.id == note_id)
+                    )
+                    if current_version is None:
+                        raise NoSuchRowError(f"Unable to find row with id - {note_id}")
+                    raise StaleRowError(
+                        f"Row with id - {note_id} has version {current_version}, "
+                        f"not {expected_version}"
+                    )
+
+                await self._save_move_tombstones(
+                    session, [(note_id, updated.previous_owner_id, updated.owner_id)]
+                )
+                if "content" in values:
+                    await self._save_revisions(
+                        session, {note_id: updated}, {note_id: values["content"]}
+                    )
+                await self._save_rendered_bodies(session, rendered_bodies)
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                if isinstance(e.orig.__cause__, UniqueViolationError):
+                    logger.warning(f"Unable to save row detail - {e.detail}")
+                    raise RowAlreadyExistsError(
+                        "Row with same fields already exists"
+                    ) from e
+                raise DatabaseError("Error during saving row") from e
+
+            return updated
+
+    async def _lock_contents(
+        self, session: AsyncSession, note_ids: list[UUID]
+    ) -> dict[UUID, Row]:
+        """
+        Locks notes till the end of transaction, in id order to avoid deadlocks,
+        returns their MarkDown, owner_id, updated_at and current revision number
+        by id
+        """
+        if not note_ids:
+            return {}
+
+        query = (
+            select(
+                self.model.id,
+                self.model.content,
+                self.model.owner_id,
+                self.model.updated_at,
+                # read from the locked row version, not from the statement snapshot
+                self.model.revision_number,
+            )
+            .where(
+                self.model.id
+                == any_(bindparam("note_ids", note_ids, type_=ARRAY(SQL_UUID)))
+            )
+            .order_by(self.model.id)
+            .with_for_update(of=self.model)
+        )
+        locked_notes = await session.execute(query)
+
+        return {locked_note.id: locked_note for locked_note in locked_notes}
+
+    @staticmethod
+    async def _save_revisions(
+        session: AsyncSession,
+        previous_contents: dict[UUID, Row],
+        new_contents: dict[UUID, str],
+    ) -> None:
+        """
+        Saves replaced MarkDown of notes locked by _lock_contents as revisions,
+        in full every REVISION_SNAPSHOT_INTERVAL-th time, as delta otherwise
+        """
+        revisions = []
+        for note_id, new_content in new_contents.items():
+            previous = previous_contents.get(note_id)
+            if previous is None or previous.content == new_content:
+                continue
+
+            delta = make_delta(new_content, previous.content)
+            if previous.revision_number % REVISION_SNAPSHOT_INTERVAL == 0 or delta_size(
+                delta
+            ) >= len(previous.content):
+                snapshot, delta = previous.content, None
+            else:
+                snapshot = None
+            revisions.append(
+                {
+                    "note_id": note_id,
+                    "number": previous.revision_number,
+                    "snapshot": snapshot,
+                    "delta": delta,
+                }
+            )
+
+        if revisions:
+            await session.execute(insert(NoteRevision), revisions)
+
+    async def get_current_revision(self, note_id: UUID) -> Row:
+        """Returns number of the current revision and created_at of the note"""
+        query = select(
+            self.model.revision_number.label("number"),
+            self.model.created_at,
+        ).where(self.model.id == note_id)
+        async with self.db.get_session() as session:
+            current_revision = await session.execute(query)
+            try:
+                return current_revision.one()
+            except NoResultFound as e:
+                raise NoSuchRowError(f"Unable to find row with id - {note_id}") from e
+
+    async def get_revisions(self, note_id: UUID, before: int, limit: int) -> list[Row]:
+        """Returns number and replaced_at of note`s revisions before the number"""
+        query = (
+            select(NoteRevision.number, NoteRevision.replaced_at)
+            .where(NoteRevision.note_id == note_id, NoteRevision.number < before)
+            .order_by(NoteRevision.number.desc())
+            .limit(limit)
+        )
+        async with self.db.get_session() as session:
+            revisions = await session.execute(query)
+
+            return revisions.all()
+
+    async def get_revision_content(self, note_id: UUID, number: int) -> str:
+        """
+        Rebuilds MarkDown of the revision from the nearest next snapshot,
+        or the note itself, by applying deltas of revisions in between
+        """
+        current_query = select(
+            self.model.content, self.model.revision_number.label("number")
+        ).where(self.model.id == note_id)
+        async with self.db.get_session() as session:
+            current = await session.execute(current_query)
+            current = current.one_or_none()
+            if current is None or not 1 <= number <= current.number:
+                raise NoSuchRowError(
+                    f"Unable to find revision {number} of note with id - {note_id}"
+                )
+            if number == current.number:
+                return current.content
+
+            # revisions saved after the note was read are not its deltas
+            in_range = (
+                NoteRevision.note_id == note_id,
+                NoteRevision.number >= number,
+                NoteRevision.number < current.number,
+            )
+            next_snapshot_number = (
+                select(func.min(NoteRevision.number))
+                .where(*in_range, NoteRevision.snapshot.is_not(None))
+                .scalar_subquery()
+            )
+            revisions = await session.execute(
+                select(NoteRevision.snapshot, NoteRevision.delta)
+                .where(
+                    *in_range,
+                    NoteRevision.number
+                    <= func.coalesce(next_snapshot_number, NoteRevision.number),
+                )
+                .order_by(NoteRevision.number.desc())
+            )
+
+        content = current.content
+        for revision in revisions:
+            if revision.snapshot is not None:
+                content = revision.snapshot
+            else:
+                content = apply_delta(content, revision.delta)
+        return content
+
+    async def update_rendered_bodies(self, rendered_bodies: RenderedBodies) -> None:
+        async with self.db.get_session() as session:
+            await self._save_rendered_bodies(session, rendered_bodies)
+            await session.commit()
+
+    @staticmethod
+    async def _save_move_tombstones(
+        session: AsyncSession, moved_notes: list[tuple[UUID, UUID, UUID]]
+    ) -> None:
+        """
+        Saves tombstones of (note_id, previous_owner_id, owner_id) notes moved
+        to another owner, so the note disappears from previous owner`s sync.
+        Tombstones the new owner has for the note (if it is moved back) are
+        deleted, as the note is alive for them again.
+        """
+        moved_notes = [
+            (note_id, previous_owner_id, owner_id)
+            for note_id, previous_owner_id, owner_id in moved_notes
+            if previous_owner_id != owner_id
+        ]
+        if not moved_notes:
+            return
+
+        await session.execute(
+            insert(NoteTombstone)
+            .values(
+                [
+                    {"id": note_id, "owner_id": previous_owner_id}
+                    for note_id, previous_owner_id, _ in moved_notes
+                ]
+            )
+            .on_conflict_do_update(
+                index_elements=["id", "owner_id"],
+                set_={"deleted_at": func.timezone("utc", func.now())},
+            )
+        )
+        await session.execute(
+            delete(NoteTombstone).where(
+                tuple_(NoteTombstone.id, NoteTombstone.owner_id).in_(
+                    [(note_id, owner_id) for note_id, _, owner_id in moved_notes]
+                )
+            )
+        )
+
+    def _delete_with_tombstones(self, *where_clauses):
+        """
+        Deletes satisfying notes and saves their tombstones in one statement,
+        returns ids of deleted notes. Tombstones left by earlier moves of
+        a note to another owner are renewed, so syncing clients see them again.
+        """
+        deleted_notes = (
+            delete(self.model)
+            .where(*where_clauses)
+            .returning(self.model.id, self.model.owner_id)
+            .cte("deleted_notes")
+        )
+        return (
+            insert(NoteTombstone)
+            .from_select(
+                ["id", "owner_id"],
+                select(deleted_notes.c.id, deleted_notes.c.owner_id),
+            )
+            .on_conflict_do_update(
+                index_elements=["id", "owner_id"],
+                set_={"deleted_at": func.timezone("utc", func.now())},
+            )
+            .returning(NoteTombstone.id)
+        )
+
+    async def get_tombstones(
+        self,
+        owner_id: UUID,
+        settle_seconds: int,
+        limit: int,
+        after: TombstonePosition | None = None,
+    ) -> list[NoteTombstone]:
+        """
+        Returns owner`s tombstones in (deleted_at, id) order,
+        saved at least settle_seconds ago
+        """
+        query = select(NoteTombstone).where(
+            NoteTombstone.owner_id == owner_id,
+            NoteTombstone.deleted_at
+            < func.timezone("utc", func.now()) - timedelta(seconds=settle_seconds),
+        )
+        if after is not None:
+            query = query.where(
+                tuple_(NoteTombstone.deleted_at, NoteTombstone.id)
+                > tuple_(after.deleted_at, after.id)
+            )
+        query = query.order_by(NoteTombstone.deleted_at, NoteTombstone.id).limit(limit)
+        async with self.db.get_session() as session:
+            tombstones = await session.scalars(query)
+
+            return tombstones.all()
+
+    async def delete_tombstones_before(
+        self, deleted_before: datetime, batch_size: int
+    ) -> int:
+        """
+        Deletes up to batch_size tombstones saved before deleted_before in one
+        statement and transaction, returns amount of deleted tombstones
+        """
+        batch = (
+            select(NoteTombstone.id, NoteTombstone.owner_id)
+            .where(NoteTombstone.deleted_at < deleted_before)
+            .limit(batch_size)
+        )
+        query = (
+            delete(NoteTombstone)
+            .where(tuple_(NoteTombstone.id, NoteTombstone.owner_id).in_(batch))
+            .returning(NoteTombstone.id)
+        )
+        async with self.db.get_session() as session:
+            deleted_ids = await session.scalars(query)
+            deleted_ids = deleted_ids.all()
+            await session.commit()
+
+            return len(deleted_ids)
+
     async def delete_one(self, note: Note) -> None:
         async with self.db.get_session() as session:
-            await session.delete(note)
+            await session.execute(
+                self._delete_with_tombstones(self.model.id == note.id)
+            )
+            await session.commit()
+
+    async def delete_batch_by_owner_id(self, owner_id: UUID, batch_size: int) -> int:
+        """
+        Deletes up to batch_size owner`s notes in one statement and transaction,
+        returns amount of deleted notes, 0 means there are no notes left
+        """
+        batch_ids = (
+            select(self.model.id)
+            .where(self.model.owner_id == owner_id)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        query = self._delete_with_tombstones(self.model.id.in_(batch_ids))
+        async with self.db.get_session() as session:
+            deleted_ids = await session.scalars(query)
+            deleted_ids = deleted_ids.all()
             await session.commit()
 
-    async def delete_all(self, note_ids: list[UUID]) -> None:
+            return len(deleted_ids)
+
+    async def recompress_batch(
+        self,
+        after_id: UUID | None,
+        batch_size: int,
+        compression: str,
+        min_bytes: int,
+    ) -> Row:
+        """
+        Rewrites MarkDown of the next batch of notes ordered by id, which is
+        longer than min_bytes and stored with other compression method, so
+        PostgreSQL compresses it by the current method of the column.
+        Returns last_id of the batch, None when no notes are left,
+        and amount of rewritten notes. Values are not changed, so neither
+        updated_at nor note bodies are affected.
+        """
+        return await self._recompress(
+            key=self.model.id,
+            value=self.model.content,
+            after=after_id,
+            batch_size=batch_size,
+            compression=compression,
+            min_bytes=min_bytes,
+            last_key_label="last_id",
+        )
+
+    async def recompress_bodies_batch(
+        self,
+        after_hash: str | None,
+        batch_size: int,
+        compression: str,
+        min_bytes: int,
+    ) -> Row:
+        """
+        Rewrites HTML of the next batch of note bodies ordered by hash as
+        recompress_batch does for MarkDown of notes. Bodies moved from notes
+        by INSERT ... SELECT kept compression method of their source values.
+        Returns last_hash of the batch, None when no bodies are left,
+        and amount of rewritten bodies.
+        """
+        return await self._recompress(
+            key=NoteBody.hash,
+            value=NoteBody.content_html,
+            after=after_hash,
+            batch_size=batch_size,
+            compression=compression,
+            min_bytes=min_bytes,
+            last_key_label="last_hash",
+        )
+
+    async def _recompress(
+        self,
+        key: InstrumentedAttribute,
+        value: InstrumentedAttribute,
+        after: UUID | str | None,
+        batch_size: int,
+        compression: str,
+        min_bytes: int,
+        last_key_label: str,
+    ) -> Row:
+        """Rewrites values of the next batch of rows of key`s table, see callers"""
+        model = key.class_
+        batch = select(key).order_by(key).limit(batch_size)
+        if after is not None:
+            batch = batch.where(key > after)
+        batch = batch.cte("batch")
+
+        rewritten = (
+            update(model)
+            .where(
+                key == batch.c[key.key],
+                func.octet_length(value) >= min_bytes,
+                # values PostgreSQL left uncompressed (small or incompressible
+                # ones) have NULL method, rewriting them would not change it
+                func.pg_column_compression(value) != compression,
+            )
+            # concatenation produces a new value, assigned one would be kept as is
+            .values({value: value.concat("")})
+            .returning(key)
+        ).cte("rewritten")
+
+        query = select(
+            select(batch.c[key.key])
+            .order_by(batch.c[key.key].desc())
+            .limit(1)
+            .scalar_subquery()
+            .label(last_key_label),
+            select(func.count())
+            .select_from(rewritten)
+            .scalar_subquery()
+            .label("rewritten"),
+        )
         async with self.db.get_session() as session:
-            query = delete(self.model).where(self.model.id.in_(note_ids))
-            await session.execute(query)
+            result = await session.execute(query)
             await session.commit()
+
+            return result.one()
@@ -0,0 +1,136 @@
+# Contains keyset (cursor) pagination primitives for NoteRepository
+import json
+import base64
+from enum import StrEnum
+from uuid import UUID
+from datetime import datetime
+from dataclasses import dataclass
+
+from sqlalchemy import Select, tuple_
+
+from src.models.note import Note
+
+
+def _encode_token(payload: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _decode_token(token: str) -> dict:
+    padding = "=" * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(token + padding))
+
+
+class NoteOrderingField(StrEnum):
+    """Note columns which can be used as a keyset together with Note.id"""
+
+    CREATED_AT = "created_at"
+    UPDATED_AT = "updated_at"
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Position of the last note on a page, serialized as an opaque token"""
+
+    order_by: NoteOrderingField
+    value: datetime
+    id: UUID
+
+    @classmethod
+    def from_note(cls, note: Note, order_by: NoteOrderingField) -> "Cursor":
+        return cls(order_by=order_by, value=getattr(note, order_by), id=note.id)
+
+    def encode(self) -> str:
+        return _encode_token(
+            {"o": self.order_by, "v": self.value.isoformat(), "id": self.id.hex}
+        )
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        """Parses token produced by Cursor.encode, raises ValueError on malformed one"""
+        try:
+            payload = _decode_token(token)
+            return cls(
+                order_by=NoteOrderingField(payload["o"]),
+                value=datetime.fromisoformat(payload["v"]),
+                id=UUID(hex=payload["id"]),
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Malformed cursor - {token}") from e
+
+
+@dataclass(frozen=True)
+class TombstonePosition:
+    """Position of the last synced tombstone in (deleted_at, id) order"""
+
+    deleted_at: datetime
+    id: UUID
+
+
+@dataclass(frozen=True)
+class ChangesCursor:
+    """
+    Position of changes sync, serialized as an opaque token. Changed notes
+    and tombstones are read separately, so it keeps a position for each of them.
+    """
+
+    notes_after: Cursor | None = None
+    tombstones_after: TombstonePosition | None = None
+
+    def encode(self) -> str:
+        return _encode_token(
+            {
+                "n": self.notes_after.encode() if self.notes_after else None,
+                "t": (
+                    [
+                        self.tombstones_after.deleted_at.isoformat(),
+                        self.tombstones_after.id.hex,
+                    ]
+                    if self.tombstones_after
+                    else None
+                ),
+            }
+        )
+
+    @classmethod
+    def decode(cls, token: str) -> "ChangesCursor":
+        """Parses token produced by encode, raises ValueError on malformed one"""
+        try:
+            payload = _decode_token(token)
+            notes_after = Cursor.decode(payload["n"]) if payload["n"] else None
+            tombstones_after = None
+            if payload["t"]:
+                deleted_at, tombstone_id = payload["t"]
+                tombstones_after = TombstonePosition(
+                    deleted_at=datetime.fromisoformat(deleted_at),
+                    id=UUID(hex=tombstone_id),
+                )
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Malformed cursor - {token}") from e
+
+        if (
+            notes_after is not None
+            and notes_after.order_by != NoteOrderingField.UPDATED_AT
+        ):
+            raise ValueError(f"Malformed cursor - {token}")
+        return cls(notes_after=notes_after, tombstones_after=tombstones_after)
+
+
+@dataclass(frozen=True)
+class KeysetPage:
+    """Describes one page of notes ordered by (order_by, id)"""
+
+    limit: int
+    order_by: NoteOrderingField = NoteOrderingField.CREATED_AT
+    after: Cursor | None = None
+
+    def apply(self, query: Select) -> Select:
+        """
+        Restricts query to the page. One extra row is requested,
+        so the caller is able to tell whether the next page exists.
+        """
+        order_column = getattr(Note, self.order_by)
+        if self.after is not None:
+            query = query.where(
+                tuple_(order_column, Note.id) > tuple_(self.after.value, self.after.id)
+            )
+        return query.order_by(order_column, Note.id).limit(self.limit + 1)
@@ -1,8 +1,20 @@
 # Contains NoteRepository specifications
 from abc import ABC, abstractmethod
+from enum import StrEnum
 from uuid import UUID
+from datetime import datetime, timedelta
+from dataclasses import dataclass
 
-from src.models.note import Note
+from sqlalchemy import Select, and_, false, func, not_, or_, true
+
+from src.models.note import Note, SQL_SEARCH_CONFIG
+
+
+def _conjunction(clauses: tuple):
+    """Single clause satisfied when all clauses are, true for no clauses"""
+    if not clauses:
+        return true()
+    return and_(*clauses) if len(clauses) > 1 else clauses[0]
 
 
 class Specification(ABC):
@@ -10,6 +22,62 @@ class Specification(ABC):
     def is_satisfied(self):
         raise NotImplementedError()
 
+    def apply(self, query: Select) -> Select:
+        """Restricts query to satisfying notes"""
+        return query.where(*self.is_satisfied())
+
+    def __and__(self, other: "Specification") -> "AndSpecification":
+        return AndSpecification(self, other)
+
+    def __or__(self, other: "Specification") -> "OrSpecification":
+        return OrSpecification(self, other)
+
+    def __invert__(self) -> "NotSpecification":
+        return NotSpecification(self)
+
+
+class AndSpecification(Specification):
+    """specification satisfied by notes satisfying all given specifications"""
+
+    def __init__(self, *specifications: Specification) -> None:
+        self.specifications = specifications
+
+    def is_satisfied(self) -> tuple:
+        return tuple(
+            clause
+            for specification in self.specifications
+            for clause in specification.is_satisfied()
+        )
+
+
+class OrSpecification(Specification):
+    """specification satisfied by notes satisfying any of given specifications"""
+
+    def __init__(self, *specifications: Specification) -> None:
+        self.specifications = specifications
+
+    def is_satisfied(self) -> tuple:
+        if not self.specifications:
+            return (false(),)
+        return (
+            or_(
+                *(
+                    _conjunction(specification.is_satisfied())
+                    for specification in self.specifications
+                )
+            ),
+        )
+
+
+class NotSpecification(Specification):
+    """specification satisfied by notes not satisfying given specification"""
+
+    def __init__(self, specification: Specification) -> None:
+        self.specification = specification
+
+    def is_satisfied(self) -> tuple:
+        return (not_(_conjunction(self.specification.is_satisfied())),)
+
 
 class NotesForOwnerSpecification(Specification):
     """specification for filter notes by owner_id"""
@@ -19,3 +87,168 @@ class NotesForOwnerSpecification(Specification):
 
     def is_satisfied(self) -> tuple:
         return (Note.owner_id == self.owner_id,)
+
+
+class NotesWithTagsSpecification(Specification):
+    """specification for filter owner`s notes having all given tags"""
+
+    def __init__(self, owner_id: UUID, tags: list[str]) -> None:
+        self.notes_for_owner_spec = NotesForOwnerSpecification(owner_id=owner_id)
+        self.tags = tags
+
+    def is_satisfied(self) -> tuple:
+        # tags @> ARRAY[...] is served by ix_notes_owner_id_tags index
+        return (
+            *self.notes_for_owner_spec.is_satisfied(),
+            Note.tags.contains(self.tags),
+        )
+
+
+class NotesCreatedBetweenSpecification(Specification):
+    """specification for notes created in [since, until), bounds are optional"""
+
+    column_name = "created_at"
+
+    def __init__(
+        self, since: datetime | None = None, until: datetime | None = None
+    ) -> None:
+        self.since = since
+        self.until = until
+
+    def is_satisfied(self) -> tuple:
+        column = getattr(Note, self.column_name)
+        clauses = ()
+        if self.since is not None:
+            clauses += (column >= self.since,)
+        if self.until is not None:
+            clauses += (column < self.until,)
+        return clauses
+
+
+class NotesUpdatedBetweenSpecification(NotesCreatedBetweenSpecification):
+    """specification for notes updated in [since, until), bounds are optional"""
+
+    column_name = "updated_at"
+
+
+class NotesWithTitlePrefixSpecification(Specification):
+    """specification for notes whose titles start with prefix, case-sensitive"""
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+
+    def is_satisfied(self) -> tuple:
+        # LIKE wildcards of the prefix are escaped
+        return (Note.title.startswith(self.prefix, autoescape=True),)
+
+
+class NotesWithContentLengthSpecification(Specification):
+    """
+    specification for notes with MarkDown of [min_length, max_length] bytes
+    in UTF-8, bounds are optional. Sizes of compressed values are read
+    from their TOAST headers, so the content is not decompressed.
+    """
+
+    content_length = func.octet_length(Note.content)
+
+    def __init__(
+        self, min_length: int | None = None, max_length: int | None = None
+    ) -> None:
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def is_satisfied(self) -> tuple:
+        clauses = ()
+        if self.min_length is not None:
+            clauses += (self.content_length >= self.min_length,)
+        if self.max_length is not None:
+            clauses += (self.content_length <= self.max_length,)
+        return clauses
+
+
+class NoteSortField(StrEnum):
+    CREATED_AT = "created_at"
+    UPDATED_AT = "updated_at"
+    TITLE = "title"
+    CONTENT_LENGTH = "content_length"
+
+
+NOTE_SORT_EXPRESSIONS = {
+    NoteSortField.CREATED_AT: Note.created_at,
+    NoteSortField.UPDATED_AT: Note.updated_at,
+    NoteSortField.TITLE: Note.title,
+    NoteSortField.CONTENT_LENGTH: NotesWithContentLengthSpecification.content_length,
+}
+
+
+@dataclass(frozen=True)
+class NoteSort:
+    field: NoteSortField
+    descending: bool = False
+
+
+class SortedSpecification(Specification):
+    """
+    specification for the first limit notes satisfying given specification
+    in given order, ties are broken by id, so the order is stable
+    """
+
+    def __init__(
+        self,
+        specification: Specification,
+        order_by: list[NoteSort],
+        limit: int | None = None,
+    ) -> None:
+        self.specification = specification
+        self.order_by = order_by
+        self.limit = limit
+
+    def is_satisfied(self) -> tuple:
+        return self.specification.is_satisfied()
+
+    def apply(self, query: Select) -> Select:
+        query = self.specification.apply(query).order_by(
+            *(
+                (
+                    NOTE_SORT_EXPRESSIONS[sort.field].desc()
+                    if sort.descending
+                    else NOTE_SORT_EXPRESSIONS[sort.field]
+                )
+                for sort in self.order_by
+            ),
+            Note.id,
+        )
+        if self.limit is not None:
+            query = query.limit(self.limit)
+        return query
+
+
+class NoteSearchSpecification(Specification):
+    """specification for full-text search of owner`s notes"""
+
+    def __init__(self, owner_id: UUID, query: str) -> None:
+        self.notes_for_owner_spec = NotesForOwnerSpecification(owner_id=owner_id)
+        self.query = query
+        # web search syntax: "quoted phrases", OR, -excluded words
+        self.ts_query = func.websearch_to_tsquery(SQL_SEARCH_CONFIG, query)
+
+    def is_satisfied(self) -> tuple:
+        return (
+            *self.notes_for_owner_spec.is_satisfied(),
+            Note.search_vector.bool_op("@@")(self.ts_query),
+        )
+
+
+class NoteChangesSpecification(Specification):
+    """specification for owner`s notes changed at least settle_seconds ago"""
+
+    def __init__(self, owner_id: UUID, settle_seconds: int) -> None:
+        self.notes_for_owner_spec = NotesForOwnerSpecification(owner_id=owner_id)
+        self.settle_seconds = settle_seconds
+
+    def is_satisfied(self) -> tuple:
+        return (
+            *self.notes_for_owner_spec.is_satisfied(),
+            Note.updated_at
+            < func.timezone("utc", func.now()) - timedelta(seconds=self.settle_seconds),
+        )
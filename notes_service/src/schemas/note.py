@@ -1,14 +1,56 @@
-from typing import Optional
+from enum import StrEnum
+from typing import Annotated, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timezone
 
-from pydantic import BaseModel
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    Field,
+    StringConstraints,
+    model_validator,
+)
+
+from src.repositories.specifications import NoteSortField
+from src.core.settings import (
+    DEFAULT_NOTES_PAGE_SIZE,
+    MAX_NOTES_PAGE_SIZE,
+    MAX_NOTES_BATCH_OPERATIONS,
+    MAX_CONTENT_PATCH_EDITS,
+    MAX_NOTE_TAGS,
+    MAX_TAG_LENGTH,
+    MAX_NOTE_FILTER_DEPTH,
+    MAX_NOTE_FILTER_BRANCHES,
+    MAX_NOTE_SORT_FIELDS,
+)
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    # notes timestamps are naive UTC
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+NaiveUtcDatetime = Annotated[datetime, AfterValidator(to_naive_utc)]
+
+NoteTag = Annotated[
+    str,
+    StringConstraints(strip_whitespace=True, min_length=1, max_length=MAX_TAG_LENGTH),
+]
+# repeated tags are dropped, the first occurrence keeps its position
+NoteTags = Annotated[
+    list[NoteTag],
+    Field(max_length=MAX_NOTE_TAGS),
+    AfterValidator(lambda tags: list(dict.fromkeys(tags))),
+]
 
 
 class NoteCreateShema(BaseModel):
     title: str
     content: str
     owner_id: UUID
+    tags: NoteTags = []
 
     class Config:
         from_attributes = True
@@ -18,9 +60,262 @@ class NoteUpdateShema(NoteCreateShema):
     title: Optional[str] = None
     content: Optional[str] = None
     owner_id: Optional[UUID] = None
+    # empty list removes all tags of the note
+    tags: Optional[NoteTags] = None
 
 
 class NoteOutputShema(NoteCreateShema):
     id: UUID
     created_at: datetime
     updated_at: datetime
+    # optimistic concurrency control counter, it is a prefix of the note ETag
+    version: int
+
+
+class NoteCachedShema(NoteOutputShema):
+    """Note stored in notes cache, content is MarkDown"""
+
+    content_html: str
+    options_fingerprint: str
+
+
+class NoteContentEditShema(BaseModel):
+    # position in the base content, in characters (Unicode code points)
+    offset: int = Field(ge=0)
+    # amount of characters of the base content removed from the offset
+    delete: int = Field(0, ge=0)
+    insert: str = ""
+
+
+class NoteContentPatchShema(BaseModel):
+    # updated_at of the note version the edits were made against
+    base_updated_at: NaiveUtcDatetime
+    # edits in offset order, positions of all of them are in the base content
+    edits: list[NoteContentEditShema] = Field(
+        min_length=1, max_length=MAX_CONTENT_PATCH_EDITS
+    )
+
+    @model_validator(mode="after")
+    def check_edits(self) -> "NoteContentPatchShema":
+        for previous_edit, edit in zip(self.edits, self.edits[1:]):
+            if edit.offset < previous_edit.offset + previous_edit.delete:
+                raise ValueError("Edits should be ordered by offset and not overlap")
+        return self
+
+
+class NoteContentPatchResultShema(BaseModel):
+    # base of the next patch
+    updated_at: datetime
+
+
+class NoteBatchUpdateShema(NoteUpdateShema):
+    id: UUID
+
+
+class NoteBatchShema(BaseModel):
+    create: list[NoteCreateShema] = []
+    update: list[NoteBatchUpdateShema] = []
+    delete: list[UUID] = []
+
+    @model_validator(mode="after")
+    def check_operations(self) -> "NoteBatchShema":
+        operations_amount = len(self.create) + len(self.update) + len(self.delete)
+        if operations_amount > MAX_NOTES_BATCH_OPERATIONS:
+            raise ValueError(
+                f"Batch contains more than {MAX_NOTES_BATCH_OPERATIONS} operations"
+            )
+        updated_note_ids = [updated_note.id for updated_note in self.update]
+        if len(set(updated_note_ids)) != len(updated_note_ids):
+            raise ValueError("Every note can be updated only once in a batch")
+        if len(set(self.delete)) != len(self.delete):
+            raise ValueError("Every note can be deleted only once in a batch")
+        return self
+
+
+class NoteBatchItemStatus(StrEnum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    NOT_FOUND = "not_found"
+    # title is already taken by the owner
+    CONFLICT = "conflict"
+
+
+class NoteBatchItemResultShema(BaseModel):
+    id: Optional[UUID] = None
+    status: NoteBatchItemStatus
+
+
+class NoteBatchResultShema(BaseModel):
+    """Results are in the same order as operations of the batch"""
+
+    created: list[NoteBatchItemResultShema] = []
+    updated: list[NoteBatchItemResultShema] = []
+    deleted: list[NoteBatchItemResultShema] = []
+
+
+class NoteImportShema(BaseModel):
+    """Line of imported NDJSON, other fields (e.g. of exported notes) are ignored"""
+
+    title: str
+    content: str
+    tags: NoteTags = []
+
+
+class NoteImportResultShema(BaseModel):
+    imported: int = 0
+    # titles already taken by the owner or repeated in the import
+    conflicting_titles: list[str] = []
+    # numbers (starting from 1) of lines which are not valid notes
+    invalid_lines: list[int] = []
+
+
+class NotePageShema(BaseModel):
+    items: list[NoteOutputShema]
+    # opaque token for fetching the next page, None on the last page
+    next_cursor: Optional[str] = None
+
+
+class NoteTombstoneShema(BaseModel):
+    # id of the deleted note
+    id: UUID
+    deleted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class NoteChangesShema(BaseModel):
+    # created or updated notes in updated_at order
+    notes: list[NoteOutputShema]
+    deleted: list[NoteTombstoneShema]
+    # token for the next sync, should be kept by client even if nothing changed
+    next_cursor: str
+    # True if there are more changes right now, request them with next_cursor
+    has_more: bool
+
+
+class NoteSummaryShema(BaseModel):
+    """Note without content, e.g. for sidebars"""
+
+    id: UUID
+    title: str
+    owner_id: UUID
+    tags: list[str]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class NoteSummaryPageShema(BaseModel):
+    items: list[NoteSummaryShema]
+    # opaque token for fetching the next page, None on the last page
+    next_cursor: Optional[str] = None
+
+
+class NoteFilterShema(BaseModel):
+    """Notes satisfying all given conditions, ranges include only their start"""
+
+    created_since: Optional[NaiveUtcDatetime] = None
+    created_until: Optional[NaiveUtcDatetime] = None
+    updated_since: Optional[NaiveUtcDatetime] = None
+    updated_until: Optional[NaiveUtcDatetime] = None
+    # case-sensitive
+    title_prefix: Optional[str] = Field(None, min_length=1)
+    # bounds of MarkDown length in bytes of UTF-8, both are included
+    min_content_length: Optional[int] = Field(None, ge=0)
+    max_content_length: Optional[int] = Field(None, ge=0)
+    # notes having all of the tags
+    tags: Optional[NoteTags] = None
+    # notes satisfying at least one of the filters
+    any_of: list["NoteFilterShema"] = Field([], max_length=MAX_NOTE_FILTER_BRANCHES)
+    # notes satisfying none of the filters
+    none_of: list["NoteFilterShema"] = Field([], max_length=MAX_NOTE_FILTER_BRANCHES)
+
+    def depth(self) -> int:
+        return 1 + max(
+            (note_filter.depth() for note_filter in (*self.any_of, *self.none_of)),
+            default=0,
+        )
+
+
+class NoteSortShema(BaseModel):
+    field: NoteSortField
+    descending: bool = False
+
+
+class NoteQueryShema(BaseModel):
+    filter: NoteFilterShema = NoteFilterShema()
+    # ties are broken by note id
+    order_by: list[NoteSortShema] = Field(
+        [NoteSortShema(field=NoteSortField.CREATED_AT)],
+        max_length=MAX_NOTE_SORT_FIELDS,
+    )
+    limit: int = Field(DEFAULT_NOTES_PAGE_SIZE, ge=1, le=MAX_NOTES_PAGE_SIZE)
+
+    @model_validator(mode="after")
+    def check_filter_depth(self) -> "NoteQueryShema":
+        if self.filter.depth() > MAX_NOTE_FILTER_DEPTH:
+            raise ValueError(
+                f"Filters should be nested up to {MAX_NOTE_FILTER_DEPTH} levels"
+            )
+        return self
+
+
+class NoteTagCountShema(BaseModel):
+    tag: str
+    # amount of owner`s notes with the tag
+    notes_amount: int
+
+    class Config:
+        from_attributes = True
+
+
+class NoteSearchResultShema(BaseModel):
+    id: UUID
+    title: str
+    owner_id: UUID
+    created_at: datetime
+    updated_at: datetime
+    rank: float
+    # fragments of content with matched words wrapped in <b></b>
+    headline: str
+
+    class Config:
+        from_attributes = True
+
+
+class NoteSearchPageShema(BaseModel):
+    items: list[NoteSearchResultShema]
+    # offset of the next page, None on the last page
+    next_offset: Optional[int] = None
+
+
+class NoteRevisionShema(BaseModel):
+    number: int
+    # when content of the revision was written
+    created_at: datetime
+
+
+class NoteRevisionPageShema(BaseModel):
+    # the newest revisions first, the first one of the first page is the current one
+    items: list[NoteRevisionShema]
+    # "before" value for fetching the next page, None on the last page
+    next_before: Optional[int] = None
+
+
+class NoteRevisionContentShema(BaseModel):
+    note_id: UUID
+    number: int
+    content: str
+
+
+class NoteTitleSuggestionShema(BaseModel):
+    id: UUID
+    title: str
+    similarity: float
+
+    class Config:
+        from_attributes = True
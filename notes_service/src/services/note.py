@@ -1,112 +1,1010 @@
+import re
+import asyncio
+import hashlib
 from uuid import UUID
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, AsyncIterator, Iterable
 
-import markdown
+from pydantic import ValidationError
 
-from src.repositories.specifications import NotesForOwnerSpecification
-from src.models.note import Note
-from src.schemas.note import NoteOutputShema, NoteCreateShema, NoteUpdateShema
-from src.services.validators import NoteTitleUniqueForOwnerValidator
-from src.exceptions.repository import NoSuchRowError
-from src.exceptions.service import NoteNotFoundError
+from src.repositories.specifications import (
+    Specification,
+    AndSpecification,
+    OrSpecification,
+    SortedSpecification,
+    NoteSort,
+    NotesForOwnerSpecification,
+    NotesWithTagsSpecification,
+    NotesCreatedBetweenSpecification,
+    NotesUpdatedBetweenSpecification,
+    NotesWithTitlePrefixSpecification,
+    NotesWithContentLengthSpecification,
+    NoteSearchSpecification,
+    NoteChangesSpecification,
+)
+from src.repositories.pagination import (
+    KeysetPage,
+    Cursor,
+    ChangesCursor,
+    TombstonePosition,
+    NoteOrderingField,
+)
+from src.models.note import Note, content_hash
+from src.core.deltas import apply_edits
+from src.repositories.note import RenderedBodies
+from src.schemas.note import (
+    NoteOutputShema,
+    NoteCachedShema,
+    NoteCreateShema,
+    NoteImportShema,
+    NoteBatchShema,
+    NoteBatchItemStatus,
+    NoteBatchItemResultShema,
+    NoteBatchResultShema,
+    NoteImportResultShema,
+    NoteUpdateShema,
+    NotePageShema,
+    NoteSummaryShema,
+    NoteTagCountShema,
+    NoteFilterShema,
+    NoteQueryShema,
+    NoteTombstoneShema,
+    NoteChangesShema,
+    NoteSummaryPageShema,
+    NoteSearchResultShema,
+    NoteSearchPageShema,
+    NoteTitleSuggestionShema,
+    NoteRevisionShema,
+    NoteRevisionPageShema,
+    NoteRevisionContentShema,
+    NoteContentPatchShema,
+    NoteContentPatchResultShema,
+)
+from src.core.settings import (
+    DEFAULT_NOTES_PAGE_SIZE,
+    DEFAULT_TITLE_SUGGESTIONS_AMOUNT,
+    DEFAULT_REVISIONS_PAGE_SIZE,
+    DEFAULT_TAG_COUNTS_AMOUNT,
+    EXPORT_NOTES_BATCH_SIZE,
+    CHANGES_SETTLE_SECONDS,
+    IMPORT_NOTES_BATCH_SIZE,
+    TITLE_SIMILARITY_THRESHOLD,
+    MARKDOWN_RENDERER_VERSION,
+)
+from src.exceptions.repository import (
+    NoSuchRowError,
+    RowAlreadyExistsError,
+    StaleRowError,
+)
+from src.exceptions.service import (
+    NoteNotFoundError,
+    NoteAlreadyExistsError,
+    InvalidCursorError,
+    NoteRevisionNotFoundError,
+    NoteVersionConflictError,
+    InvalidContentPatchError,
+)
+from src.logger import logger
 
 if TYPE_CHECKING:
     from src.repositories.note import NoteRepository
+    from src.core.rendering import MarkdownRenderingEngine
+    from src.core.note_cache import NoteCache
+    from src.core.single_flight import SingleFlight
+
+# strong ETag issued by NoteService.note_etag, prefixed by the note version
+NOTE_ETAG_PATTERN = re.compile(r'"(?P<version>\d+)-[0-9a-f]+"')
 
 
 class NoteService:
-    def __init__(self, repository: "NoteRepository"):
+    # keeps strong references to fire-and-forget tasks until they are done
+    _background_tasks: set[asyncio.Task] = set()
+    # columns of NoteSummaryShema, content is neither transferred nor rendered
+    summary_columns = (
+        Note.id,
+        Note.title,
+        Note.owner_id,
+        Note.tags,
+        Note.created_at,
+        Note.updated_at,
+    )
+
+    def __init__(
+        self,
+        repository: "NoteRepository",
+        rendering_engine: "MarkdownRenderingEngine",
+        deletion_batch_size: int,
+        single_flight: "SingleFlight",
+        note_cache: "NoteCache | None" = None,
+    ):
         self.notes_for_owner_spec = NotesForOwnerSpecification
-        self.note_title_unique_for_owner_validator = NoteTitleUniqueForOwnerValidator
+        self.notes_with_tags_spec = NotesWithTagsSpecification
+        self.note_search_spec = NoteSearchSpecification
+        self.note_changes_spec = NoteChangesSpecification
         self.repository = repository
+        self.rendering_engine = rendering_engine
+        self.deletion_batch_size = deletion_batch_size
+        self.single_flight = single_flight
+        self.note_cache = note_cache
 
-    async def get_all(
-        self, *, md_content_format: bool = False
+    @staticmethod
+    def _build_page(
+        cursor: str | None, limit: int, order_by: NoteOrderingField
+    ) -> KeysetPage:
+        if cursor is None:
+            return KeysetPage(limit=limit, order_by=order_by)
+
+        try:
+            after = Cursor.decode(cursor)
+        except ValueError as e:
+            raise InvalidCursorError(f"Unable to decode cursor - {cursor}") from e
+        if after.order_by != order_by:
+            raise InvalidCursorError(
+                f"Cursor was issued for ordering by {after.order_by}, not {order_by}"
+            )
+
+        return KeysetPage(limit=limit, order_by=order_by, after=after)
+
+    async def _to_output_schemas(
+        self, notes: list[Note], md_content_format: bool
     ) -> list[NoteOutputShema]:
-        notes = await self.repository.get_all()
         note_schemas = [NoteOutputShema.model_validate(note) for note in notes]
 
         if md_content_format:
             # return bare MarkDown
             return note_schemas
 
-        # convert bare MarkDown to HTML
-        for note_schema in note_schemas:
-            note_schema.content = markdown.markdown(note_schema.content)
+        stale_notes, stale_notes_schemas = [], []
+        for note, note_schema in zip(notes, note_schemas):
+            if (
+                note.body.renderer_version == MARKDOWN_RENDERER_VERSION
+                and note.body.content_html is not None
+            ):
+                note_schema.content = note.body.content_html
+            else:
+                # HTML is missing or was rendered by an outdated renderer
+                stale_notes.append(note)
+                stale_notes_schemas.append(note_schema)
+
+        if stale_notes_schemas:
+            # whole page of stale notes is rendered in one batch
+            rendered_contents = await self.rendering_engine.render_many(
+                [note_schema.content for note_schema in stale_notes_schemas]
+            )
+            for note_schema, content_html in zip(
+                stale_notes_schemas, rendered_contents
+            ):
+                note_schema.content = content_html
+
+            self._schedule_rendered_bodies_refresh(
+                RenderedBodies(
+                    contents={
+                        note.body_hash: content_html
+                        for note, content_html in zip(stale_notes, rendered_contents)
+                    },
+                    renderer_version=MARKDOWN_RENDERER_VERSION,
+                )
+            )
 
         return note_schemas
 
+    async def _render_bodies(self, contents: list[str]) -> RenderedBodies:
+        """Renders contents to HTML of their note bodies"""
+        unique_contents = list(dict.fromkeys(contents))
+        rendered_contents = await self.rendering_engine.render_many(unique_contents)
+
+        return RenderedBodies(
+            contents={
+                content_hash(content): content_html
+                for content, content_html in zip(unique_contents, rendered_contents)
+            },
+            renderer_version=MARKDOWN_RENDERER_VERSION,
+        )
+
+    def _schedule_rendered_bodies_refresh(
+        self, rendered_bodies: RenderedBodies
+    ) -> None:
+        """Persists HTML rendered on read in background, so next reads can reuse it"""
+        task = asyncio.create_task(
+            self._refresh_rendered_bodies(rendered_bodies=rendered_bodies)
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _refresh_rendered_bodies(self, rendered_bodies: RenderedBodies) -> None:
+        try:
+            await self.repository.update_rendered_bodies(
+                rendered_bodies=rendered_bodies
+            )
+        except Exception:
+            logger.exception(
+                "Unable to refresh rendered HTML of "
+                f"{len(rendered_bodies.contents)} note bodies"
+            )
+
+    @staticmethod
+    def _cut_page(notes: list[Note], page: KeysetPage) -> tuple[list[Note], str | None]:
+        """Returns notes of the page and cursor of the next one"""
+        # repository returns one extra note if there is the next page
+        next_cursor = None
+        if len(notes) > page.limit:
+            notes = notes[: page.limit]
+            next_cursor = Cursor.from_note(notes[-1], page.order_by).encode()
+
+        return notes, next_cursor
+
+    async def _to_page_schema(
+        self, notes: list[Note], page: KeysetPage, md_content_format: bool
+    ) -> NotePageShema:
+        notes, next_cursor = self._cut_page(notes=notes, page=page)
+        note_schemas = await self._to_output_schemas(
+            notes=notes, md_content_format=md_content_format
+        )
+
+        return NotePageShema(items=note_schemas, next_cursor=next_cursor)
+
+    async def get_all(
+        self,
+        *,
+        limit: int = DEFAULT_NOTES_PAGE_SIZE,
+        cursor: str | None = None,
+        order_by: NoteOrderingField = NoteOrderingField.CREATED_AT,
+        md_content_format: bool = False,
+    ) -> NotePageShema:
+        page = self._build_page(cursor=cursor, limit=limit, order_by=order_by)
+        notes = await self.repository.get_all(page=page)
+
+        return await self._to_page_schema(
+            notes=notes, page=page, md_content_format=md_content_format
+        )
+
+    def _owner_notes_spec(self, owner_id: UUID, tags: list[str] | None):
+        """Owner`s notes, only ones having all given tags if any"""
+        if tags:
+            return self.notes_with_tags_spec(owner_id=owner_id, tags=tags)
+        return self.notes_for_owner_spec(owner_id=owner_id)
+
     async def get_all_by_owner_id(
-        self, owner_id: UUID, *, md_content_format: bool = False
-    ) -> list[NoteOutputShema]:
+        self,
+        owner_id: UUID,
+        *,
+        limit: int = DEFAULT_NOTES_PAGE_SIZE,
+        cursor: str | None = None,
+        order_by: NoteOrderingField = NoteOrderingField.CREATED_AT,
+        md_content_format: bool = False,
+        tags: list[str] | None = None,
+    ) -> NotePageShema:
+        # concurrent requests of the same page share one query and rendering
+        return await self.single_flight.do(
+            key=(
+                "owner_notes",
+                owner_id,
+                limit,
+                cursor,
+                order_by,
+                md_content_format,
+                tuple(tags or ()),
+            ),
+            call=lambda: self._load_all_by_owner_id(
+                owner_id=owner_id,
+                limit=limit,
+                cursor=cursor,
+                order_by=order_by,
+                md_content_format=md_content_format,
+                tags=tags,
+            ),
+        )
+
+    async def _load_all_by_owner_id(
+        self,
+        owner_id: UUID,
+        limit: int,
+        cursor: str | None,
+        order_by: NoteOrderingField,
+        md_content_format: bool,
+        tags: list[str] | None,
+    ) -> NotePageShema:
+        page = self._build_page(cursor=cursor, limit=limit, order_by=order_by)
+        specification = self._owner_notes_spec(owner_id=owner_id, tags=tags)
+        notes_by_owner_id = await self.repository.filter_by(
+            specification=specification, page=page
+        )
+
+        return await self._to_page_schema(
+            notes=notes_by_owner_id, page=page, md_content_format=md_content_format
+        )
+
+    def _to_summary_page_schema(
+        self, notes: list[Note], page: KeysetPage
+    ) -> NoteSummaryPageShema:
+        notes, next_cursor = self._cut_page(notes=notes, page=page)
+
+        return NoteSummaryPageShema(
+            items=[NoteSummaryShema.model_validate(note) for note in notes],
+            next_cursor=next_cursor,
+        )
+
+    async def get_summaries(
+        self,
+        *,
+        limit: int = DEFAULT_NOTES_PAGE_SIZE,
+        cursor: str | None = None,
+        order_by: NoteOrderingField = NoteOrderingField.CREATED_AT,
+    ) -> NoteSummaryPageShema:
+        page = self._build_page(cursor=cursor, limit=limit, order_by=order_by)
+        notes = await self.repository.get_all(page=page, columns=self.summary_columns)
+
+        return self._to_summary_page_schema(notes=notes, page=page)
+
+    async def get_summaries_by_owner_id(
+        self,
+        owner_id: UUID,
+        *,
+        limit: int = DEFAULT_NOTES_PAGE_SIZE,
+        cursor: str | None = None,
+        order_by: NoteOrderingField = NoteOrderingField.CREATED_AT,
+        tags: list[str] | None = None,
+    ) -> NoteSummaryPageShema:
+        page = self._build_page(cursor=cursor, limit=limit, order_by=order_by)
+        specification = self._owner_notes_spec(owner_id=owner_id, tags=tags)
+        notes_by_owner_id = await self.repository.filter_by(
+            specification=specification, page=page, columns=self.summary_columns
+        )
+
+        return self._to_summary_page_schema(notes=notes_by_owner_id, page=page)
+
+    @classmethod
+    def _filter_spec(
+        cls, owner_id: UUID, note_filter: NoteFilterShema
+    ) -> Specification:
+        specifications = [
+            NotesCreatedBetweenSpecification(
+                since=note_filter.created_since, until=note_filter.created_until
+            ),
+            NotesUpdatedBetweenSpecification(
+                since=note_filter.updated_since, until=note_filter.updated_until
+            ),
+            NotesWithContentLengthSpecification(
+                min_length=note_filter.min_content_length,
+                max_length=note_filter.max_content_length,
+            ),
+        ]
+        if note_filter.title_prefix is not None:
+            specifications.append(
+                NotesWithTitlePrefixSpecification(prefix=note_filter.title_prefix)
+            )
+        if note_filter.tags:
+            specifications.append(
+                NotesWithTagsSpecification(owner_id=owner_id, tags=note_filter.tags)
+            )
+        if note_filter.any_of:
+            specifications.append(
+                OrSpecification(
+                    *(
+                        cls._filter_spec(owner_id, nested)
+                        for nested in note_filter.any_of
+                    )
+                )
+            )
+        for nested in note_filter.none_of:
+            specifications.append(~cls._filter_spec(owner_id, nested))
+
+        return AndSpecification(*specifications)
+
+    async def query_by_owner_id(
+        self, owner_id: UUID, note_query: NoteQueryShema
+    ) -> list[NoteSummaryShema]:
+        """
+        Returns summaries of owner`s notes satisfying the filter in given order,
+        filtering, ordering and limit are done by one SQL statement
+        """
+        specification = SortedSpecification(
+            self.notes_for_owner_spec(owner_id=owner_id)
+            & self._filter_spec(owner_id, note_query.filter),
+            order_by=[
+                NoteSort(field=sort.field, descending=sort.descending)
+                for sort in note_query.order_by
+            ],
+            limit=note_query.limit,
+        )
+        notes = await self.repository.filter_by(
+            specification=specification, columns=self.summary_columns
+        )
+
+        return [NoteSummaryShema.model_validate(note) for note in notes]
+
+    async def get_tag_counts(
+        self, owner_id: UUID, *, limit: int = DEFAULT_TAG_COUNTS_AMOUNT
+    ) -> list[NoteTagCountShema]:
+        """Returns owner`s most used tags with amounts of notes having them"""
+        tag_counts = await self.repository.get_tag_counts(
+            owner_id=owner_id, limit=limit
+        )
+
+        return [NoteTagCountShema.model_validate(tag_count) for tag_count in tag_counts]
+
+    async def get_changes(
+        self,
+        owner_id: UUID,
+        *,
+        since: str | None = None,
+        limit: int = DEFAULT_NOTES_PAGE_SIZE,
+        md_content_format: bool = False,
+    ) -> NoteChangesShema:
+        """
+        Returns owner`s notes changed and deleted since the cursor, up to limit
+        of each. Without cursor all notes are returned, so the first sync is
+        a full one.
+        """
+        try:
+            cursor = ChangesCursor.decode(since) if since else ChangesCursor()
+        except ValueError as e:
+            raise InvalidCursorError(f"Unable to decode cursor - {since}") from e
+
+        page = KeysetPage(
+            limit=limit,
+            order_by=NoteOrderingField.UPDATED_AT,
+            after=cursor.notes_after,
+        )
+        specification = self.note_changes_spec(
+            owner_id=owner_id, settle_seconds=CHANGES_SETTLE_SECONDS
+        )
+        changed_notes = await self.repository.filter_by(
+            specification=specification, page=page
+        )
+        # one extra row tells whether there are more changes
+        tombstones = await self.repository.get_tombstones(
+            owner_id=owner_id,
+            settle_seconds=CHANGES_SETTLE_SECONDS,
+            limit=limit + 1,
+            after=cursor.tombstones_after,
+        )
+
+        has_more = len(changed_notes) > limit or len(tombstones) > limit
+        changed_notes, tombstones = changed_notes[:limit], tombstones[:limit]
+
+        next_cursor = ChangesCursor(
+            notes_after=(
+                Cursor.from_note(changed_notes[-1], NoteOrderingField.UPDATED_AT)
+                if changed_notes
+                else cursor.notes_after
+            ),
+            tombstones_after=(
+                TombstonePosition(
+                    deleted_at=tombstones[-1].deleted_at, id=tombstones[-1].id
+                )
+                if tombstones
+                else cursor.tombstones_after
+            ),
+        )
+
+        return NoteChangesShema(
+            notes=await self._to_output_schemas(
+                notes=changed_notes, md_content_format=md_content_format
+            ),
+            deleted=[
+                NoteTombstoneShema.model_validate(tombstone) for tombstone in tombstones
+            ],
+            next_cursor=next_cursor.encode(),
+            has_more=has_more,
+        )
+
+    async def export_by_owner_id(self, owner_id: UUID) -> AsyncIterator[bytes]:
+        """
+        Yields owner`s notes with MarkDown content as newline-delimited JSON,
+        one chunk per batch read from the database
+        """
         specification = self.notes_for_owner_spec(owner_id=owner_id)
-        notes_by_owner_id = await self.repository.filter_by(specification=specification)
-        notes_by_owner_id_schemas = [
-            NoteOutputShema.model_validate(note) for note in notes_by_owner_id
+        async for notes_batch in self.repository.stream_by(
+            specification=specification, batch_size=EXPORT_NOTES_BATCH_SIZE
+        ):
+            yield b"".join(
+                NoteOutputShema.model_validate(note).model_dump_json().encode() + b"\n"
+                for note in notes_batch
+            )
+
+    @staticmethod
+    async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Splits arbitrary chunks of a stream into lines"""
+        tail = b""
+        async for chunk in chunks:
+            *lines, tail = (tail + chunk).split(b"\n")
+            for line in lines:
+                yield line
+        if tail:
+            yield tail
+
+    async def _import_batch(
+        self, notes: list[Note], import_result: NoteImportResultShema
+    ) -> None:
+        inserted_titles = set(await self.repository.create_many(notes=notes))
+
+        import_result.imported += len(inserted_titles)
+        import_result.conflicting_titles.extend(
+            note.title for note in notes if note.title not in inserted_titles
+        )
+
+    async def import_by_owner_id(
+        self, owner_id: UUID, chunks: AsyncIterator[bytes]
+    ) -> NoteImportResultShema:
+        """
+        Imports notes from newline-delimited JSON stream by batches, each batch
+        is inserted by one statement. Invalid lines and notes with taken titles are
+        skipped and reported. Content is rendered lazily on the first read.
+        """
+        import_result = NoteImportResultShema()
+        seen_titles = set()
+        notes_batch = []
+        line_number = 0
+        async for line in self._iter_lines(chunks):
+            line_number += 1
+            if not line.strip():
+                continue
+
+            try:
+                imported_note = NoteImportShema.model_validate_json(line)
+            except ValidationError:
+                import_result.invalid_lines.append(line_number)
+                continue
+
+            if imported_note.title in seen_titles:
+                import_result.conflicting_titles.append(imported_note.title)
+                continue
+            seen_titles.add(imported_note.title)
+
+            notes_batch.append(
+                Note(
+                    title=imported_note.title,
+                    content=imported_note.content,
+                    tags=imported_note.tags,
+                    owner_id=owner_id,
+                )
+            )
+            if len(notes_batch) == IMPORT_NOTES_BATCH_SIZE:
+                await self._import_batch(notes_batch, import_result)
+                notes_batch = []
+
+        if notes_batch:
+            await self._import_batch(notes_batch, import_result)
+        self._forget_in_flight_loads(owner_ids=[owner_id])
+
+        logger.info(
+            f"Imported {import_result.imported} notes for owner owner_id - {owner_id}"
+        )
+        return import_result
+
+    async def search(
+        self,
+        owner_id: UUID,
+        query: str,
+        *,
+        limit: int = DEFAULT_NOTES_PAGE_SIZE,
+        offset: int = 0,
+    ) -> NoteSearchPageShema:
+        specification = self.note_search_spec(owner_id=owner_id, query=query)
+        # one extra row tells whether the next page exists
+        found_notes = await self.repository.search(
+            specification=specification, limit=limit + 1, offset=offset
+        )
+
+        next_offset = None
+        if len(found_notes) > limit:
+            found_notes = found_notes[:limit]
+            next_offset = offset + limit
+
+        return NoteSearchPageShema(
+            items=[
+                NoteSearchResultShema.model_validate(found_note)
+                for found_note in found_notes
+            ],
+            next_offset=next_offset,
+        )
+
+    async def suggest_titles(
+        self,
+        owner_id: UUID,
+        fragment: str,
+        *,
+        limit: int = DEFAULT_TITLE_SUGGESTIONS_AMOUNT,
+    ) -> list[NoteTitleSuggestionShema]:
+        suggested_titles = await self.repository.search_titles(
+            owner_id=owner_id,
+            fragment=fragment,
+            similarity_threshold=TITLE_SIMILARITY_THRESHOLD,
+            limit=limit,
+        )
+
+        return [
+            NoteTitleSuggestionShema.model_validate(suggested_title)
+            for suggested_title in suggested_titles
         ]
 
-        if md_content_format:
-            # return bare MarkDown
-            return notes_by_owner_id_schemas
+    async def get_revisions(
+        self,
+        note_id: UUID,
+        *,
+        limit: int = DEFAULT_REVISIONS_PAGE_SIZE,
+        before: int | None = None,
+    ) -> NoteRevisionPageShema:
+        """
+        Returns note`s revisions with numbers less than before, the newest first.
+        Revision is created when it replaces the previous one, so its created_at
+        is replaced_at of the previous revision or created_at of the note.
+        """
+        try:
+            current_revision = await self.repository.get_current_revision(
+                note_id=note_id
+            )
+        except NoSuchRowError as e:
+            raise NoteNotFoundError(f"Unable to find note with id - {note_id}") from e
+
+        if before is None or before > current_revision.number:
+            before = current_revision.number + 1
+        numbers = list(range(before - 1, max(before - limit, 1) - 1, -1))
+        if not numbers:
+            return NoteRevisionPageShema(items=[])
+
+        # numbers have no gaps, so previous revisions are the page shifted by one
+        replaced_at = {
+            revision.number: revision.replaced_at
+            for revision in await self.repository.get_revisions(
+                note_id=note_id, before=numbers[0], limit=len(numbers)
+            )
+        }
+
+        return NoteRevisionPageShema(
+            items=[
+                NoteRevisionShema(
+                    number=number,
+                    created_at=replaced_at.get(number - 1, current_revision.created_at),
+                )
+                for number in numbers
+            ],
+            next_before=numbers[-1] if numbers[-1] > 1 else None,
+        )
+
+    async def get_revision(
+        self, note_id: UUID, number: int, *, md_content_format: bool = False
+    ) -> NoteRevisionContentShema:
+        try:
+            content = await self.repository.get_revision_content(
+                note_id=note_id, number=number
+            )
+        except NoSuchRowError as e:
+            raise NoteRevisionNotFoundError(
+                f"Unable to find revision {number} of note with id - {note_id}"
+            ) from e
+
+        if not md_content_format:
+            content = await self.rendering_engine.render(content)
+
+        return NoteRevisionContentShema(note_id=note_id, number=number, content=content)
+
+    def _digest(self, *parts) -> str:
+        """Digest of given parts and rendering options"""
+        digest = hashlib.sha256(
+            ":".join(
+                map(str, (*parts, self.rendering_engine.options_fingerprint))
+            ).encode()
+        )
+        return digest.hexdigest()[:32]
+
+    def _etag(self, *parts) -> str:
+        """Strong ETag of given parts and rendering options"""
+        return f'"{self._digest(*parts)}"'
+
+    def note_etag(self, note_id: UUID, version: int, *, md_content_format: bool) -> str:
+        """
+        Strong ETag of the note representation, it starts with the note version,
+        so If-Match preconditions of writes are checked without reading the note
+        """
+        return f'"{version}-{self._digest(note_id, version, md_content_format)}"'
+
+    @staticmethod
+    def version_from_etag(etag: str) -> int | None:
+        """Returns note version of the ETag issued by note_etag, None if it is not"""
+        match = NOTE_ETAG_PATTERN.fullmatch(etag.strip())
+        return int(match.group("version")) if match is not None else None
+
+    async def get_note_etag(
+        self, note_id: UUID, *, md_content_format: bool = False
+    ) -> str:
+        """Returns ETag of the note without loading and rendering it"""
+        try:
+            version = await self.repository.get_version(note_id=note_id)
+        except NoSuchRowError as e:
+            raise NoteNotFoundError(f"Unable to find note with id - {note_id}") from e
+
+        return self.note_etag(
+            note_id=note_id, version=version, md_content_format=md_content_format
+        )
+
+    async def get_owner_notes_etag(self, owner_id: UUID, *, variant: str) -> str:
+        """
+        Returns ETag of owner`s notes collection, variant distinguishes
+        representations of it, e.g. pages and content formats
+        """
+        owner_version = await self.repository.get_owner_version(owner_id=owner_id)
 
-        # convert bare MarkDown to HTML
-        for note_schema in notes_by_owner_id_schemas:
-            note_schema.content = markdown.markdown(note_schema.content)
+        return self._etag(owner_id, owner_version, variant)
 
-        return notes_by_owner_id_schemas
+    async def _load_cached_note(self, note_id: UUID) -> NoteCachedShema:
+        note = await self.repository.get_one_by_id(note_id=note_id)
+        [note_schema] = await self._to_output_schemas(
+            notes=[note], md_content_format=False
+        )
+
+        return NoteCachedShema(
+            **note_schema.model_dump(exclude={"content"}),
+            content=note.content,
+            content_html=note_schema.content,
+            options_fingerprint=self.rendering_engine.options_fingerprint,
+        )
 
     async def get_one_by_id(
         self, note_id: UUID, *, md_content_format: bool = False
     ) -> NoteOutputShema:
+        # concurrent requests of the same note share one load and rendering
+        return await self.single_flight.do(
+            key=("note", note_id, md_content_format),
+            call=lambda: self._load_one_by_id(
+                note_id=note_id, md_content_format=md_content_format
+            ),
+        )
+
+    async def _load_one_by_id(
+        self, note_id: UUID, md_content_format: bool
+    ) -> NoteOutputShema:
+        if self.note_cache is not None:
+            return await self._get_one_cached_by_id(
+                note_id=note_id, md_content_format=md_content_format
+            )
+
         try:
             note = await self.repository.get_one_by_id(note_id=note_id)
         except NoSuchRowError as e:
             raise NoteNotFoundError(f"Unable to find note with id - {note_id}") from e
 
-        note_schema = NoteOutputShema.model_validate(note)
-        if md_content_format:
-            return note_schema
+        [note_schema] = await self._to_output_schemas(
+            notes=[note], md_content_format=md_content_format
+        )
+
+        return note_schema
+
+    async def _get_one_cached_by_id(
+        self, note_id: UUID, md_content_format: bool
+    ) -> NoteOutputShema:
+        options_fingerprint = self.rendering_engine.options_fingerprint
+        try:
+            cached_note = await self.note_cache.get_or_load(
+                note_id=note_id, load=lambda: self._load_cached_note(note_id)
+            )
+            if cached_note.options_fingerprint != options_fingerprint:
+                # cached by a replica with other rendering options, e.g. while deploy
+                cached_note = await self._load_cached_note(note_id)
+        except NoSuchRowError as e:
+            raise NoteNotFoundError(f"Unable to find note with id - {note_id}") from e
 
-        note_schema.content = markdown.markdown(note_schema.content)
+        note_schema = NoteOutputShema.model_validate(
+            cached_note.model_dump(exclude={"content_html", "options_fingerprint"})
+        )
+        if not md_content_format:
+            note_schema.content = cached_note.content_html
 
         return note_schema
 
+    def _forget_in_flight_loads(
+        self, note_ids: Iterable[UUID] = (), owner_ids: Iterable[UUID] = ()
+    ) -> None:
+        """Reads started after a change do not share loads started before it"""
+        for note_id in note_ids:
+            self.single_flight.forget("note", note_id)
+        for owner_id in owner_ids:
+            self.single_flight.forget("owner_notes", owner_id)
+
+    async def _invalidate_cached_notes(self, *note_ids: UUID) -> None:
+        if self.note_cache is not None:
+            await self.note_cache.invalidate(*note_ids)
+
+    async def _invalidate_cached_owner_notes(self, owner_id: UUID) -> None:
+        if self.note_cache is not None:
+            await self.note_cache.invalidate_owner(owner_id)
+
     async def create_one(self, new_note: NoteCreateShema) -> UUID:
         new_note_orm = Note(**new_note.model_dump())
+        rendered_bodies = await self._render_bodies([new_note.content])
 
-        note_title_unique_for_owner_validator = (
-            self.note_title_unique_for_owner_validator(
-                repository=self.repository, owner_id=Note.owner_id
+        try:
+            new_note_id = await self.repository.create_one(
+                note=new_note_orm, rendered_bodies=rendered_bodies
             )
-        )
-        await note_title_unique_for_owner_validator.validate(
-            new_note_title=new_note.title
-        )
-
-        new_note_id = await self.repository.create_one(note=new_note_orm)
+        except RowAlreadyExistsError as e:
+            raise NoteAlreadyExistsError(
+                f"Note with title {new_note.title} already exists "
+                f"for owner owner_id - {new_note.owner_id}"
+            ) from e
 
+        self._forget_in_flight_loads(owner_ids=[new_note.owner_id])
         return new_note_id
 
-    async def update_one(self, note_id: UUID, updated_note: NoteUpdateShema) -> None:
-        # check note existence
+    async def update_one(
+        self,
+        note_id: UUID,
+        updated_note: NoteUpdateShema,
+        *,
+        expected_version: int | None = None,
+    ) -> int:
+        """
+        Updates the note by one statement without reading it first and returns
+        its new version. With expected_version the note is updated only if
+        it has not been changed since the client read that version.
+        """
+        values = updated_note.model_dump(exclude_unset=True, exclude_none=True)
+        rendered_bodies = None
+        if "content" in values:
+            rendered_bodies = await self._render_bodies([values["content"]])
+
+        try:
+            updated = await self.repository.update_by_id(
+                note_id=note_id,
+                values=values,
+                expected_version=expected_version,
+                rendered_bodies=rendered_bodies,
+            )
+        except NoSuchRowError as e:
+            raise NoteNotFoundError(f"Unable to find note with id - {note_id}") from e
+        except StaleRowError as e:
+            raise NoteVersionConflictError(
+                f"Note with id - {note_id} is not of version {expected_version}"
+            ) from e
+        except RowAlreadyExistsError as e:
+            raise NoteAlreadyExistsError(
+                f"Note with title {updated_note.title} already exists "
+                f"for owner of note with id - {note_id}"
+            ) from e
+
+        self._forget_in_flight_loads(
+            note_ids=[note_id], owner_ids={updated.previous_owner_id, updated.owner_id}
+        )
+        await self._invalidate_cached_notes(note_id)
+        return updated.version
+
+    async def patch_content(
+        self, note_id: UUID, patch: NoteContentPatchShema
+    ) -> NoteContentPatchResultShema:
+        """
+        Applies edits made against the base version of note`s MarkDown, so only
+        changed fragments of large notes are sent. Edits of an outdated base
+        are rejected, the base is checked again under the row lock on save.
+        """
         try:
             current_note = await self.repository.get_one_by_id(note_id=note_id)
         except NoSuchRowError as e:
             raise NoteNotFoundError(f"Unable to find note with id - {note_id}") from e
 
-        note_title_unique_for_owner_validator = (
-            self.note_title_unique_for_owner_validator(
-                repository=self.repository, owner_id=Note.owner_id
+        if current_note.updated_at != patch.base_updated_at:
+            raise NoteVersionConflictError(
+                f"Note with id - {note_id} was changed since "
+                f"{patch.base_updated_at.isoformat()}"
+            )
+
+        try:
+            current_note.content = apply_edits(
+                current_note.content,
+                [(edit.offset, edit.delete, edit.insert) for edit in patch.edits],
+            )
+        except ValueError as e:
+            raise InvalidContentPatchError(str(e)) from e
+        rendered_bodies = await self._render_bodies([current_note.content])
+
+        try:
+            await self.repository.update_one(
+                note=current_note,
+                rendered_bodies=rendered_bodies,
+                base_updated_at=patch.base_updated_at,
+            )
+        except NoSuchRowError as e:
+            raise NoteNotFoundError(f"Unable to find note with id - {note_id}") from e
+        except StaleRowError as e:
+            raise NoteVersionConflictError(
+                f"Note with id - {note_id} was changed since "
+                f"{patch.base_updated_at.isoformat()}"
+            ) from e
+
+        self._forget_in_flight_loads(
+            note_ids=[note_id], owner_ids=[current_note.owner_id]
+        )
+        await self._invalidate_cached_notes(note_id)
+        return NoteContentPatchResultShema(updated_at=current_note.updated_at)
+
+    async def apply_batch(self, batch: NoteBatchShema) -> NoteBatchResultShema:
+        """
+        Applies created, updated and deleted notes of the batch in one transaction.
+        Notes with titles taken by their owners and missing notes are reported
+        in per-item results instead of failing the whole batch.
+        """
+        batch_result = NoteBatchResultShema()
+
+        # the same title can be created only once per owner
+        created_keys, new_note_schemas = set(), []
+        for new_note in batch.create:
+            if (new_note.owner_id, new_note.title) in created_keys:
+                continue
+            created_keys.add((new_note.owner_id, new_note.title))
+            new_note_schemas.append(new_note)
+
+        # contents of the whole batch are rendered together, each body once
+        rendered_bodies = await self._render_bodies(
+            [new_note.content for new_note in new_note_schemas]
+            + [
+                updated_note.content
+                for updated_note in batch.update
+                if updated_note.content is not None
+            ]
+        )
+
+        try:
+            applied = await self.repository.apply_batch(
+                new_notes=[
+                    Note(**new_note.model_dump()) for new_note in new_note_schemas
+                ],
+                updated_notes=[
+                    updated_note.model_dump() for updated_note in batch.update
+                ],
+                deleted_note_ids=batch.delete,
+                rendered_bodies=rendered_bodies,
             )
+        except RowAlreadyExistsError as e:
+            raise NoteAlreadyExistsError(
+                "Notes of the batch conflict with each other by titles"
+            ) from e
+
+        # previous owners of updated and deleted notes are unknown here
+        self.single_flight.forget("owner_notes")
+        self._forget_in_flight_loads(
+            note_ids=[*(row.id for row in applied.updated), *applied.deleted_ids]
         )
-        await note_title_unique_for_owner_validator.validate(
-            new_note_title=updated_note.title
+        await self._invalidate_cached_notes(
+            *(row.id for row in applied.updated if row.updated), *applied.deleted_ids
         )
 
-        for field, value in updated_note.model_dump(exclude_unset=True).items():
-            setattr(current_note, field, value)
+        created_ids = {(row.owner_id, row.title): row.id for row in applied.created}
+        for new_note in batch.create:
+            new_note_id = created_ids.pop((new_note.owner_id, new_note.title), None)
+            batch_result.created.append(
+                NoteBatchItemResultShema(
+                    id=new_note_id, status=NoteBatchItemStatus.CREATED
+                )
+                if new_note_id is not None
+                else NoteBatchItemResultShema(status=NoteBatchItemStatus.CONFLICT)
+            )
+
+        update_statuses = {row.id: row for row in applied.updated}
+        for updated_note in batch.update:
+            update_status = update_statuses[updated_note.id]
+            if update_status.updated:
+                status = NoteBatchItemStatus.UPDATED
+            elif update_status.note_exists:
+                status = NoteBatchItemStatus.CONFLICT
+            else:
+                status = NoteBatchItemStatus.NOT_FOUND
+            batch_result.updated.append(
+                NoteBatchItemResultShema(id=updated_note.id, status=status)
+            )
 
-        await self.repository.update_one(note=current_note)
+        deleted_ids = set(applied.deleted_ids)
+        batch_result.deleted = [
+            NoteBatchItemResultShema(
+                id=note_id,
+                status=(
+                    NoteBatchItemStatus.DELETED
+                    if note_id in deleted_ids
+                    else NoteBatchItemStatus.NOT_FOUND
+                ),
+            )
+            for note_id in batch.delete
+        ]
+
+        return batch_result
 
     async def delete_one(self, note_id: UUID) -> None:
         # check note existence
@@ -116,10 +1014,31 @@ class NoteService:
             raise NoteNotFoundError(f"Unable to find note with id - {note_id}") from e
 
         await self.repository.delete_one(note=note_on_delete)
+        self._forget_in_flight_loads(
+            note_ids=[note_id], owner_ids=[note_on_delete.owner_id]
+        )
+        await self._invalidate_cached_notes(note_id)
 
     async def delete_all_by_owner_id(self, owner_id: UUID) -> None:
-        specification = self.notes_for_owner_spec(owner_id=owner_id)
-        notes_by_owner_id = await self.repository.filter_by(specification=specification)
-        note_ids = [note.id for note in notes_by_owner_id]
+        """
+        Deletes owner`s notes by batches without loading them, every batch
+        is committed separately, so row locks are short. Deleted batches stay
+        deleted, an interrupted call continues from the remaining notes when repeated.
+        """
+        deleted_total = 0
+        while deleted := await self.repository.delete_batch_by_owner_id(
+            owner_id=owner_id, batch_size=self.deletion_batch_size
+        ):
+            deleted_total += deleted
+            # ids of deleted notes are not loaded
+            self.single_flight.forget("note")
+            self._forget_in_flight_loads(owner_ids=[owner_id])
+            await self._invalidate_cached_owner_notes(owner_id)
+            logger.info(
+                f"Deleted {deleted_total} notes of owner owner_id - {owner_id} so far"
+            )
 
-        await self.repository.delete_all(note_ids=note_ids)
+        logger.info(
+            f"All notes of owner owner_id - {owner_id} are deleted, "
+            f"{deleted_total} in total"
+        )
@@ -5,6 +5,7 @@ from typing import TYPE_CHECKING, Generator, AsyncGenerator, Callable
 
 import pytest
 import pytest_asyncio
+from sqlalchemy import text
 from testcontainers.postgres import PostgresContainer, DbContainer
 
 from src.core.settings import postgres_settings
@@ -54,6 +55,9 @@ async def prepare_test_database(container) -> AsyncGenerator["AsyncDatabase", No
 
     async with test_db.async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+        # extensions are created by migrations in other environments
+        for extension in ("pg_trgm", "btree_gin"):
+            await conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
         await conn.run_sync(Base.metadata.create_all)
 
     yield test_db
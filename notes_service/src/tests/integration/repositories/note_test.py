@@ -1,10 +1,31 @@
+import asyncio
 import uuid
+from datetime import datetime
 from typing import TYPE_CHECKING
 
 import pytest
-
-from src.repositories.specifications import NotesForOwnerSpecification
-from src.exceptions.repository import NoSuchRowError
+from sqlalchemy import text
+from sqlalchemy.exc import InvalidRequestError
+
+from src.repositories.specifications import (
+    NoteSort,
+    NoteSortField,
+    SortedSpecification,
+    NotesForOwnerSpecification,
+    NotesWithTagsSpecification,
+    NotesWithTitlePrefixSpecification,
+    NotesWithContentLengthSpecification,
+    NoteSearchSpecification,
+    NoteChangesSpecification,
+)
+from src.repositories.pagination import KeysetPage, Cursor, NoteOrderingField
+from src.models.note import Note, REVISION_SNAPSHOT_INTERVAL, content_hash
+from src.repositories.note import RenderedBodies
+from src.exceptions.repository import (
+    NoSuchRowError,
+    RowAlreadyExistsError,
+    StaleRowError,
+)
 
 if TYPE_CHECKING:
     from src.repositories.note import NoteRepository
@@ -65,6 +86,160 @@ class TestNoteRepository:
 
         assert notes == []
 
+    @pytest.mark.parametrize(
+        ("order_by",),
+        ((NoteOrderingField.CREATED_AT,), (NoteOrderingField.UPDATED_AT,)),
+    )
+    async def test_get_all_by_owner_id_keyset_pages(
+        self,
+        order_by,
+        expected_data_with,
+        insert_test_data,
+        note_repository: "NoteRepository",
+    ):
+        owner_id = uuid.uuid4()
+        limit = 4
+        exp_notes_orm, exp_notes_attrs = expected_data_with(
+            owner_id=owner_id, amount=10
+        )
+        await insert_test_data(exp_notes_orm)
+
+        nfo_specification = NotesForOwnerSpecification(owner_id=owner_id)
+        page = KeysetPage(limit=limit, order_by=order_by)
+        fetched_ids = []
+        while True:
+            notes = await note_repository.filter_by(
+                specification=nfo_specification, page=page
+            )
+            fetched_ids.extend(note.id for note in notes[:limit])
+            if len(notes) <= limit:
+                break
+            page = KeysetPage(
+                limit=limit,
+                order_by=order_by,
+                after=Cursor.from_note(notes[limit - 1], order_by),
+            )
+
+        expected_ids = [
+            note["id"]
+            for note in sorted(exp_notes_attrs, key=lambda n: (n[order_by], n["id"]))
+        ]
+        assert fetched_ids == expected_ids
+
+    async def test_filter_by_loads_only_columns(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_note_owner_id = uuid.uuid4()
+        exp_notes_orm, _ = expected_data_with(owner_id=exp_note_owner_id, amount=2)
+        await insert_test_data(exp_notes_orm)
+
+        notes = await note_repository.filter_by(
+            specification=NotesForOwnerSpecification(owner_id=exp_note_owner_id),
+            columns=(Note.id, Note.title),
+        )
+
+        assert {note.title for note in notes} == {note.title for note in exp_notes_orm}
+        # content is not loaded at all
+        with pytest.raises(InvalidRequestError):
+            _ = notes[0].content
+
+    async def test_stream_by(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_note_owner_id = uuid.uuid4()
+        exp_notes_orm, _ = expected_data_with(owner_id=exp_note_owner_id, amount=5)
+        await insert_test_data(exp_notes_orm)
+
+        notes_batches = [
+            notes_batch
+            async for notes_batch in note_repository.stream_by(
+                specification=NotesForOwnerSpecification(owner_id=exp_note_owner_id),
+                batch_size=2,
+            )
+        ]
+
+        assert [len(notes_batch) for notes_batch in notes_batches] == [2, 2, 1]
+        assert {note.id for batch in notes_batches for note in batch} == {
+            note.id for note in exp_notes_orm
+        }
+
+    async def test_search(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        owner_id = uuid.uuid4()
+        exp_notes_orm, _ = expected_data_with(owner_id=owner_id, amount=3)
+        title_match, content_match, no_match = exp_notes_orm
+        title_match.title = "Marathon training plan"
+        content_match.content = "## Week one\n\nEasy marathon pace runs"
+        no_match.content = "## Groceries"
+        # the same words in another owner`s note must not be found
+        other_owner_notes, _ = expected_data_with(amount=2)
+        other_owner_notes[0].title = "Marathon"
+        await insert_test_data(exp_notes_orm)
+        await insert_test_data(other_owner_notes)
+
+        specification = NoteSearchSpecification(owner_id=owner_id, query="marathon")
+        found_notes = await note_repository.search(
+            specification=specification, limit=10
+        )
+
+        # title matches are weighted higher than content ones
+        assert [note.id for note in found_notes] == [
+            title_match.id,
+            content_match.id,
+        ]
+        assert "<b>marathon</b>" in found_notes[1].headline.lower()
+
+    async def test_search_large_note(self, note_repository: "NoteRepository"):
+        owner_id = uuid.uuid4()
+        # distinct words of several MB would not fit a tsvector
+        words = [f"word{i}" for i in range(500_000)]
+        note_id = await note_repository.create_one(
+            note=Note(title="Large note", content=" ".join(words), owner_id=owner_id)
+        )
+
+        indexed_notes = await note_repository.filter_by(
+            NoteSearchSpecification(owner_id=owner_id, query=words[0])
+        )
+        not_indexed_notes = await note_repository.filter_by(
+            NoteSearchSpecification(owner_id=owner_id, query=words[-1])
+        )
+
+        assert [note.id for note in indexed_notes] == [note_id]
+        assert not_indexed_notes == []
+
+    async def test_search_titles(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        owner_id = uuid.uuid4()
+        exp_notes_orm, _ = expected_data_with(owner_id=owner_id, amount=4)
+        titles = ("Weekly report", "Weakly reprot", "Groceries", "100% done_list")
+        for note, title in zip(exp_notes_orm, titles):
+            note.title = title
+        other_owner_notes, _ = expected_data_with(amount=2)
+        other_owner_notes[0].title = "Weekly report"
+        await insert_test_data(exp_notes_orm)
+        await insert_test_data(other_owner_notes)
+
+        suggested_titles = await note_repository.search_titles(
+            owner_id=owner_id,
+            fragment="weekly rep",
+            similarity_threshold=0.3,
+            limit=10,
+        )
+
+        # prefix match goes first, then similar titles
+        assert [note.title for note in suggested_titles] == [
+            "Weekly report",
+            "Weakly reprot",
+        ]
+
+        # LIKE wildcards in fragment are matched literally
+        suggested_titles = await note_repository.search_titles(
+            owner_id=owner_id, fragment="100%", similarity_threshold=0.9, limit=10
+        )
+        assert [note.title for note in suggested_titles] == ["100% done_list"]
+
     async def test_get_one_by_id(
         self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
     ):
@@ -81,6 +256,43 @@ class TestNoteRepository:
         assert exsp_note_attrs[0]["content"] == note.content
         assert exsp_note_attrs[0]["owner_id"] == note.owner_id
 
+    async def test_get_owner_version(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_note_owner_id = uuid.uuid4()
+        exp_notes_orm, _ = expected_data_with(owner_id=exp_note_owner_id, amount=2)
+        await insert_test_data(exp_notes_orm)
+
+        version_before = await note_repository.get_owner_version(
+            owner_id=exp_note_owner_id
+        )
+        await note_repository.delete_one(note=exp_notes_orm[0])
+        version_after_delete = await note_repository.get_owner_version(
+            owner_id=exp_note_owner_id
+        )
+        # maintenance writes keep note versions, so owner`s version is kept too
+        async with note_repository.db.async_engine.begin() as conn:
+            await conn.execute(
+                text("UPDATE notes SET content = content WHERE owner_id = :owner_id"),
+                {"owner_id": exp_note_owner_id},
+            )
+        version_after_recompress = await note_repository.get_owner_version(
+            owner_id=exp_note_owner_id
+        )
+        await note_repository.update_by_id(
+            note_id=exp_notes_orm[1].id, values={"title": "changed title"}
+        )
+        version_after_update = await note_repository.get_owner_version(
+            owner_id=exp_note_owner_id
+        )
+
+        assert await note_repository.get_owner_version(owner_id=uuid.uuid4()) == 0
+        assert version_before < version_after_delete
+        assert version_after_recompress == version_after_delete
+        assert version_after_delete < version_after_update
+        # the remaining note is not changed by deletion of the other one
+        assert await note_repository.get_version(note_id=exp_notes_orm[1].id) == 1
+
     async def test_get_one_by_id_unexists(self, note_repository: "NoteRepository"):
         expected_note_id = uuid.uuid4()
         with pytest.raises(NoSuchRowError):
@@ -102,6 +314,96 @@ class TestNoteRepository:
         assert created_note.content == exp_note_attrs[0]["content"]
         assert created_note.owner_id == exp_note_attrs[0]["owner_id"]
 
+    async def test_create_one_title_exists_for_owner(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_note_orm, exp_note_attrs = expected_data_with(amount=1)
+        await insert_test_data(exp_note_orm)
+        same_title = exp_note_attrs[0]["title"]
+
+        with pytest.raises(RowAlreadyExistsError):
+            await note_repository.create_one(
+                note=Note(
+                    title=same_title,
+                    content="# other md",
+                    owner_id=exp_note_attrs[0]["owner_id"],
+                )
+            )
+
+        # the same title is allowed for another owner
+        other_owner_note_id = await note_repository.create_one(
+            note=Note(title=same_title, content="# other md", owner_id=uuid.uuid4())
+        )
+        assert isinstance(other_owner_note_id, uuid.UUID)
+
+    async def test_create_many(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_note_orm, exp_note_attrs = expected_data_with(amount=1)
+        await insert_test_data(exp_note_orm)
+        owner_id = exp_note_attrs[0]["owner_id"]
+
+        inserted_titles = await note_repository.create_many(
+            notes=[
+                Note(title="imported 1", content="# md", owner_id=owner_id),
+                Note(
+                    title=exp_note_attrs[0]["title"], content="# md", owner_id=owner_id
+                ),
+                Note(title="imported 2", content="# md", owner_id=owner_id),
+            ]
+        )
+
+        assert sorted(inserted_titles) == ["imported 1", "imported 2"]
+        notes = await note_repository.filter_by(
+            specification=NotesForOwnerSpecification(owner_id=owner_id)
+        )
+        assert len(notes) == 3
+
+    async def test_apply_batch(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        owner_id = uuid.uuid4()
+        exp_notes_orm, exp_notes_attrs = expected_data_with(owner_id=owner_id, amount=3)
+        await insert_test_data(exp_notes_orm)
+        updated_attrs, taken_attrs, deleted_attrs = exp_notes_attrs
+        missing_note_id = uuid.uuid4()
+
+        def updated_note(note_id: uuid.UUID, **values) -> dict:
+            return {
+                "id": note_id,
+                "title": None,
+                "content": None,
+                "owner_id": None,
+            } | values
+
+        batch_result = await note_repository.apply_batch(
+            new_notes=[
+                # title of the note deleted in the same batch is free
+                Note(title=deleted_attrs["title"], content="# new", owner_id=owner_id),
+                Note(title=taken_attrs["title"], content="# new", owner_id=owner_id),
+            ],
+            updated_notes=[
+                updated_note(updated_attrs["id"], content="# updated"),
+                updated_note(taken_attrs["id"], title=updated_attrs["title"]),
+                updated_note(missing_note_id, title="missing"),
+            ],
+            deleted_note_ids=[deleted_attrs["id"], missing_note_id],
+        )
+
+        assert batch_result.deleted_ids == [deleted_attrs["id"]]
+        assert [row.title for row in batch_result.created] == [deleted_attrs["title"]]
+        update_statuses = {
+            row.id: (row.updated, row.note_exists) for row in batch_result.updated
+        }
+        assert update_statuses == {
+            updated_attrs["id"]: (True, True),
+            taken_attrs["id"]: (False, True),
+            missing_note_id: (False, False),
+        }
+        updated = await note_repository.get_one_by_id(note_id=updated_attrs["id"])
+        assert updated.content == "# updated"
+        assert updated.title == updated_attrs["title"]
+
     @pytest.mark.parametrize(
         ("title", "content", "owner_id"),
         (
@@ -139,6 +441,430 @@ class TestNoteRepository:
         assert updated_note.content == content or exp_note_attrs[0]["content"]
         assert updated_note.owner_id == owner_id or exp_note_attrs[0]["owner_id"]
 
+    async def test_update_one_title_exists_for_owner(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_notes_orm, exp_notes_attrs = expected_data_with(
+            owner_id=uuid.uuid4(), amount=2
+        )
+        await insert_test_data(exp_notes_orm)
+        note_on_update = await note_repository.get_one_by_id(
+            note_id=exp_notes_attrs[0]["id"]
+        )
+        note_on_update.title = exp_notes_attrs[1]["title"]
+
+        with pytest.raises(RowAlreadyExistsError):
+            await note_repository.update_one(note=note_on_update)
+
+    async def test_updated_at_is_maintained(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_notes_orm, _ = expected_data_with(amount=2)
+        for note in exp_notes_orm:
+            note.updated_at = datetime(2000, 1, 1)
+        await insert_test_data(exp_notes_orm)
+        updated_note, rendered_note = [
+            await note_repository.get_one_by_id(note_id=note.id)
+            for note in exp_notes_orm
+        ]
+        updated_at_before = (updated_note.updated_at, rendered_note.updated_at)
+
+        updated_note.content = "# updated md"
+        await note_repository.update_one(note=updated_note)
+        await note_repository.update_rendered_bodies(
+            rendered_bodies=RenderedBodies(
+                contents={rendered_note.body_hash: "<h1>rendered</h1>"},
+                renderer_version=2,
+            )
+        )
+
+        updated_note = await note_repository.get_one_by_id(note_id=updated_note.id)
+        rendered_note = await note_repository.get_one_by_id(note_id=rendered_note.id)
+        assert updated_note.updated_at > updated_at_before[0]
+        # writes of rendered HTML are not modifications
+        assert rendered_note.updated_at == updated_at_before[1]
+
+    async def test_recompress_batch(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_notes_orm, _ = expected_data_with(amount=4)
+        for note in exp_notes_orm:
+            note.content = "# large md\n" * 1000
+            note.updated_at = datetime(2000, 1, 1)
+        # PostgreSQL does not compress small rows, there is nothing to rewrite
+        exp_notes_orm[-1].content = "# small md\n" * 100
+        set_compression = "ALTER TABLE notes ALTER COLUMN content SET COMPRESSION {}"
+        async with note_repository.db.async_engine.begin() as conn:
+            await conn.execute(text(set_compression.format("pglz")))
+        await insert_test_data(exp_notes_orm)
+        async with note_repository.db.async_engine.begin() as conn:
+            await conn.execute(text(set_compression.format("lz4")))
+
+        after_id, rewritten_total = None, 0
+        while True:
+            batch = await note_repository.recompress_batch(
+                after_id=after_id, batch_size=2, compression="lz4", min_bytes=1024
+            )
+            if batch.last_id is None:
+                break
+            after_id, rewritten_total = batch.last_id, rewritten_total + batch.rewritten
+
+        async with note_repository.db.async_engine.connect() as conn:
+            compressions = await conn.scalars(
+                text("SELECT pg_column_compression(content) FROM notes")
+            )
+            assert set(compressions.all()) == {"lz4", None}
+        assert rewritten_total == 3
+        # the next run has nothing left to rewrite
+        batch = await note_repository.recompress_batch(
+            after_id=None, batch_size=10, compression="lz4", min_bytes=1024
+        )
+        assert batch.rewritten == 0
+        for note in exp_notes_orm:
+            recompressed_note = await note_repository.get_one_by_id(note_id=note.id)
+            assert recompressed_note.content == note.content
+            assert recompressed_note.updated_at == note.updated_at
+
+    async def test_recompress_bodies_batch(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_notes_orm, _ = expected_data_with(amount=3)
+        for i, note in enumerate(exp_notes_orm):
+            note.content = f"# large md {i}\n" * 1000
+        await insert_test_data(exp_notes_orm)
+        contents_html = {
+            content_hash(note.content): f"<h1>large html {i}</h1>\n" * 1000
+            for i, note in enumerate(exp_notes_orm)
+        }
+        set_compression = (
+            "ALTER TABLE note_bodies ALTER COLUMN content_html SET COMPRESSION {}"
+        )
+        async with note_repository.db.async_engine.begin() as conn:
+            await conn.execute(text(set_compression.format("pglz")))
+        await note_repository.update_rendered_bodies(
+            rendered_bodies=RenderedBodies(contents=contents_html, renderer_version=1)
+        )
+        async with note_repository.db.async_engine.begin() as conn:
+            await conn.execute(text(set_compression.format("lz4")))
+
+        after_hash, rewritten_total = None, 0
+        while True:
+            batch = await note_repository.recompress_bodies_batch(
+                after_hash=after_hash, batch_size=2, compression="lz4", min_bytes=1024
+            )
+            if batch.last_hash is None:
+                break
+            after_hash = batch.last_hash
+            rewritten_total += batch.rewritten
+
+        async with note_repository.db.async_engine.connect() as conn:
+            compressions = await conn.scalars(
+                text(
+                    "SELECT pg_column_compression(content_html) FROM note_bodies "
+                    "WHERE content_html IS NOT NULL"
+                )
+            )
+            assert set(compressions.all()) == {"lz4"}
+        assert rewritten_total == 3
+        for note in exp_notes_orm:
+            recompressed_note = await note_repository.get_one_by_id(note_id=note.id)
+            assert (
+                recompressed_note.body.content_html
+                == contents_html[content_hash(note.content)]
+            )
+
+    async def test_update_rendered_bodies(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_notes_orm, _ = expected_data_with(amount=2)
+        outdated_note, up_to_date_note = exp_notes_orm
+        await insert_test_data(exp_notes_orm)
+        await note_repository.update_rendered_bodies(
+            rendered_bodies=RenderedBodies(
+                contents={content_hash(up_to_date_note.content): "<p>up to date</p>"},
+                renderer_version=2,
+            )
+        )
+
+        await note_repository.update_rendered_bodies(
+            rendered_bodies=RenderedBodies(
+                contents={
+                    content_hash(outdated_note.content): "<h2>rendered</h2>",
+                    content_hash(up_to_date_note.content): "<h2>stale render</h2>",
+                },
+                renderer_version=2,
+            )
+        )
+
+        rendered_note = await note_repository.get_one_by_id(note_id=outdated_note.id)
+        assert rendered_note.body.content_html == "<h2>rendered</h2>"
+        assert rendered_note.body.renderer_version == 2
+        skipped_note = await note_repository.get_one_by_id(note_id=up_to_date_note.id)
+        assert skipped_note.body.content_html == "<p>up to date</p>"
+
+    async def test_note_bodies_are_shared(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_notes_orm, _ = expected_data_with(amount=3)
+        first_note, second_note, other_note = exp_notes_orm
+        first_note.content = second_note.content = "# shared md"
+        await insert_test_data(exp_notes_orm)
+
+        async def ref_counts() -> dict[str, int]:
+            async with note_repository.db.async_engine.connect() as conn:
+                rows = await conn.execute(
+                    text("SELECT hash, ref_count FROM note_bodies")
+                )
+                return dict(rows.all())
+
+        shared_hash = content_hash("# shared md")
+        assert await ref_counts() == {
+            shared_hash: 2,
+            content_hash(other_note.content): 1,
+        }
+
+        # body swapped between notes is kept
+        other_content = other_note.content
+        first_note = await note_repository.get_one_by_id(note_id=first_note.id)
+        first_note.content = other_content
+        other_note = await note_repository.get_one_by_id(note_id=other_note.id)
+        other_note.content = "# shared md"
+        await note_repository.update_one(note=first_note)
+        await note_repository.update_one(note=other_note)
+        assert await ref_counts() == {shared_hash: 2, content_hash(other_content): 1}
+
+        await note_repository.delete_one(note=other_note)
+        await note_repository.delete_one(note=second_note)
+        # the last note of the body is gone, so is the body
+        assert await ref_counts() == {content_hash(other_content): 1}
+
+    async def test_update_one_with_base(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_notes_orm, _ = expected_data_with(amount=1)
+        await insert_test_data(exp_notes_orm)
+        base_note = await note_repository.get_one_by_id(note_id=exp_notes_orm[0].id)
+        stale_note = await note_repository.get_one_by_id(note_id=exp_notes_orm[0].id)
+        base_updated_at = base_note.updated_at
+
+        base_note.content = "# patched md"
+        await note_repository.update_one(
+            note=base_note, base_updated_at=base_updated_at
+        )
+
+        # the next base is returned
+        assert base_note.updated_at > base_updated_at
+        stale_note.content = "# concurrently patched md"
+        with pytest.raises(StaleRowError):
+            await note_repository.update_one(
+                note=stale_note, base_updated_at=base_updated_at
+            )
+        saved_note = await note_repository.get_one_by_id(note_id=base_note.id)
+        assert saved_note.content == "# patched md"
+        assert saved_note.updated_at == base_note.updated_at
+
+    async def test_update_by_id(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_notes_orm, _ = expected_data_with(amount=1)
+        await insert_test_data(exp_notes_orm)
+        note_id, owner_id = exp_notes_orm[0].id, exp_notes_orm[0].owner_id
+        version = await note_repository.get_version(note_id=note_id)
+        new_owner_id = uuid.uuid4()
+
+        updated = await note_repository.update_by_id(
+            note_id=note_id,
+            values={"content": "# updated md", "owner_id": new_owner_id},
+            expected_version=version,
+        )
+
+        assert updated.version == version + 1
+        assert updated.owner_id == new_owner_id
+        assert updated.previous_owner_id == owner_id
+        with pytest.raises(StaleRowError):
+            await note_repository.update_by_id(
+                note_id=note_id,
+                values={"title": "concurrently updated title"},
+                expected_version=version,
+            )
+        with pytest.raises(NoSuchRowError):
+            await note_repository.update_by_id(
+                note_id=uuid.uuid4(), values={"title": "some title"}
+            )
+        saved_note = await note_repository.get_one_by_id(note_id=note_id)
+        assert saved_note.content == "# updated md"
+        assert saved_note.version == updated.version
+        assert (await note_repository.get_current_revision(note_id)).number == 1
+
+    async def test_concurrent_content_updates_are_numbered_apart(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_notes_orm, _ = expected_data_with(amount=1)
+        await insert_test_data(exp_notes_orm)
+        note_id = exp_notes_orm[0].id
+
+        # both writers wait for the lock of another session, so their statements
+        # start with the same snapshot and get the note lock one after another
+        async with note_repository.db.async_engine.connect() as conn:
+            await conn.execute(
+                text("SELECT id FROM notes WHERE id = :id FOR UPDATE"),
+                {"id": note_id},
+            )
+            updates = asyncio.gather(
+                note_repository.update_by_id(
+                    note_id=note_id, values={"content": "# first md"}
+                ),
+                note_repository.apply_batch(
+                    new_notes=[],
+                    updated_notes=[
+                        {
+                            "id": note_id,
+                            "title": None,
+                            "content": "# second md",
+                            "owner_id": None,
+                        }
+                    ],
+                    deleted_note_ids=[],
+                ),
+            )
+            await asyncio.sleep(0.5)
+            await conn.commit()
+            await updates
+
+        current_revision = await note_repository.get_current_revision(note_id=note_id)
+        revisions = await note_repository.get_revisions(
+            note_id=note_id, before=current_revision.number, limit=10
+        )
+        assert current_revision.number == 3
+        assert [revision.number for revision in revisions] == [2, 1]
+
+    async def test_tags(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        owner_id = uuid.uuid4()
+        exp_notes_orm, _ = expected_data_with(owner_id=owner_id, amount=3)
+        for note, tags in zip(exp_notes_orm, (["work", "urgent"], ["work"], [])):
+            note.tags = tags
+        await insert_test_data(exp_notes_orm)
+
+        work_notes = await note_repository.filter_by(
+            NotesWithTagsSpecification(owner_id=owner_id, tags=["work"])
+        )
+        urgent_work_notes = await note_repository.filter_by(
+            NotesWithTagsSpecification(owner_id=owner_id, tags=["urgent", "work"])
+        )
+        tag_counts = await note_repository.get_tag_counts(owner_id=owner_id, limit=10)
+
+        assert {note.id for note in work_notes} == {
+            exp_notes_orm[0].id,
+            exp_notes_orm[1].id,
+        }
+        assert [note.id for note in urgent_work_notes] == [exp_notes_orm[0].id]
+        assert [tuple(row) for row in tag_counts] == [("work", 2), ("urgent", 1)]
+
+        await note_repository.update_by_id(
+            note_id=exp_notes_orm[1].id, values={"tags": ["home"]}
+        )
+        await note_repository.delete_one(note=exp_notes_orm[0])
+
+        tag_counts = await note_repository.get_tag_counts(owner_id=owner_id, limit=10)
+        assert [tuple(row) for row in tag_counts] == [("home", 1)]
+
+    async def test_filter_by_sorted_specification(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        owner_id = uuid.uuid4()
+        exp_notes_orm, _ = expected_data_with(owner_id=owner_id, amount=4)
+        for note, (title, content) in zip(
+            exp_notes_orm,
+            (
+                ("Work: plan", "# short"),
+                ("Work: log", "# a bit longer content"),
+                ("Home", "# the longest content of all notes"),
+                ("Work_ notes", "#"),
+            ),
+        ):
+            note.title, note.content = title, content
+        await insert_test_data(exp_notes_orm)
+
+        specification = SortedSpecification(
+            NotesForOwnerSpecification(owner_id=owner_id)
+            & (
+                NotesWithTitlePrefixSpecification(prefix="Work:")
+                | NotesWithContentLengthSpecification(min_length=30)
+            )
+            & ~NotesWithContentLengthSpecification(max_length=10),
+            order_by=[NoteSort(field=NoteSortField.CONTENT_LENGTH, descending=True)],
+            limit=2,
+        )
+        found_notes = await note_repository.filter_by(specification)
+
+        assert [note.title for note in found_notes] == ["Home", "Work: log"]
+
+    async def test_revisions(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_notes_orm, _ = expected_data_with(amount=1)
+        note_id = exp_notes_orm[0].id
+        contents = [
+            "".join(f"line {line}\n" for line in range(i, i + 50))
+            for i in range(REVISION_SNAPSHOT_INTERVAL * 2)
+        ]
+        exp_notes_orm[0].content = contents[0]
+        await insert_test_data(exp_notes_orm)
+
+        for i, content in enumerate(contents[1:], start=1):
+            if i % 2:
+                note = await note_repository.get_one_by_id(note_id=note_id)
+                note.content = content
+                await note_repository.update_one(note=note)
+            else:
+                await note_repository.apply_batch(
+                    new_notes=[],
+                    updated_notes=[
+                        {
+                            "id": note_id,
+                            "title": None,
+                            "content": content,
+                            "owner_id": None,
+                        }
+                    ],
+                    deleted_note_ids=[],
+                )
+        # title changes are not revisions
+        note = await note_repository.get_one_by_id(note_id=note_id)
+        note.title = "renamed"
+        await note_repository.update_one(note=note)
+
+        current_revision = await note_repository.get_current_revision(note_id=note_id)
+        assert current_revision.number == len(contents)
+        for number, content in enumerate(contents, start=1):
+            assert content == await note_repository.get_revision_content(
+                note_id=note_id, number=number
+            )
+        async with note_repository.db.async_engine.connect() as conn:
+            snapshots = await conn.scalars(
+                text(
+                    "SELECT number FROM note_revisions "
+                    "WHERE snapshot IS NOT NULL ORDER BY number"
+                )
+            )
+            # the rest of revisions are deltas, as they are much shorter
+            assert snapshots.all() == [REVISION_SNAPSHOT_INTERVAL]
+
+        revisions = await note_repository.get_revisions(
+            note_id=note_id, before=4, limit=10
+        )
+        assert [revision.number for revision in revisions] == [3, 2, 1]
+        with pytest.raises(NoSuchRowError):
+            await note_repository.get_revision_content(
+                note_id=note_id, number=len(contents) + 1
+            )
+
+        await note_repository.delete_one(note=note)
+        with pytest.raises(NoSuchRowError):
+            await note_repository.get_current_revision(note_id=note_id)
+
     async def test_delete_one(
         self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
     ):
@@ -150,17 +876,108 @@ class TestNoteRepository:
 
         with pytest.raises(NoSuchRowError):
             _ = await note_repository.get_one_by_id(note_id=exp_note_id)
+        [tombstone] = await note_repository.get_tombstones(
+            owner_id=exp_note_orm[0].owner_id, settle_seconds=0, limit=10
+        )
+        assert tombstone.id == exp_note_id
 
-    async def test_delete_all(
+    async def test_get_changes(
         self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
     ):
         exp_note_owner_id = uuid.uuid4()
-        exp_notes_orm, _ = expected_data_with(owner_id=exp_note_owner_id, amount=3)
-        exp_notes_orm_ids = [note.id for note in exp_notes_orm]
+        other_owner_id = uuid.uuid4()
+        exp_notes_orm, _ = expected_data_with(owner_id=exp_note_owner_id, amount=5)
         await insert_test_data(exp_notes_orm)
+        changed_note, deleted_note, moved_note, batch_moved_note, _ = exp_notes_orm
+        await note_repository.delete_one(note=deleted_note)
+        changed_note.title = "changed title"
+        await note_repository.update_one(note=changed_note)
+        # moved notes are deleted for the previous owner
+        await note_repository.update_by_id(
+            note_id=moved_note.id, values={"owner_id": other_owner_id}
+        )
+        await note_repository.apply_batch(
+            new_notes=[],
+            updated_notes=[
+                {
+                    "id": batch_moved_note.id,
+                    "title": None,
+                    "content": None,
+                    "owner_id": other_owner_id,
+                }
+            ],
+            deleted_note_ids=[],
+        )
 
-        await note_repository.delete_all(exp_notes_orm_ids)
+        changed_notes = await note_repository.filter_by(
+            specification=NoteChangesSpecification(
+                owner_id=exp_note_owner_id, settle_seconds=0
+            ),
+            page=KeysetPage(limit=10, order_by=NoteOrderingField.UPDATED_AT),
+        )
+        tombstones = await note_repository.get_tombstones(
+            owner_id=exp_note_owner_id, settle_seconds=0, limit=10
+        )
+
+        # the updated note is the last changed one
+        assert [note.id for note in changed_notes][-1] == changed_note.id
+        assert deleted_note.id not in {note.id for note in changed_notes}
+        assert [tombstone.id for tombstone in tombstones] == [
+            deleted_note.id,
+            moved_note.id,
+            batch_moved_note.id,
+        ]
+        assert (
+            await note_repository.get_tombstones(
+                owner_id=other_owner_id, settle_seconds=0, limit=10
+            )
+            == []
+        )
+
+        # moved back, the note is alive for the owner and gone for the other one
+        await note_repository.update_by_id(
+            note_id=moved_note.id, values={"owner_id": exp_note_owner_id}
+        )
+        tombstones = await note_repository.get_tombstones(
+            owner_id=exp_note_owner_id, settle_seconds=0, limit=10
+        )
+        other_owner_tombstones = await note_repository.get_tombstones(
+            owner_id=other_owner_id, settle_seconds=0, limit=10
+        )
+        assert [tombstone.id for tombstone in tombstones] == [
+            deleted_note.id,
+            batch_moved_note.id,
+        ]
+        assert [tombstone.id for tombstone in other_owner_tombstones] == [moved_note.id]
+        # recent changes are not returned until they settle
+        assert (
+            await note_repository.get_tombstones(
+                owner_id=exp_note_owner_id, settle_seconds=60, limit=10
+            )
+            == []
+        )
+
+    async def test_delete_batch_by_owner_id(
+        self, expected_data_with, insert_test_data, note_repository: "NoteRepository"
+    ):
+        exp_note_owner_id = uuid.uuid4()
+        exp_notes_orm, _ = expected_data_with(owner_id=exp_note_owner_id, amount=3)
+        other_owner_notes_orm, _ = expected_data_with(amount=2)
+        await insert_test_data(exp_notes_orm + other_owner_notes_orm)
+
+        deleted_amounts = [
+            await note_repository.delete_batch_by_owner_id(
+                owner_id=exp_note_owner_id, batch_size=2
+            )
+            for _ in range(3)
+        ]
+
+        assert deleted_amounts == [2, 1, 0]
 
         specificatrion = NotesForOwnerSpecification(owner_id=exp_note_owner_id)
         notes = await note_repository.filter_by(specification=specificatrion)
         assert notes == []
+        other_owner_note = await note_repository.get_one_by_id(
+            note_id=other_owner_notes_orm[0].id
+        )
+        assert other_owner_note.owner_id == other_owner_notes_orm[0].owner_id
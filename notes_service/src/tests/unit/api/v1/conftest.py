@@ -14,7 +14,12 @@ if TYPE_CHECKING:
 @pytest.fixture(scope="module")
 def mock_note_service(container) -> Generator["NoteService", None, None]:
     origin_provider = container.note_service
-    container.note_service.override(mock.Mock())
+    container.note_service.override(
+        mock.Mock(
+            get_owner_notes_etag=mock.AsyncMock(return_value='"owner-notes-etag"'),
+            note_etag=mock.Mock(return_value='"note-etag"'),
+        )
+    )
     yield container.note_service()
     origin_provider.reset_override()
 
@@ -44,6 +49,7 @@ def expected_notes_sch_with() -> Callable:
                 owner_id=owner_id or uuid.uuid4(),
                 created_at=datetime.now(),
                 updated_at=datetime.now(),
+                version=1,
             )
 
         notes_sch = []
@@ -56,6 +62,7 @@ def expected_notes_sch_with() -> Callable:
                     owner_id=owner_id or uuid.uuid4(),
                     created_at=datetime.now(),
                     updated_at=datetime.now(),
+                    version=1,
                 )
             )
         return notes_sch
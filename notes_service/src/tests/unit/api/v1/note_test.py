@@ -1,9 +1,49 @@
+import json
 import uuid
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from unittest import mock
 
 import pytest
 
-from src.exceptions.service import NoteNotFoundError, NoteAlreadyExistsError
+from src.core.settings import (
+    MAX_NOTES_BATCH_OPERATIONS,
+    DEFAULT_NOTES_PAGE_SIZE,
+    MAX_NOTES_PAGE_SIZE,
+    DEFAULT_TITLE_SUGGESTIONS_AMOUNT,
+    MAX_TITLE_SUGGESTIONS_AMOUNT,
+    DEFAULT_REVISIONS_PAGE_SIZE,
+    MAX_NOTE_TAGS,
+)
+from src.repositories.pagination import NoteOrderingField
+from src.schemas.note import (
+    NotePageShema,
+    NoteImportResultShema,
+    NoteChangesShema,
+    NoteTombstoneShema,
+    NoteBatchShema,
+    NoteBatchResultShema,
+    NoteBatchItemResultShema,
+    NoteBatchItemStatus,
+    NoteSummaryShema,
+    NoteSummaryPageShema,
+    NoteTagCountShema,
+    NoteSearchPageShema,
+    NoteSearchResultShema,
+    NoteTitleSuggestionShema,
+    NoteRevisionShema,
+    NoteRevisionPageShema,
+    NoteRevisionContentShema,
+    NoteContentPatchResultShema,
+)
+from src.exceptions.service import (
+    NoteNotFoundError,
+    NoteAlreadyExistsError,
+    InvalidCursorError,
+    NoteRevisionNotFoundError,
+    NoteVersionConflictError,
+    InvalidContentPatchError,
+)
 
 
 @pytest.mark.parametrize(
@@ -15,16 +55,22 @@ from src.exceptions.service import NoteNotFoundError, NoteAlreadyExistsError
 )
 def test_get_all(md_content_format, mock_note_service, expected_notes_sch_with, client):
     expected_notes = expected_notes_sch_with(amount=10)
-    mock_note_service.get_all = mock.AsyncMock(return_value=expected_notes)
+    mock_note_service.get_all = mock.AsyncMock(
+        return_value=NotePageShema(items=expected_notes, next_cursor="next")
+    )
 
     response = client.get("/note/", params={"md_content_format": md_content_format})
 
     assert response.status_code == 200
     mock_note_service.get_all.assert_awaited_once_with(
-        md_content_format=md_content_format
+        limit=DEFAULT_NOTES_PAGE_SIZE,
+        cursor=None,
+        order_by=NoteOrderingField.CREATED_AT,
+        md_content_format=md_content_format,
     )
 
-    for exp_note, res_note in zip(expected_notes, response.json()):
+    assert response.json()["next_cursor"] == "next"
+    for exp_note, res_note in zip(expected_notes, response.json()["items"]):
         assert exp_note.id == uuid.UUID(res_note["id"])
         assert exp_note.title == res_note["title"]
         assert exp_note.content == res_note["content"]
@@ -39,15 +85,57 @@ def test_get_all(md_content_format, mock_note_service, expected_notes_sch_with,
     ),
 )
 def test_get_all_empty(md_content_format, mock_note_service, client):
-    mock_note_service.get_all = mock.AsyncMock(return_value=[])
+    mock_note_service.get_all = mock.AsyncMock(return_value=NotePageShema(items=[]))
 
     response = client.get("/note/", params={"md_content_format": md_content_format})
 
     assert response.status_code == 200
     mock_note_service.get_all.assert_awaited_once_with(
-        md_content_format=md_content_format
+        limit=DEFAULT_NOTES_PAGE_SIZE,
+        cursor=None,
+        order_by=NoteOrderingField.CREATED_AT,
+        md_content_format=md_content_format,
     )
-    assert response.json() == []
+    assert response.json() == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.parametrize(
+    ("limit", "cursor", "order_by"),
+    (
+        (10, "some-cursor", NoteOrderingField.CREATED_AT),
+        (1, "another-cursor", NoteOrderingField.UPDATED_AT),
+    ),
+)
+def test_get_all_pagination_params(limit, cursor, order_by, mock_note_service, client):
+    mock_note_service.get_all = mock.AsyncMock(return_value=NotePageShema(items=[]))
+
+    response = client.get(
+        "/note/", params={"limit": limit, "cursor": cursor, "order_by": order_by}
+    )
+
+    assert response.status_code == 200
+    mock_note_service.get_all.assert_awaited_once_with(
+        limit=limit, cursor=cursor, order_by=order_by, md_content_format=False
+    )
+
+
+@pytest.mark.parametrize(("limit",), ((0,), (MAX_NOTES_PAGE_SIZE + 1,)))
+def test_get_all_invalid_limit(limit, mock_note_service, client):
+    mock_note_service.get_all = mock.AsyncMock()
+
+    response = client.get("/note/", params={"limit": limit})
+
+    assert response.status_code == 422
+    mock_note_service.get_all.assert_not_awaited()
+
+
+def test_get_all_invalid_cursor(mock_note_service, client):
+    mock_note_service.get_all = mock.AsyncMock(side_effect=InvalidCursorError("..."))
+
+    response = client.get("/note/", params={"cursor": "broken"})
+
+    assert response.status_code == 400
+    assert "detail" in response.json()
 
 
 @pytest.mark.parametrize(
@@ -61,7 +149,9 @@ def test_get_all_by_owner_id(
     owner_id, md_content_format, mock_note_service, expected_notes_sch_with, client
 ):
     expected_notes = expected_notes_sch_with(owner_id=owner_id, amount=5)
-    mock_note_service.get_all_by_owner_id = mock.AsyncMock(return_value=expected_notes)
+    mock_note_service.get_all_by_owner_id = mock.AsyncMock(
+        return_value=NotePageShema(items=expected_notes)
+    )
 
     response = client.get(
         f"/note/by-owner-id/{owner_id.hex}",
@@ -70,10 +160,15 @@ def test_get_all_by_owner_id(
 
     assert response.status_code == 200
     mock_note_service.get_all_by_owner_id.assert_awaited_once_with(
-        owner_id=owner_id, md_content_format=md_content_format
+        owner_id=owner_id,
+        limit=DEFAULT_NOTES_PAGE_SIZE,
+        cursor=None,
+        order_by=NoteOrderingField.CREATED_AT,
+        md_content_format=md_content_format,
+        tags=None,
     )
 
-    for exp_note, res_note in zip(expected_notes, response.json()):
+    for exp_note, res_note in zip(expected_notes, response.json()["items"]):
         assert exp_note.id == uuid.UUID(res_note["id"])
         assert exp_note.title == res_note["title"]
         assert exp_note.content == res_note["content"]
@@ -90,7 +185,9 @@ def test_get_all_by_owner_id(
 def test_get_all_by_owner_id_empty(
     owner_id, md_content_format, mock_note_service, client
 ):
-    mock_note_service.get_all_by_owner_id = mock.AsyncMock(return_value=[])
+    mock_note_service.get_all_by_owner_id = mock.AsyncMock(
+        return_value=NotePageShema(items=[])
+    )
 
     response = client.get(
         f"/note/by-owner-id/{owner_id.hex}",
@@ -99,9 +196,460 @@ def test_get_all_by_owner_id_empty(
 
     assert response.status_code == 200
     mock_note_service.get_all_by_owner_id.assert_awaited_once_with(
-        owner_id=owner_id, md_content_format=md_content_format
+        owner_id=owner_id,
+        limit=DEFAULT_NOTES_PAGE_SIZE,
+        cursor=None,
+        order_by=NoteOrderingField.CREATED_AT,
+        md_content_format=md_content_format,
+        tags=None,
+    )
+    assert response.json() == {"items": [], "next_cursor": None}
+
+
+def test_get_all_by_owner_id_invalid_cursor(mock_note_service, client):
+    mock_note_service.get_all_by_owner_id = mock.AsyncMock(
+        side_effect=InvalidCursorError("...")
+    )
+
+    response = client.get(
+        f"/note/by-owner-id/{uuid.uuid4().hex}", params={"cursor": "broken"}
+    )
+
+    assert response.status_code == 400
+    assert "detail" in response.json()
+
+
+def test_get_summaries(mock_note_service, client):
+    expected_summary = NoteSummaryShema(
+        id=uuid.uuid4(),
+        title="Shopping list",
+        owner_id=uuid.uuid4(),
+        tags=["shopping"],
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+    mock_note_service.get_summaries = mock.AsyncMock(
+        return_value=NoteSummaryPageShema(items=[expected_summary], next_cursor="next")
+    )
+
+    response = client.get(
+        "/note/summaries",
+        params={"limit": 1, "order_by": NoteOrderingField.UPDATED_AT},
+    )
+
+    assert response.status_code == 200
+    mock_note_service.get_summaries.assert_awaited_once_with(
+        limit=1, cursor=None, order_by=NoteOrderingField.UPDATED_AT
+    )
+    assert response.json()["next_cursor"] == "next"
+    [res_note] = response.json()["items"]
+    assert uuid.UUID(res_note["id"]) == expected_summary.id
+    assert res_note["title"] == expected_summary.title
+    assert "content" not in res_note
+
+
+def test_get_summaries_by_owner_id(mock_note_service, client):
+    owner_id = uuid.uuid4()
+    mock_note_service.get_summaries_by_owner_id = mock.AsyncMock(
+        return_value=NoteSummaryPageShema(items=[])
+    )
+
+    response = client.get(f"/note/summaries/by-owner-id/{owner_id.hex}")
+
+    assert response.status_code == 200
+    mock_note_service.get_summaries_by_owner_id.assert_awaited_once_with(
+        owner_id=owner_id,
+        limit=DEFAULT_NOTES_PAGE_SIZE,
+        cursor=None,
+        order_by=NoteOrderingField.CREATED_AT,
+        tags=None,
+    )
+    assert response.json() == {"items": [], "next_cursor": None}
+
+
+def test_get_summaries_by_owner_id_with_tags(mock_note_service, client):
+    owner_id = uuid.uuid4()
+    mock_note_service.get_summaries_by_owner_id = mock.AsyncMock(
+        return_value=NoteSummaryPageShema(items=[])
+    )
+
+    response = client.get(
+        f"/note/summaries/by-owner-id/{owner_id.hex}",
+        params={"tags": [" work ", "urgent", "work"]},
+    )
+
+    assert response.status_code == 200
+    assert mock_note_service.get_summaries_by_owner_id.call_args.kwargs["tags"] == [
+        "work",
+        "urgent",
+        "work",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("tags",),
+    (
+        (["  "],),
+        ([f"tag_{i}" for i in range(MAX_NOTE_TAGS + 1)],),
+    ),
+)
+def test_get_all_by_owner_id_invalid_tags(tags, mock_note_service, client):
+    mock_note_service.get_all_by_owner_id = mock.AsyncMock()
+
+    response = client.get(
+        f"/note/by-owner-id/{uuid.uuid4().hex}", params={"tags": tags}
+    )
+
+    assert response.status_code == 422
+    mock_note_service.get_all_by_owner_id.assert_not_awaited()
+
+
+def test_query_by_owner_id(mock_note_service, client):
+    owner_id = uuid.uuid4()
+    expected_summary = NoteSummaryShema(
+        id=uuid.uuid4(),
+        title="Work log",
+        owner_id=owner_id,
+        tags=["work"],
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+    mock_note_service.query_by_owner_id = mock.AsyncMock(
+        return_value=[expected_summary]
+    )
+
+    response = client.post(
+        f"/note/query/by-owner-id/{owner_id.hex}",
+        json={
+            "filter": {
+                "title_prefix": "Work",
+                "none_of": [{"updated_until": "2026-01-01T03:00:00+03:00"}],
+            },
+            "order_by": [{"field": "updated_at", "descending": True}],
+            "limit": 10,
+        },
+    )
+
+    assert response.status_code == 200
+    assert [uuid.UUID(item["id"]) for item in response.json()] == [expected_summary.id]
+    called_kwargs = mock_note_service.query_by_owner_id.call_args.kwargs
+    assert called_kwargs["owner_id"] == owner_id
+    note_query = called_kwargs["note_query"]
+    assert note_query.filter.title_prefix == "Work"
+    assert note_query.filter.none_of[0].updated_until == datetime(2026, 1, 1)
+    assert note_query.limit == 10
+
+
+@pytest.mark.parametrize(
+    ("note_query",),
+    (
+        ({"filter": {"any_of": [{"any_of": [{"any_of": [{"any_of": [{}]}]}]}]}},),
+        ({"filter": {"title_prefix": ""}},),
+        ({"order_by": [{"field": "content"}]},),
+        ({"limit": MAX_NOTES_PAGE_SIZE + 1},),
+    ),
+)
+def test_query_by_owner_id_invalid(note_query, mock_note_service, client):
+    mock_note_service.query_by_owner_id = mock.AsyncMock()
+
+    response = client.post(f"/note/query/by-owner-id/{uuid.uuid4()}", json=note_query)
+
+    assert response.status_code == 422
+    mock_note_service.query_by_owner_id.assert_not_awaited()
+
+
+def test_get_tag_counts(mock_note_service, client):
+    owner_id = uuid.uuid4()
+    tag_counts = [
+        NoteTagCountShema(tag="work", notes_amount=3),
+        NoteTagCountShema(tag="home", notes_amount=1),
+    ]
+    mock_note_service.get_tag_counts = mock.AsyncMock(return_value=tag_counts)
+
+    response = client.get(f"/note/tags/by-owner-id/{owner_id.hex}", params={"limit": 2})
+
+    assert response.status_code == 200
+    assert response.json() == [tag_count.model_dump() for tag_count in tag_counts]
+    mock_note_service.get_tag_counts.assert_awaited_once_with(
+        owner_id=owner_id, limit=2
+    )
+
+
+def test_get_summaries_by_owner_id_invalid_cursor(mock_note_service, client):
+    mock_note_service.get_summaries_by_owner_id = mock.AsyncMock(
+        side_effect=InvalidCursorError("...")
+    )
+
+    response = client.get(
+        f"/note/summaries/by-owner-id/{uuid.uuid4().hex}", params={"cursor": "broken"}
+    )
+
+    assert response.status_code == 400
+    assert "detail" in response.json()
+
+
+def test_get_changes(mock_note_service, expected_notes_sch_with, client):
+    owner_id = uuid.uuid4()
+    expected_notes = expected_notes_sch_with(owner_id=owner_id, amount=2)
+    tombstone = NoteTombstoneShema(id=uuid.uuid4(), deleted_at=datetime.now())
+    mock_note_service.get_changes = mock.AsyncMock(
+        return_value=NoteChangesShema(
+            notes=expected_notes,
+            deleted=[tombstone],
+            next_cursor="next",
+            has_more=False,
+        )
+    )
+
+    response = client.get(
+        "/note/changes", params={"owner_id": owner_id.hex, "since": "previous"}
+    )
+
+    assert response.status_code == 200
+    mock_note_service.get_changes.assert_awaited_once_with(
+        owner_id=owner_id,
+        since="previous",
+        limit=DEFAULT_NOTES_PAGE_SIZE,
+        md_content_format=False,
+    )
+    assert [uuid.UUID(note["id"]) for note in response.json()["notes"]] == [
+        note.id for note in expected_notes
+    ]
+    assert response.json()["deleted"][0]["id"] == str(tombstone.id)
+    assert response.json()["next_cursor"] == "next"
+
+
+def test_get_changes_invalid_cursor(mock_note_service, client):
+    mock_note_service.get_changes = mock.AsyncMock(
+        side_effect=InvalidCursorError("...")
+    )
+
+    response = client.get(
+        "/note/changes", params={"owner_id": uuid.uuid4().hex, "since": "broken"}
+    )
+
+    assert response.status_code == 400
+
+
+def test_export_by_owner_id(mock_note_service, expected_notes_sch_with, client):
+    owner_id = uuid.uuid4()
+    expected_notes = expected_notes_sch_with(owner_id=owner_id, amount=3)
+
+    async def export_chunks():
+        yield b"".join(
+            note.model_dump_json().encode() + b"\n" for note in expected_notes[:2]
+        )
+        yield expected_notes[2].model_dump_json().encode() + b"\n"
+
+    mock_note_service.export_by_owner_id = mock.Mock(return_value=export_chunks())
+
+    response = client.get(f"/note/export/by-owner-id/{owner_id.hex}")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    mock_note_service.export_by_owner_id.assert_called_once_with(owner_id=owner_id)
+    res_notes = [json.loads(line) for line in response.text.splitlines()]
+    assert [uuid.UUID(res_note["id"]) for res_note in res_notes] == [
+        note.id for note in expected_notes
+    ]
+
+
+def test_import_by_owner_id(mock_note_service, client):
+    owner_id = uuid.uuid4()
+    ndjson = b'{"title": "first", "content": "# md"}\n{"title": "second"}\n'
+    received_chunks = []
+
+    async def import_by_owner_id(owner_id, chunks):
+        async for chunk in chunks:
+            received_chunks.append(chunk)
+        return NoteImportResultShema(imported=1, invalid_lines=[2])
+
+    mock_note_service.import_by_owner_id = mock.AsyncMock(
+        side_effect=import_by_owner_id
+    )
+
+    response = client.post(
+        f"/note/import/by-owner-id/{owner_id.hex}",
+        content=ndjson,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert mock_note_service.import_by_owner_id.call_args.kwargs["owner_id"] == owner_id
+    assert b"".join(received_chunks) == ndjson
+    assert response.json() == {
+        "imported": 1,
+        "conflicting_titles": [],
+        "invalid_lines": [2],
+    }
+
+
+def test_apply_batch(mock_note_service, client):
+    owner_id, updated_note_id, deleted_note_id = (
+        uuid.uuid4(),
+        uuid.uuid4(),
+        uuid.uuid4(),
+    )
+    created_note_id = uuid.uuid4()
+    batch = {
+        "create": [{"title": "new", "content": "# new", "owner_id": owner_id.hex}],
+        "update": [{"id": updated_note_id.hex, "title": "renamed"}],
+        "delete": [deleted_note_id.hex],
+    }
+    mock_note_service.apply_batch = mock.AsyncMock(
+        return_value=NoteBatchResultShema(
+            created=[
+                NoteBatchItemResultShema(
+                    id=created_note_id, status=NoteBatchItemStatus.CREATED
+                )
+            ],
+            updated=[
+                NoteBatchItemResultShema(
+                    id=updated_note_id, status=NoteBatchItemStatus.CONFLICT
+                )
+            ],
+            deleted=[
+                NoteBatchItemResultShema(
+                    id=deleted_note_id, status=NoteBatchItemStatus.NOT_FOUND
+                )
+            ],
+        )
+    )
+
+    response = client.post("/note/batch/", json=batch)
+
+    assert response.status_code == 200
+    called_batch = mock_note_service.apply_batch.call_args.kwargs["batch"]
+    assert called_batch == NoteBatchShema.model_validate(batch)
+    assert response.json() == {
+        "created": [{"id": str(created_note_id), "status": "created"}],
+        "updated": [{"id": str(updated_note_id), "status": "conflict"}],
+        "deleted": [{"id": str(deleted_note_id), "status": "not_found"}],
+    }
+
+
+def test_apply_batch_conflict(mock_note_service, client):
+    mock_note_service.apply_batch = mock.AsyncMock(
+        side_effect=NoteAlreadyExistsError("...")
+    )
+
+    response = client.post("/note/batch/", json={"delete": [uuid.uuid4().hex]})
+
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize(
+    ("batch",),
+    (
+        (
+            {
+                "delete": [
+                    uuid.uuid4().hex for _ in range(MAX_NOTES_BATCH_OPERATIONS + 1)
+                ]
+            },
+        ),
+        ({"delete": [uuid.UUID(int=1).hex, uuid.UUID(int=1).hex]},),
+        (
+            {
+                "update": [
+                    {"id": uuid.UUID(int=1).hex, "title": "first"},
+                    {"id": uuid.UUID(int=1).hex, "title": "second"},
+                ]
+            },
+        ),
+    ),
+)
+def test_apply_batch_invalid(batch, mock_note_service, client):
+    mock_note_service.apply_batch = mock.AsyncMock()
+
+    response = client.post("/note/batch/", json=batch)
+
+    assert response.status_code == 422
+    mock_note_service.apply_batch.assert_not_awaited()
+
+
+def test_search(mock_note_service, client):
+    owner_id = uuid.uuid4()
+    found_note = NoteSearchResultShema(
+        id=uuid.uuid4(),
+        title="Daily routine",
+        owner_id=owner_id,
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        rank=0.5,
+        headline="<b>Running</b> and training",
+    )
+    mock_note_service.search = mock.AsyncMock(
+        return_value=NoteSearchPageShema(items=[found_note], next_offset=10)
     )
-    assert response.json() == []
+
+    response = client.get(
+        "/note/search",
+        params={"owner_id": owner_id.hex, "q": "running", "limit": 10},
+    )
+
+    assert response.status_code == 200
+    mock_note_service.search.assert_awaited_once_with(
+        owner_id=owner_id, query="running", limit=10, offset=0
+    )
+    assert response.json()["next_offset"] == 10
+    [res_note] = response.json()["items"]
+    assert uuid.UUID(res_note["id"]) == found_note.id
+    assert res_note["headline"] == found_note.headline
+    assert res_note["rank"] == found_note.rank
+
+
+@pytest.mark.parametrize(
+    ("params",),
+    (
+        ({"q": "running"},),
+        ({"owner_id": uuid.uuid4().hex},),
+        ({"owner_id": uuid.uuid4().hex, "q": ""},),
+        ({"owner_id": uuid.uuid4().hex, "q": "running", "offset": -1},),
+    ),
+)
+def test_search_invalid_params(params, mock_note_service, client):
+    mock_note_service.search = mock.AsyncMock()
+
+    response = client.get("/note/search", params=params)
+
+    assert response.status_code == 422
+    mock_note_service.search.assert_not_awaited()
+
+
+def test_suggest_titles(mock_note_service, client):
+    owner_id = uuid.uuid4()
+    suggestions = [
+        NoteTitleSuggestionShema(id=uuid.uuid4(), title="Daily routine", similarity=1),
+        NoteTitleSuggestionShema(id=uuid.uuid4(), title="Daly rutine", similarity=0.4),
+    ]
+    mock_note_service.suggest_titles = mock.AsyncMock(return_value=suggestions)
+
+    response = client.get(
+        "/note/typeahead", params={"owner_id": owner_id.hex, "q": "dail"}
+    )
+
+    assert response.status_code == 200
+    mock_note_service.suggest_titles.assert_awaited_once_with(
+        owner_id=owner_id, fragment="dail", limit=DEFAULT_TITLE_SUGGESTIONS_AMOUNT
+    )
+    assert [res_note["title"] for res_note in response.json()] == [
+        "Daily routine",
+        "Daly rutine",
+    ]
+
+
+@pytest.mark.parametrize(("limit",), ((0,), (MAX_TITLE_SUGGESTIONS_AMOUNT + 1,)))
+def test_suggest_titles_invalid_limit(limit, mock_note_service, client):
+    mock_note_service.suggest_titles = mock.AsyncMock()
+
+    response = client.get(
+        "/note/typeahead",
+        params={"owner_id": uuid.uuid4().hex, "q": "dail", "limit": limit},
+    )
+
+    assert response.status_code == 422
+    mock_note_service.suggest_titles.assert_not_awaited()
 
 
 @pytest.mark.parametrize(
@@ -127,6 +675,101 @@ def test_get_one_by_id(
     assert res_note["title"] == expected_note.title
     assert res_note["content"] == expected_note.content
     assert uuid.UUID(res_note["owner_id"]) == expected_note.owner_id
+    assert parsedate_to_datetime(response.headers["Last-Modified"]) == (
+        expected_note.updated_at.replace(microsecond=0, tzinfo=timezone.utc)
+    )
+
+
+@pytest.mark.parametrize(
+    ("if_none_match",),
+    (('"note-etag"',), ('W/"note-etag"',), ('"other", "note-etag"',), ("*",)),
+)
+def test_get_one_by_id_not_modified(if_none_match, mock_note_service, client):
+    note_id = uuid.uuid4()
+    mock_note_service.get_note_etag = mock.AsyncMock(return_value='"note-etag"')
+    mock_note_service.get_one_by_id = mock.AsyncMock()
+
+    response = client.get(
+        f"/note/by-id/{note_id.hex}", headers={"If-None-Match": if_none_match}
+    )
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"note-etag"'
+    mock_note_service.get_note_etag.assert_awaited_once_with(
+        note_id=note_id, md_content_format=False
+    )
+    mock_note_service.get_one_by_id.assert_not_awaited()
+
+
+def test_get_one_by_id_modified(mock_note_service, expected_notes_sch_with, client):
+    expected_note = expected_notes_sch_with(amount=1)
+    mock_note_service.get_note_etag = mock.AsyncMock(return_value='"new-etag"')
+    mock_note_service.get_one_by_id = mock.AsyncMock(return_value=expected_note)
+    mock_note_service.note_etag = mock.Mock(return_value='"new-etag"')
+
+    response = client.get(
+        f"/note/by-id/{expected_note.id.hex}",
+        params={"md_content_format": True},
+        headers={"If-None-Match": '"old-etag"'},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"new-etag"'
+    mock_note_service.note_etag.assert_called_once_with(
+        note_id=expected_note.id,
+        version=expected_note.version,
+        md_content_format=True,
+    )
+
+
+def test_get_one_by_id_not_modified_not_found(mock_note_service, client):
+    mock_note_service.get_note_etag = mock.AsyncMock(
+        side_effect=NoteNotFoundError("...")
+    )
+
+    response = client.get(
+        f"/note/by-id/{uuid.uuid4().hex}", headers={"If-None-Match": '"etag"'}
+    )
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize(
+    ("path",), (("/note/by-owner-id/{}",), ("/note/summaries/by-owner-id/{}",))
+)
+def test_owner_notes_not_modified(path, mock_note_service, client):
+    owner_id = uuid.uuid4()
+    mock_note_service.get_owner_notes_etag = mock.AsyncMock(return_value='"v1"')
+    mock_note_service.get_all_by_owner_id = mock.AsyncMock()
+    mock_note_service.get_summaries_by_owner_id = mock.AsyncMock()
+
+    response = client.get(
+        path.format(owner_id.hex),
+        params={"limit": 10},
+        headers={"If-None-Match": '"v1"'},
+    )
+
+    assert response.status_code == 304
+    mock_note_service.get_owner_notes_etag.assert_awaited_once_with(
+        owner_id=owner_id, variant=f"{path.format(owner_id.hex)}?limit=10"
+    )
+    mock_note_service.get_all_by_owner_id.assert_not_awaited()
+    mock_note_service.get_summaries_by_owner_id.assert_not_awaited()
+
+
+def test_owner_notes_modified(mock_note_service, client):
+    mock_note_service.get_owner_notes_etag = mock.AsyncMock(return_value='"v2"')
+    mock_note_service.get_all_by_owner_id = mock.AsyncMock(
+        return_value=NotePageShema(items=[])
+    )
+
+    response = client.get(
+        f"/note/by-owner-id/{uuid.uuid4().hex}", headers={"If-None-Match": '"v1"'}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"v2"'
+    mock_note_service.get_all_by_owner_id.assert_awaited_once()
 
 
 @pytest.mark.parametrize(
@@ -148,6 +791,72 @@ def test_get_one_by_id_not_found(id, md_content_format, mock_note_service, clien
     assert "detail" in response.json()
 
 
+def test_get_revisions(mock_note_service, client):
+    note_id = uuid.uuid4()
+    mock_note_service.get_revisions = mock.AsyncMock(
+        return_value=NoteRevisionPageShema(
+            items=[
+                NoteRevisionShema(number=number, created_at=datetime.now())
+                for number in (3, 2)
+            ],
+            next_before=2,
+        )
+    )
+
+    response = client.get(f"/note/by-id/{note_id}/revisions")
+
+    assert response.status_code == 200
+    mock_note_service.get_revisions.assert_awaited_once_with(
+        note_id=note_id, limit=DEFAULT_REVISIONS_PAGE_SIZE, before=None
+    )
+    assert [item["number"] for item in response.json()["items"]] == [3, 2]
+    assert response.json()["next_before"] == 2
+
+
+def test_get_revisions_note_not_found(mock_note_service, client):
+    mock_note_service.get_revisions = mock.AsyncMock(
+        side_effect=NoteNotFoundError("...")
+    )
+
+    response = client.get(
+        f"/note/by-id/{uuid.uuid4()}/revisions", params={"limit": 10, "before": 5}
+    )
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize(("md_content_format",), ((False,), (True,)))
+def test_get_revision(md_content_format, mock_note_service, client):
+    note_id = uuid.uuid4()
+    mock_note_service.get_revision = mock.AsyncMock(
+        return_value=NoteRevisionContentShema(
+            note_id=note_id, number=2, content="# second"
+        )
+    )
+
+    response = client.get(
+        f"/note/by-id/{note_id}/revisions/2",
+        params={"md_content_format": md_content_format},
+    )
+
+    assert response.status_code == 200
+    mock_note_service.get_revision.assert_awaited_once_with(
+        note_id=note_id, number=2, md_content_format=md_content_format
+    )
+    assert response.json()["content"] == "# second"
+
+
+def test_get_revision_not_found(mock_note_service, client):
+    mock_note_service.get_revision = mock.AsyncMock(
+        side_effect=NoteRevisionNotFoundError("...")
+    )
+
+    response = client.get(f"/note/by-id/{uuid.uuid4()}/revisions/7")
+
+    assert response.status_code == 404
+    assert "detail" in response.json()
+
+
 @pytest.mark.parametrize(
     ("title", "content", "owner_id"),
     (
@@ -171,6 +880,22 @@ def test_create_one_success(title, content, owner_id, mock_note_service, client)
     assert called_note_sch.owner_id == uuid.UUID(create_data["owner_id"])
 
 
+def test_create_one_tags_are_normalized(mock_note_service, client):
+    create_data = {
+        "title": "some title",
+        "content": "# some md content",
+        "owner_id": uuid.uuid4().hex,
+        "tags": [" work", "urgent ", "work"],
+    }
+    mock_note_service.create_one = mock.AsyncMock(return_value=uuid.uuid4())
+
+    response = client.post("/note/create/", json=create_data)
+
+    assert response.status_code == 201
+    called_note_sch = mock_note_service.create_one.call_args.kwargs["new_note"]
+    assert called_note_sch.tags == ["work", "urgent"]
+
+
 def test_create_one_already_exists(mock_note_service, client):
     create_data = {
         "title": "some title",
@@ -207,12 +932,18 @@ def test_update_one_success(id, title, content, owner_id, mock_note_service, cli
         "content": content,
         "owner_id": owner_id.hex if owner_id else None,
     }
-    mock_note_service.update_one = mock.AsyncMock(return_value=None)
+    mock_note_service.update_one = mock.AsyncMock(return_value=2)
+    mock_note_service.note_etag = mock.Mock(return_value='"2-etag"')
 
     response = client.patch(f"/note/update/{id}", json=update_data)
 
     assert response.status_code == 200
+    assert response.headers["ETag"] == '"2-etag"'
     mock_note_service.update_one.assert_awaited_once()
+    assert mock_note_service.update_one.call_args.kwargs["expected_version"] is None
+    mock_note_service.note_etag.assert_called_once_with(
+        note_id=id, version=2, md_content_format=False
+    )
 
     called_id = mock_note_service.update_one.call_args.kwargs["note_id"]
     assert called_id == id
@@ -229,6 +960,7 @@ def test_update_one_success(id, title, content, owner_id, mock_note_service, cli
     (
         (NoteNotFoundError("..."), 404),
         (NoteAlreadyExistsError("..."), 409),
+        (NoteVersionConflictError("..."), 412),
     ),
 )
 def test_update_one_failed(raised_exception, status_code, mock_note_service, client):
@@ -254,6 +986,123 @@ def test_update_one_failed(raised_exception, status_code, mock_note_service, cli
     assert called_note_sch.owner_id == uuid.UUID(update_data["owner_id"])
 
 
+@pytest.mark.parametrize(
+    ("if_match", "parsed_version", "expected_version"),
+    (
+        ('"3-etag"', 3, 3),
+        ("*", None, None),
+    ),
+)
+def test_update_one_if_match(
+    if_match, parsed_version, expected_version, mock_note_service, client
+):
+    note_id = uuid.uuid4()
+    mock_note_service.version_from_etag = mock.Mock(return_value=parsed_version)
+    mock_note_service.update_one = mock.AsyncMock(return_value=4)
+
+    response = client.patch(
+        f"/note/update/{note_id}",
+        json={"title": "edited_title"},
+        headers={"If-Match": if_match},
+    )
+
+    assert response.status_code == 200
+    assert (
+        mock_note_service.update_one.call_args.kwargs["expected_version"]
+        == expected_version
+    )
+
+
+def test_update_one_invalid_if_match(mock_note_service, client):
+    mock_note_service.version_from_etag = mock.Mock(return_value=None)
+    mock_note_service.update_one = mock.AsyncMock()
+
+    response = client.patch(
+        f"/note/update/{uuid.uuid4()}",
+        json={"title": "edited_title"},
+        headers={"If-Match": 'W/"weak-etag"'},
+    )
+
+    assert response.status_code == 412
+    mock_note_service.version_from_etag.assert_called_once_with('W/"weak-etag"')
+    mock_note_service.update_one.assert_not_awaited()
+
+
+def test_patch_content(mock_note_service, client):
+    note_id = uuid.uuid4()
+    new_updated_at = datetime(2026, 10, 17, 12, 0, 1)
+    mock_note_service.patch_content = mock.AsyncMock(
+        return_value=NoteContentPatchResultShema(updated_at=new_updated_at)
+    )
+
+    response = client.patch(
+        f"/note/update/{note_id}/content",
+        json={
+            "base_updated_at": "2026-10-17T12:00:00Z",
+            "edits": [
+                {"offset": 2, "delete": 5, "insert": "new title"},
+                {"offset": 20, "insert": "appended"},
+            ],
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"updated_at": new_updated_at.isoformat()}
+    called_kwargs = mock_note_service.patch_content.call_args.kwargs
+    assert called_kwargs["note_id"] == note_id
+    # timestamps of notes are naive UTC
+    assert called_kwargs["patch"].base_updated_at == datetime(2026, 10, 17, 12)
+    assert [
+        (edit.offset, edit.delete, edit.insert) for edit in called_kwargs["patch"].edits
+    ] == [(2, 5, "new title"), (20, 0, "appended")]
+
+
+@pytest.mark.parametrize(
+    ("raised_exception", "status_code"),
+    (
+        (NoteNotFoundError("..."), 404),
+        (NoteVersionConflictError("..."), 409),
+        (InvalidContentPatchError("..."), 422),
+    ),
+)
+def test_patch_content_failed(raised_exception, status_code, mock_note_service, client):
+    mock_note_service.patch_content = mock.AsyncMock(side_effect=raised_exception)
+
+    response = client.patch(
+        f"/note/update/{uuid.uuid4()}/content",
+        json={
+            "base_updated_at": "2026-10-17T12:00:00",
+            "edits": [{"offset": 0, "insert": "# "}],
+        },
+    )
+
+    assert response.status_code == status_code
+    assert "detail" in response.json()
+
+
+@pytest.mark.parametrize(
+    ("edits",),
+    (
+        ([],),
+        ([{"offset": -1, "insert": "x"}],),
+        # overlapping edits
+        ([{"offset": 0, "delete": 5}, {"offset": 3, "insert": "x"}],),
+        # edits out of order
+        ([{"offset": 10, "insert": "x"}, {"offset": 3, "insert": "x"}],),
+    ),
+)
+def test_patch_content_invalid(edits, mock_note_service, client):
+    mock_note_service.patch_content = mock.AsyncMock()
+
+    response = client.patch(
+        f"/note/update/{uuid.uuid4()}/content",
+        json={"base_updated_at": "2026-10-17T12:00:00", "edits": edits},
+    )
+
+    assert response.status_code == 422
+    mock_note_service.patch_content.assert_not_awaited()
+
+
 def test_delete_one_success(mock_note_service, client):
     note_on_delete_id = uuid.uuid4()
     mock_note_service.delete_one = mock.AsyncMock(return_value=None)
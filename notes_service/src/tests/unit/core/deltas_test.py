@@ -0,0 +1,53 @@
+import pytest
+
+from src.core.deltas import apply_delta, apply_edits, delta_size, make_delta
+
+
+@pytest.mark.parametrize(
+    ("source", "target"),
+    (
+        ("# title\n\nfirst\nsecond\n", "# title\n\nfirst\nchanged\nsecond\n"),
+        ("# title\n\nfirst\nsecond\n", "# title\n"),
+        ("", "# new note\n"),
+        ("# whole note\n", ""),
+        ("no trailing newline", "no trailing newline\nand one more line"),
+        ("# same\n", "# same\n"),
+    ),
+)
+def test_delta_round_trip(source, target):
+    assert apply_delta(source, make_delta(source, target)) == target
+
+
+def test_delta_keeps_unchanged_lines_out():
+    unchanged = "".join(f"line {i}\n" for i in range(100))
+    source = unchanged + "old tail\n"
+    target = unchanged + "new tail\n"
+
+    delta = make_delta(source, target)
+
+    assert delta == [100, -1, "new tail\n"]
+    assert delta_size(delta) < len(target) // 10
+
+
+def test_apply_edits():
+    source = "# title\n\nsome text\n"
+
+    assert (
+        apply_edits(
+            source, [(2, 5, "new title"), (9, 4, "other"), (len(source), 0, "!")]
+        )
+        == "# new title\n\nother text\n!"
+    )
+
+
+@pytest.mark.parametrize(
+    ("edits",),
+    (
+        ([(5, 1, ""), (2, 1, "")],),
+        ([(2, 4, ""), (4, 1, "")],),
+        ([(19, 2, "")],),
+    ),
+)
+def test_apply_edits_invalid(edits):
+    with pytest.raises(ValueError):
+        apply_edits("# title\n\nsome text\n", edits)
@@ -0,0 +1,116 @@
+import uuid
+from datetime import datetime
+from unittest import mock
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.core.note_cache import NoteCache
+from src.schemas.note import NoteCachedShema
+
+
+def create_note_cache() -> NoteCache:
+    redis = mock.Mock()
+    redis.r.register_script.side_effect = lambda script: mock.AsyncMock()
+    redis.r.get = mock.AsyncMock(return_value=None)
+    redis.r.set = mock.AsyncMock(return_value=True)
+    redis.r.delete = mock.AsyncMock()
+    return NoteCache(redis=redis, ttl=60, lock_timeout=1, lock_poll_interval=0)
+
+
+def create_cached_note() -> NoteCachedShema:
+    return NoteCachedShema(
+        id=uuid.uuid4(),
+        title="some title",
+        content="# some md",
+        content_html="<h1>some md</h1>",
+        options_fingerprint="1",
+        owner_id=uuid.uuid4(),
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        version=1,
+    )
+
+
+@pytest.mark.asyncio
+class TestNoteCache:
+    async def test_hit(self):
+        note_cache = create_note_cache()
+        cached_note = create_cached_note()
+        note_cache.redis.r.get.return_value = cached_note.model_dump_json()
+        load = mock.AsyncMock()
+
+        assert await note_cache.get_or_load(cached_note.id, load) == cached_note
+        load.assert_not_awaited()
+        note_cache.redis.r.set.assert_not_awaited()
+
+    async def test_miss_is_loaded_under_lock(self):
+        note_cache = create_note_cache()
+        loaded_note = create_cached_note()
+        load = mock.AsyncMock(return_value=loaded_note)
+
+        assert await note_cache.get_or_load(loaded_note.id, load) == loaded_note
+
+        load.assert_awaited_once()
+        lock_key, lock_token = note_cache.redis.r.set.await_args.args
+        assert lock_key == f"note_lock:{loaded_note.id}"
+        note_cache._store_if_locked.assert_awaited_once_with(
+            keys=[
+                f"note_lock:{loaded_note.id}",
+                f"note:{loaded_note.id}",
+                f"owner_notes:{loaded_note.owner_id}",
+            ],
+            args=[lock_token, loaded_note.model_dump_json(), 60, str(loaded_note.id)],
+        )
+
+    async def test_concurrent_miss_waits_for_loader(self):
+        note_cache = create_note_cache()
+        cached_note = create_cached_note()
+        # the first reader holds the lock and caches the note while we wait
+        note_cache.redis.r.set.return_value = False
+        note_cache.redis.r.get.side_effect = [None, None, cached_note.model_dump_json()]
+        load = mock.AsyncMock()
+
+        assert await note_cache.get_or_load(cached_note.id, load) == cached_note
+        load.assert_not_awaited()
+
+    async def test_load_error_releases_lock(self):
+        note_cache = create_note_cache()
+        note_id = uuid.uuid4()
+        load = mock.AsyncMock(side_effect=LookupError())
+
+        with pytest.raises(LookupError):
+            await note_cache.get_or_load(note_id, load)
+
+        note_cache._release_lock.assert_awaited_once()
+        note_cache._store_if_locked.assert_not_awaited()
+
+    async def test_redis_failure_is_a_miss(self):
+        note_cache = create_note_cache()
+        loaded_note = create_cached_note()
+        note_cache.redis.r.get.side_effect = RedisConnectionError()
+        load = mock.AsyncMock(return_value=loaded_note)
+
+        assert await note_cache.get_or_load(loaded_note.id, load) == loaded_note
+        load.assert_awaited_once()
+
+    async def test_invalidate(self):
+        note_cache = create_note_cache()
+        note_ids = [uuid.uuid4(), uuid.uuid4()]
+
+        await note_cache.invalidate(*note_ids)
+
+        note_cache.redis.r.delete.assert_awaited_once_with(
+            *(f"note:{note_id}" for note_id in note_ids),
+            *(f"note_lock:{note_id}" for note_id in note_ids),
+        )
+
+    async def test_invalidate_owner(self):
+        note_cache = create_note_cache()
+        owner_id = uuid.uuid4()
+
+        await note_cache.invalidate_owner(owner_id)
+
+        note_cache._invalidate_owner.assert_awaited_once_with(
+            keys=[f"owner_notes:{owner_id}"], args=["note:", "note_lock:"]
+        )
@@ -0,0 +1,92 @@
+import sys
+from unittest import mock
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.core.render_cache import LRURenderCache, RenderCache, RedisRenderCache
+
+
+def entry_size(key: str, content_html: str) -> int:
+    return sys.getsizeof(key) + sys.getsizeof(content_html)
+
+
+class TestLRURenderCache:
+    def test_get_set(self):
+        lru = LRURenderCache(max_bytes=1024)
+
+        assert lru.get("key") is None
+        lru.set("key", "<p>html</p>")
+
+        assert lru.get("key") == "<p>html</p>"
+        assert lru.stats == {
+            "hits": 1,
+            "misses": 1,
+            "evictions": 0,
+            "entries": 1,
+            "bytes": entry_size("key", "<p>html</p>"),
+        }
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        lru = LRURenderCache(max_bytes=entry_size("a", "<p>1</p>") * 2)
+        lru.set("a", "<p>1</p>")
+        lru.set("b", "<p>2</p>")
+        # "a" becomes the most recently used one
+        lru.get("a")
+
+        lru.set("c", "<p>3</p>")
+
+        assert lru.get("b") is None
+        assert lru.get("a") == "<p>1</p>"
+        assert lru.get("c") == "<p>3</p>"
+        assert lru.evictions == 1
+        assert lru.current_bytes <= lru.max_bytes
+
+    def test_overwrite_keeps_bytes_accurate(self):
+        lru = LRURenderCache(max_bytes=1024)
+        lru.set("key", "<p>old</p>")
+        lru.set("key", "<p>new and longer</p>")
+
+        assert len(lru) == 1
+        assert lru.current_bytes == entry_size("key", "<p>new and longer</p>")
+
+    def test_too_large_entry_is_not_cached(self):
+        lru = LRURenderCache(max_bytes=entry_size("a", "<p>1</p>"))
+        lru.set("a", "<p>1</p>")
+
+        lru.set("huge", "<p>" + "x" * 1024 + "</p>")
+
+        assert lru.get("huge") is None
+        assert lru.get("a") == "<p>1</p>"
+
+
+@pytest.mark.asyncio
+class TestRenderCache:
+    async def test_key_depends_on_options(self):
+        assert RenderCache.key("# md", "1") == RenderCache.key("# md", "1")
+        assert RenderCache.key("# md", "1") != RenderCache.key("# md", "2")
+        assert RenderCache.key("# md", "1") != RenderCache.key("# other md", "1")
+
+    async def test_second_tier_warms_up_lru(self):
+        second_tier = mock.Mock(spec=RedisRenderCache)
+        second_tier.get_many = mock.AsyncMock(return_value={"b": "<p>b</p>"})
+        render_cache = RenderCache(max_bytes=1024, second_tier=second_tier)
+        await render_cache.set_many({"a": "<p>a</p>"})
+
+        cached = await render_cache.get_many(["a", "b", "c"])
+
+        assert cached == {"a": "<p>a</p>", "b": "<p>b</p>"}
+        second_tier.get_many.assert_awaited_once_with(["b", "c"])
+        second_tier.set_many.assert_awaited_once_with({"a": "<p>a</p>"})
+        assert render_cache.lru.get("b") == "<p>b</p>"
+
+    async def test_second_tier_failure_is_a_miss(self):
+        second_tier = mock.Mock(spec=RedisRenderCache)
+        second_tier.get_many = mock.AsyncMock(side_effect=RedisConnectionError())
+        second_tier.set_many = mock.AsyncMock(side_effect=RedisConnectionError())
+        render_cache = RenderCache(max_bytes=1024, second_tier=second_tier)
+
+        await render_cache.set_many({"a": "<p>a</p>"})
+        cached = await render_cache.get_many(["a", "b"])
+
+        assert cached == {"a": "<p>a</p>"}
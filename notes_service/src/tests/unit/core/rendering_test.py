@@ -0,0 +1,156 @@
+from unittest import mock
+
+import markdown
+import pytest
+
+from src.core.rendering import MarkdownRenderingEngine, MarkdownConverterPool
+from src.core.render_cache import RenderCache
+
+
+def create_engine(
+    pool_size: int = 1,
+    inline_threshold: int = 1024,
+    extensions: list[str] | None = None,
+    render_cache: RenderCache | None = None,
+) -> MarkdownRenderingEngine:
+    return MarkdownRenderingEngine(
+        pool_size=pool_size,
+        inline_threshold=inline_threshold,
+        converter_pool=MarkdownConverterPool(extensions=extensions or []),
+        render_cache=render_cache or RenderCache(max_bytes=64 * 1024),
+    )
+
+
+class TestMarkdownConverterPool:
+    def test_convert_many(self):
+        converter_pool = MarkdownConverterPool(extensions=[])
+        contents = ["# title", "- item\n- item", "[link](https://some.com)"]
+
+        assert converter_pool.convert_many(contents) == [
+            markdown.markdown(content) for content in contents
+        ]
+
+    def test_converter_is_reused(self):
+        converter_pool = MarkdownConverterPool(extensions=[])
+
+        with converter_pool.acquire() as first_converter:
+            pass
+        with converter_pool.acquire() as second_converter:
+            pass
+
+        assert first_converter is second_converter
+
+    def test_converter_state_does_not_leak(self):
+        converter_pool = MarkdownConverterPool(extensions=["footnotes"])
+        with_footnote = "Text[^1]\n\n[^1]: Footnote"
+        without_footnote = "Text"
+
+        rendered = converter_pool.convert_many([with_footnote, without_footnote])
+
+        assert rendered == [
+            markdown.markdown(with_footnote, extensions=["footnotes"]),
+            markdown.markdown(without_footnote, extensions=["footnotes"]),
+        ]
+
+    def test_extra_converters_are_not_kept(self):
+        converter_pool = MarkdownConverterPool(extensions=[], max_idle=1)
+
+        with converter_pool.acquire() as first_converter:
+            with converter_pool.acquire() as second_converter:
+                assert first_converter is not second_converter
+
+        assert len(converter_pool._idle_converters) == 1
+
+
+@pytest.mark.asyncio
+class TestMarkdownRenderingEngine:
+    async def test_render_inline(self):
+        engine = create_engine(inline_threshold=1024)
+        content = "# Some small md"
+
+        with mock.patch.object(engine, "_render_in_pool") as mock_render_in_pool:
+            content_html = await engine.render(content)
+
+        assert content_html == markdown.markdown(content)
+        mock_render_in_pool.assert_not_called()
+        assert engine._executor is None
+
+    async def test_render_many_in_pool(self):
+        engine = create_engine(inline_threshold=16, extensions=["tables"])
+        contents = [
+            "# small",
+            "# large md document\n\n" + "- item\n" * 10,
+            "*tiny*",
+            "| large | table |\n| --- | --- |\n| a | b |",
+        ]
+
+        try:
+            rendered = await engine.render_many(contents)
+        finally:
+            engine.shutdown()
+
+        assert rendered == [
+            markdown.markdown(content, extensions=["tables"]) for content in contents
+        ]
+
+    async def test_render_many_single_submission(self):
+        engine = create_engine(pool_size=2, inline_threshold=4)
+        contents = ["# large one", "# large two", "# large three"]
+
+        with mock.patch.object(
+            engine,
+            "_render_in_pool",
+            mock.AsyncMock(side_effect=lambda batch: [f"<{c}>" for c in batch]),
+        ) as mock_render_in_pool:
+            rendered = await engine.render_many(contents)
+
+        mock_render_in_pool.assert_awaited_once_with(contents)
+        assert rendered == [f"<{content}>" for content in contents]
+
+    async def test_render_many_small_documents_offloaded_together(self):
+        engine = create_engine(inline_threshold=64)
+        # every document is short, but the batch is not
+        contents = [f"# small md {i}" for i in range(10)]
+
+        with mock.patch.object(
+            engine,
+            "_render_in_pool",
+            mock.AsyncMock(side_effect=lambda batch: [f"<{c}>" for c in batch]),
+        ) as mock_render_in_pool, mock.patch.object(
+            engine.converter_pool, "convert_many"
+        ) as mock_convert_many:
+            rendered = await engine.render_many(contents)
+
+        mock_render_in_pool.assert_awaited_once_with(contents)
+        mock_convert_many.assert_not_called()
+        assert rendered == [f"<{content}>" for content in contents]
+
+    async def test_render_many_empty(self):
+        engine = create_engine(inline_threshold=16)
+
+        assert await engine.render_many([]) == []
+
+    async def test_render_many_cached(self):
+        render_cache = RenderCache(max_bytes=64 * 1024)
+        engine = create_engine(inline_threshold=1024, render_cache=render_cache)
+        contents = ["# same md", "# other md", "# same md"]
+
+        with mock.patch.object(
+            engine.converter_pool,
+            "convert_many",
+            side_effect=lambda batch: [markdown.markdown(c) for c in batch],
+        ) as mock_convert_many:
+            first_rendered = await engine.render_many(contents)
+            second_rendered = await engine.render_many(contents)
+
+        # duplicate is rendered once, second call is served from cache
+        mock_convert_many.assert_called_once_with(["# same md", "# other md"])
+        assert first_rendered == second_rendered
+        assert first_rendered == [markdown.markdown(content) for content in contents]
+        assert render_cache.lru.hits == 2
+
+    async def test_options_fingerprint_depends_on_extensions(self):
+        assert (
+            create_engine(extensions=["tables"]).options_fingerprint
+            != create_engine(extensions=[]).options_fingerprint
+        )
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from src.core.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+    async def test_concurrent_calls_are_shared(self):
+        single_flight = SingleFlight()
+        released = asyncio.Event()
+        calls = 0
+
+        async def call() -> str:
+            nonlocal calls
+            calls += 1
+            await released.wait()
+            return "result"
+
+        waiters = [
+            asyncio.create_task(single_flight.do(("note", 1), call)) for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        released.set()
+
+        assert await asyncio.gather(*waiters) == ["result"] * 5
+        assert calls == 1
+        assert single_flight.shared_calls == 4
+        assert not single_flight._in_flight
+
+    async def test_different_keys_are_not_shared(self):
+        single_flight = SingleFlight()
+
+        async def call(value: int) -> int:
+            await asyncio.sleep(0)
+            return value
+
+        assert await asyncio.gather(
+            single_flight.do(("note", 1), lambda: call(1)),
+            single_flight.do(("note", 2), lambda: call(2)),
+        ) == [1, 2]
+        assert single_flight.shared_calls == 0
+
+    async def test_error_is_shared(self):
+        single_flight = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0)
+            raise LookupError()
+
+        results = await asyncio.gather(
+            single_flight.do(("note", 1), call),
+            single_flight.do(("note", 1), call),
+            return_exceptions=True,
+        )
+
+        assert [type(result) for result in results] == [LookupError, LookupError]
+        assert not single_flight._in_flight
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        single_flight = SingleFlight()
+        released = asyncio.Event()
+
+        async def call() -> str:
+            await released.wait()
+            return "result"
+
+        first = asyncio.create_task(single_flight.do(("note", 1), call))
+        second = asyncio.create_task(single_flight.do(("note", 1), call))
+        await asyncio.sleep(0)
+        first.cancel()
+        released.set()
+
+        assert await second == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    async def test_forgotten_call_is_not_shared(self):
+        single_flight = SingleFlight()
+        released = asyncio.Event()
+        calls = 0
+
+        async def call() -> int:
+            nonlocal calls
+            calls += 1
+            await released.wait()
+            return calls
+
+        first = asyncio.create_task(single_flight.do(("note", 1, True), call))
+        await asyncio.sleep(0)
+        single_flight.forget("note", 1)
+        second = asyncio.create_task(single_flight.do(("note", 1, True), call))
+        await asyncio.sleep(0)
+        released.set()
+
+        assert await asyncio.gather(first, second) == [2, 2]
+        assert calls == 2
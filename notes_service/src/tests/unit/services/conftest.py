@@ -5,8 +5,9 @@ from unittest import mock
 
 import pytest
 
-from src.models.note import Note
+from src.models.note import Note, NoteBody, content_hash
 from src.repositories.note import NoteRepository
+from src.core.note_cache import NoteCache
 
 if TYPE_CHECKING:
     from src.services.note import NoteService
@@ -24,6 +25,18 @@ def note_service(container) -> "NoteService":
     return container.note_service()
 
 
+@pytest.fixture
+def mock_note_cache() -> mock.Mock:
+    return mock.Mock(spec=NoteCache)
+
+
+@pytest.fixture
+def cached_note_service(
+    container, mock_note_repository, mock_note_cache
+) -> "NoteService":
+    return container.note_service(note_cache=mock_note_cache)
+
+
 @pytest.fixture
 def expected_notes_with() -> Callable:
     """
@@ -40,27 +53,49 @@ def expected_notes_with() -> Callable:
         title: str | None = None,
         content: str | None = None,
         owner_id: uuid.UUID | None = None,
+        content_html: str | None = None,
+        renderer_version: int = 0,
         amount: int = 1,
     ) -> Note | list[Note]:
         if amount == 1:
+            note_content = content or "# some expected md"
             return Note(
                 id=id or uuid.uuid4(),
                 title=title or "some_expected_title",
-                content=content or "# some expected md",
+                content=note_content,
+                body_hash=content_hash(note_content),
+                body=NoteBody(
+                    hash=content_hash(note_content),
+                    content_html=content_html,
+                    renderer_version=renderer_version,
+                ),
                 owner_id=owner_id or uuid.uuid4(),
                 created_at=datetime.now(),
                 updated_at=datetime.now(),
+                version=1,
+                tags=[],
             )
-        return [
-            Note(
-                id=uuid.uuid4(),
-                title=f"{title or 'some_expected_title'}_{i}",
-                content=f"{content or '# some expected md'}_{i}",
-                owner_id=owner_id or uuid.uuid4(),
-                created_at=datetime.now(),
-                updated_at=datetime.now(),
+        notes = []
+        for i in range(1, amount + 1):
+            note_content = f"{content or '# some expected md'}_{i}"
+            notes.append(
+                Note(
+                    id=uuid.uuid4(),
+                    title=f"{title or 'some_expected_title'}_{i}",
+                    content=note_content,
+                    body_hash=content_hash(note_content),
+                    body=NoteBody(
+                        hash=content_hash(note_content),
+                        content_html=content_html,
+                        renderer_version=renderer_version,
+                    ),
+                    owner_id=owner_id or uuid.uuid4(),
+                    created_at=datetime.now(),
+                    updated_at=datetime.now(),
+                    version=1,
+                    tags=[],
+                )
             )
-            for i in range(1, amount + 1)
-        ]
+        return notes
 
     return wrapper
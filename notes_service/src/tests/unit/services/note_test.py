@@ -1,12 +1,59 @@
+import json
 import uuid
+import asyncio
+from datetime import datetime, timedelta
 from unittest import mock
 
 import markdown
 import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
 
-from src.exceptions.service import NoteNotFoundError, NoteAlreadyExistsError
-from src.exceptions.repository import NoSuchRowError
-from src.schemas.note import NoteCreateShema, NoteUpdateShema
+from src.exceptions.service import (
+    NoteNotFoundError,
+    NoteAlreadyExistsError,
+    InvalidCursorError,
+    NoteRevisionNotFoundError,
+    NoteVersionConflictError,
+    InvalidContentPatchError,
+)
+from src.repositories.pagination import (
+    KeysetPage,
+    Cursor,
+    ChangesCursor,
+    TombstonePosition,
+    NoteOrderingField,
+)
+from src.models.note import Note, NoteTombstone, content_hash
+from src.core.settings import (
+    MARKDOWN_RENDERER_VERSION,
+    TITLE_SIMILARITY_THRESHOLD,
+    IMPORT_NOTES_BATCH_SIZE,
+)
+from src.exceptions.repository import (
+    NoSuchRowError,
+    RowAlreadyExistsError,
+    StaleRowError,
+)
+from src.repositories.note import NoteBatchResult, RenderedBodies
+from src.repositories.specifications import (
+    NoteSortField,
+    NotesForOwnerSpecification,
+    NotesWithTagsSpecification,
+    SortedSpecification,
+)
+from src.schemas.note import (
+    NoteCreateShema,
+    NoteUpdateShema,
+    NoteBatchShema,
+    NoteBatchUpdateShema,
+    NoteBatchItemStatus,
+    NoteOutputShema,
+    NoteCachedShema,
+    NoteContentPatchShema,
+    NoteContentEditShema,
+    NoteQueryShema,
+)
 
 
 class TestNoteService:
@@ -18,10 +65,11 @@ class TestNoteService:
         exp_notes_orm = expected_notes_with(amount=5)
         mock_note_repository.get_all = mock.AsyncMock(return_value=exp_notes_orm)
 
-        notes = await note_service.get_all(md_content_format=md_content_format)
+        notes_page = await note_service.get_all(md_content_format=md_content_format)
 
-        for note_schema, note_orm in zip(notes, exp_notes_orm):
-            mock_note_repository.get_all.assert_awaited_once()
+        mock_note_repository.get_all.assert_awaited_once()
+        assert notes_page.next_cursor is None
+        for note_schema, note_orm in zip(notes_page.items, exp_notes_orm):
             assert note_schema.id == note_orm.id
             assert note_schema.title == note_orm.title
             assert note_schema.content == (
@@ -37,10 +85,64 @@ class TestNoteService:
     ):
         mock_note_repository.get_all = mock.AsyncMock(return_value=[])
 
-        notes = await note_service.get_all(md_content_format=md_content_format)
+        notes_page = await note_service.get_all(md_content_format=md_content_format)
 
         mock_note_repository.get_all.assert_awaited_once()
-        assert notes == []
+        assert notes_page.items == []
+        assert notes_page.next_cursor is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("order_by",),
+        ((NoteOrderingField.CREATED_AT,), (NoteOrderingField.UPDATED_AT,)),
+    )
+    async def test_get_all_next_page(
+        self, order_by, mock_note_repository, expected_notes_with, note_service
+    ):
+        limit = 3
+        # repository returns one extra note when the next page exists
+        exp_notes_orm = expected_notes_with(amount=limit + 1)
+        mock_note_repository.get_all = mock.AsyncMock(return_value=exp_notes_orm)
+
+        first_page = await note_service.get_all(limit=limit, order_by=order_by)
+
+        assert len(first_page.items) == limit
+        called_page = mock_note_repository.get_all.call_args.kwargs["page"]
+        assert called_page == KeysetPage(limit=limit, order_by=order_by)
+
+        mock_note_repository.get_all = mock.AsyncMock(return_value=[])
+        await note_service.get_all(
+            limit=limit, cursor=first_page.next_cursor, order_by=order_by
+        )
+
+        called_page = mock_note_repository.get_all.call_args.kwargs["page"]
+        assert called_page.after == Cursor.from_note(exp_notes_orm[limit - 1], order_by)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("cursor",),
+        (
+            ("definitely not a cursor",),
+            (
+                Cursor(
+                    order_by=NoteOrderingField.UPDATED_AT,
+                    value=datetime.now(),
+                    id=uuid.uuid4(),
+                ).encode(),
+            ),
+        ),
+    )
+    async def test_get_all_invalid_cursor(
+        self, cursor, mock_note_repository, note_service
+    ):
+        mock_note_repository.get_all = mock.AsyncMock(return_value=[])
+
+        with pytest.raises(InvalidCursorError):
+            await note_service.get_all(
+                cursor=cursor, order_by=NoteOrderingField.CREATED_AT
+            )
+
+        mock_note_repository.get_all.assert_not_awaited()
 
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
@@ -61,9 +163,9 @@ class TestNoteService:
             owner_id=owner_id, md_content_format=md_content_format
         )
 
-        assert all(map(lambda nboi: nboi.owner_id == owner_id, notes_by_owner_id))
+        assert all(map(lambda nboi: nboi.owner_id == owner_id, notes_by_owner_id.items))
         mock_note_repository.filter_by.assert_awaited_once()
-        for note_schema, note_orm in zip(notes_by_owner_id, exp_notes_orm):
+        for note_schema, note_orm in zip(notes_by_owner_id.items, exp_notes_orm):
             assert note_schema.content == (
                 markdown.markdown(note_orm.content)
                 if not md_content_format
@@ -87,9 +189,359 @@ class TestNoteService:
             owner_id=owner_id, md_content_format=md_content_format
         )
 
-        assert notes_by_owner_id == []
+        assert notes_by_owner_id.items == []
+        assert notes_by_owner_id.next_cursor is None
         mock_note_repository.filter_by.assert_awaited_once()
 
+    @pytest.mark.asyncio
+    async def test_get_summaries_by_owner_id(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        owner_id = uuid.uuid4()
+        limit = 2
+        exp_notes_orm = expected_notes_with(owner_id=owner_id, amount=limit + 1)
+        mock_note_repository.filter_by = mock.AsyncMock(return_value=exp_notes_orm)
+
+        with mock.patch.object(
+            note_service.rendering_engine, "render_many"
+        ) as mock_render_many:
+            summaries = await note_service.get_summaries_by_owner_id(
+                owner_id=owner_id, limit=limit
+            )
+
+        mock_render_many.assert_not_called()
+        assert mock_note_repository.filter_by.call_args.kwargs["columns"] == (
+            note_service.summary_columns
+        )
+        assert [summary.id for summary in summaries.items] == [
+            note.id for note in exp_notes_orm[:limit]
+        ]
+        assert (
+            summaries.next_cursor
+            == (
+                Cursor.from_note(exp_notes_orm[limit - 1], NoteOrderingField.CREATED_AT)
+            ).encode()
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("tags", "expected_spec"),
+        (
+            (None, NotesForOwnerSpecification),
+            ([], NotesForOwnerSpecification),
+            (["work", "urgent"], NotesWithTagsSpecification),
+        ),
+    )
+    async def test_get_summaries_by_owner_id_with_tags(
+        self, tags, expected_spec, mock_note_repository, note_service
+    ):
+        owner_id = uuid.uuid4()
+        mock_note_repository.filter_by = mock.AsyncMock(return_value=[])
+
+        await note_service.get_summaries_by_owner_id(owner_id=owner_id, tags=tags)
+
+        specification = mock_note_repository.filter_by.call_args.kwargs["specification"]
+        assert type(specification) is expected_spec
+        assert specification.is_satisfied()[0].compare(
+            NotesForOwnerSpecification(owner_id=owner_id).is_satisfied()[0]
+        )
+        if tags:
+            assert specification.tags == tags
+
+    @pytest.mark.asyncio
+    async def test_query_by_owner_id(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        owner_id = uuid.uuid4()
+        exp_notes_orm = expected_notes_with(owner_id=owner_id, amount=2)
+        mock_note_repository.filter_by = mock.AsyncMock(return_value=exp_notes_orm)
+        note_query = NoteQueryShema.model_validate(
+            {
+                "filter": {
+                    "created_since": "2026-01-01T00:00:00Z",
+                    "any_of": [{"title_prefix": "50%"}, {"tags": ["work"]}],
+                    "none_of": [{"max_content_length": 10}],
+                },
+                "order_by": [{"field": "content_length", "descending": True}],
+                "limit": 2,
+            }
+        )
+
+        summaries = await note_service.query_by_owner_id(
+            owner_id=owner_id, note_query=note_query
+        )
+
+        assert [summary.id for summary in summaries] == [
+            note.id for note in exp_notes_orm
+        ]
+        called_kwargs = mock_note_repository.filter_by.call_args.kwargs
+        assert called_kwargs["columns"] == note_service.summary_columns
+        specification = called_kwargs["specification"]
+        assert isinstance(specification, SortedSpecification)
+        assert specification.limit == 2
+        assert [sort.field for sort in specification.order_by] == [
+            NoteSortField.CONTENT_LENGTH
+        ]
+        query = str(
+            specification.apply(select(Note.id)).compile(
+                dialect=asyncpg.dialect(),
+                compile_kwargs={"literal_binds": True},
+            )
+        )
+        assert f"notes.owner_id = '{owner_id}'" in query
+        assert "notes.created_at >= '2026-01-01 00:00:00'" in query
+        assert "notes.title LIKE '50/%' || '%' ESCAPE '/'" in query
+        # negated comparison is compiled as the opposite one
+        assert "octet_length(notes.content) > 10" in query
+        assert "ORDER BY octet_length(notes.content) DESC, notes.id" in query
+        assert "LIMIT 2" in query
+
+    @pytest.mark.asyncio
+    async def test_get_tag_counts(self, mock_note_repository, note_service):
+        owner_id = uuid.uuid4()
+        mock_note_repository.get_tag_counts = mock.AsyncMock(
+            return_value=[
+                mock.Mock(tag="work", notes_amount=3),
+                mock.Mock(tag="home", notes_amount=1),
+            ]
+        )
+
+        tag_counts = await note_service.get_tag_counts(owner_id=owner_id, limit=2)
+
+        mock_note_repository.get_tag_counts.assert_awaited_once_with(
+            owner_id=owner_id, limit=2
+        )
+        assert [(count.tag, count.notes_amount) for count in tag_counts] == [
+            ("work", 3),
+            ("home", 1),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_summaries(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        exp_notes_orm = expected_notes_with(amount=3)
+        mock_note_repository.get_all = mock.AsyncMock(return_value=exp_notes_orm)
+
+        summaries = await note_service.get_summaries()
+
+        assert mock_note_repository.get_all.call_args.kwargs["columns"] == (
+            note_service.summary_columns
+        )
+        assert [summary.title for summary in summaries.items] == [
+            note.title for note in exp_notes_orm
+        ]
+        assert summaries.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_get_changes(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        owner_id = uuid.uuid4()
+        limit = 2
+        changed_notes = expected_notes_with(owner_id=owner_id, amount=limit)
+        tombstones = [
+            NoteTombstone(id=uuid.uuid4(), owner_id=owner_id, deleted_at=datetime.now())
+            for _ in range(limit + 1)
+        ]
+        mock_note_repository.filter_by = mock.AsyncMock(return_value=changed_notes)
+        mock_note_repository.get_tombstones = mock.AsyncMock(return_value=tombstones)
+
+        changes = await note_service.get_changes(
+            owner_id=owner_id, limit=limit, md_content_format=True
+        )
+
+        assert [note.id for note in changes.notes] == [
+            note.id for note in changed_notes
+        ]
+        assert [tombstone.id for tombstone in changes.deleted] == [
+            tombstone.id for tombstone in tombstones[:limit]
+        ]
+        assert changes.has_more
+        called_page = mock_note_repository.filter_by.call_args.kwargs["page"]
+        assert called_page == KeysetPage(
+            limit=limit, order_by=NoteOrderingField.UPDATED_AT
+        )
+        assert ChangesCursor.decode(changes.next_cursor) == ChangesCursor(
+            notes_after=Cursor.from_note(
+                changed_notes[-1], NoteOrderingField.UPDATED_AT
+            ),
+            tombstones_after=TombstonePosition(
+                deleted_at=tombstones[limit - 1].deleted_at,
+                id=tombstones[limit - 1].id,
+            ),
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_changes_since(self, mock_note_repository, note_service):
+        owner_id = uuid.uuid4()
+        since = ChangesCursor(
+            notes_after=Cursor(
+                order_by=NoteOrderingField.UPDATED_AT,
+                value=datetime.now(),
+                id=uuid.uuid4(),
+            ),
+        )
+        mock_note_repository.filter_by = mock.AsyncMock(return_value=[])
+        mock_note_repository.get_tombstones = mock.AsyncMock(return_value=[])
+
+        changes = await note_service.get_changes(
+            owner_id=owner_id, since=since.encode()
+        )
+
+        assert changes.notes == [] and changes.deleted == []
+        assert not changes.has_more
+        # nothing has changed, so the position is kept
+        assert ChangesCursor.decode(changes.next_cursor) == since
+        called_page = mock_note_repository.filter_by.call_args.kwargs["page"]
+        assert called_page.after == since.notes_after
+        assert mock_note_repository.get_tombstones.call_args.kwargs["after"] is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("since",),
+        (
+            ("definitely not a cursor",),
+            (
+                # cursor of a list ordered by created_at
+                Cursor(
+                    order_by=NoteOrderingField.CREATED_AT,
+                    value=datetime.now(),
+                    id=uuid.uuid4(),
+                ).encode(),
+            ),
+        ),
+    )
+    async def test_get_changes_invalid_cursor(
+        self, since, mock_note_repository, note_service
+    ):
+        mock_note_repository.filter_by = mock.AsyncMock()
+
+        with pytest.raises(InvalidCursorError):
+            await note_service.get_changes(owner_id=uuid.uuid4(), since=since)
+
+        mock_note_repository.filter_by.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_export_by_owner_id(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        owner_id = uuid.uuid4()
+        exp_notes_orm = expected_notes_with(owner_id=owner_id, amount=3)
+
+        async def stream_batches():
+            yield exp_notes_orm[:2]
+            yield exp_notes_orm[2:]
+
+        mock_note_repository.stream_by = mock.Mock(return_value=stream_batches())
+
+        chunks = [
+            chunk async for chunk in note_service.export_by_owner_id(owner_id=owner_id)
+        ]
+
+        assert len(chunks) == 2
+        exported_notes = [
+            json.loads(line) for chunk in chunks for line in chunk.splitlines()
+        ]
+        for exported_note, note_orm in zip(exported_notes, exp_notes_orm, strict=True):
+            assert uuid.UUID(exported_note["id"]) == note_orm.id
+            # backups keep bare MarkDown
+            assert exported_note["content"] == note_orm.content
+        called_spec = mock_note_repository.stream_by.call_args.kwargs["specification"]
+        assert called_spec.owner_id == owner_id
+
+    @pytest.mark.asyncio
+    async def test_import_by_owner_id(self, mock_note_repository, note_service):
+        owner_id = uuid.uuid4()
+        ndjson = (
+            b'{"title": "first", "content": "# first"}\n'
+            b"not a json\n"
+            b"\n"
+            b'{"title": "taken", "content": "# taken"}\n'
+            b'{"title": "first", "content": "# repeated"}\n'
+            b'{"title": "no content"}\n'
+            b'{"title": "last", "content": "# last", "id": "ignored"}'
+        )
+
+        async def chunks():
+            # lines are split between chunks
+            for start in range(0, len(ndjson), 7):
+                yield ndjson[start : start + 7]
+
+        mock_note_repository.create_many = mock.AsyncMock(
+            side_effect=lambda notes: [
+                note.title for note in notes if note.title != "taken"
+            ]
+        )
+
+        import_result = await note_service.import_by_owner_id(
+            owner_id=owner_id, chunks=chunks()
+        )
+
+        assert import_result.imported == 2
+        assert import_result.conflicting_titles == ["first", "taken"]
+        assert import_result.invalid_lines == [2, 6]
+        mock_note_repository.create_many.assert_awaited_once()
+        called_notes = mock_note_repository.create_many.call_args.kwargs["notes"]
+        assert [note.title for note in called_notes] == ["first", "taken", "last"]
+        assert all(note.owner_id == owner_id for note in called_notes)
+        # rendered lazily on the first read
+        assert all(note.body is None for note in called_notes)
+
+    @pytest.mark.asyncio
+    async def test_import_by_owner_id_batches(self, mock_note_repository, note_service):
+        notes_amount = IMPORT_NOTES_BATCH_SIZE + 1
+
+        async def chunks():
+            for i in range(notes_amount):
+                yield json.dumps({"title": f"title {i}", "content": "md"}).encode()
+                yield b"\n"
+
+        mock_note_repository.create_many = mock.AsyncMock(
+            side_effect=lambda notes: [note.title for note in notes]
+        )
+
+        import_result = await note_service.import_by_owner_id(
+            owner_id=uuid.uuid4(), chunks=chunks()
+        )
+
+        assert import_result.imported == notes_amount
+        assert [
+            len(call.kwargs["notes"])
+            for call in mock_note_repository.create_many.await_args_list
+        ] == [IMPORT_NOTES_BATCH_SIZE, 1]
+
+    @pytest.mark.asyncio
+    async def test_export_import_round_trip(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        exp_notes_orm = expected_notes_with(amount=2)
+        exp_notes_orm[0].tags = ["work", "urgent"]
+
+        async def stream_batches():
+            yield exp_notes_orm
+
+        mock_note_repository.stream_by = mock.Mock(return_value=stream_batches())
+        mock_note_repository.create_many = mock.AsyncMock(
+            side_effect=lambda notes: [note.title for note in notes]
+        )
+        new_owner_id = uuid.uuid4()
+
+        import_result = await note_service.import_by_owner_id(
+            owner_id=new_owner_id,
+            chunks=note_service.export_by_owner_id(owner_id=uuid.uuid4()),
+        )
+
+        assert import_result.imported == 2
+        called_notes = mock_note_repository.create_many.call_args.kwargs["notes"]
+        assert [
+            (note.title, note.content, note.tags, note.owner_id)
+            for note in called_notes
+        ] == [
+            (note.title, note.content, note.tags, new_owner_id)
+            for note in exp_notes_orm
+        ]
+
     @pytest.mark.asyncio
     @pytest.mark.parametrize(("md_content_format",), ((True,), (False,)))
     async def test_get_one_by_id(
@@ -114,6 +566,306 @@ class TestNoteService:
             else exp_note_orm.content
         )
 
+    @pytest.mark.asyncio
+    async def test_get_one_by_id_concurrent_reads_share_load(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        exp_note_orm = expected_notes_with(amount=1)
+
+        async def get_one_by_id(note_id):
+            await asyncio.sleep(0)
+            return exp_note_orm
+
+        mock_note_repository.get_one_by_id = mock.AsyncMock(side_effect=get_one_by_id)
+
+        notes = await asyncio.gather(
+            *(note_service.get_one_by_id(note_id=exp_note_orm.id) for _ in range(5)),
+            note_service.get_one_by_id(note_id=exp_note_orm.id, md_content_format=True),
+        )
+
+        # the note in other content format is loaded separately
+        assert mock_note_repository.get_one_by_id.await_count == 2
+        assert {note.id for note in notes} == {exp_note_orm.id}
+        assert notes[-1].content == exp_note_orm.content
+
+    @pytest.mark.asyncio
+    async def test_get_all_by_owner_id_concurrent_reads_share_load(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        owner_id = uuid.uuid4()
+        exp_notes_orm = expected_notes_with(owner_id=owner_id, amount=3)
+
+        async def filter_by(specification, page):
+            await asyncio.sleep(0)
+            return exp_notes_orm
+
+        mock_note_repository.filter_by = mock.AsyncMock(side_effect=filter_by)
+
+        pages = await asyncio.gather(
+            *(note_service.get_all_by_owner_id(owner_id=owner_id) for _ in range(3))
+        )
+
+        mock_note_repository.filter_by.assert_awaited_once()
+        assert all(len(page.items) == 3 for page in pages)
+
+    def test_note_etag(self, note_service):
+        note_id = uuid.uuid4()
+
+        etag = note_service.note_etag(
+            note_id=note_id, version=3, md_content_format=False
+        )
+
+        assert etag.startswith('"3-') and etag.endswith('"')
+        assert etag == note_service.note_etag(
+            note_id=note_id, version=3, md_content_format=False
+        )
+        assert etag != note_service.note_etag(
+            note_id=note_id, version=3, md_content_format=True
+        )
+        assert etag != note_service.note_etag(
+            note_id=note_id, version=4, md_content_format=False
+        )
+        assert note_service.version_from_etag(etag) == 3
+
+    @pytest.mark.parametrize(
+        ("etag",),
+        (
+            ('W/"3-abc"',),
+            ('"abc"',),
+            ('"3-abc", "4-abc"',),
+            ("3-abc",),
+            ('"-3-abc"',),
+        ),
+    )
+    def test_version_from_invalid_etag(self, note_service, etag):
+        assert note_service.version_from_etag(etag) is None
+
+    @pytest.mark.asyncio
+    async def test_get_note_etag(self, mock_note_repository, note_service):
+        note_id = uuid.uuid4()
+        mock_note_repository.get_version = mock.AsyncMock(return_value=7)
+        mock_note_repository.get_one_by_id = mock.AsyncMock()
+
+        etag = await note_service.get_note_etag(note_id=note_id)
+
+        assert etag == note_service.note_etag(
+            note_id=note_id, version=7, md_content_format=False
+        )
+        mock_note_repository.get_one_by_id.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_get_note_etag_not_found(self, mock_note_repository, note_service):
+        mock_note_repository.get_version = mock.AsyncMock(
+            side_effect=NoSuchRowError("...")
+        )
+
+        with pytest.raises(NoteNotFoundError):
+            await note_service.get_note_etag(note_id=uuid.uuid4())
+
+    @pytest.mark.asyncio
+    async def test_get_owner_notes_etag(self, mock_note_repository, note_service):
+        owner_id = uuid.uuid4()
+        mock_note_repository.get_owner_version = mock.AsyncMock(return_value=7)
+
+        etag = await note_service.get_owner_notes_etag(owner_id, variant="page-1")
+
+        assert etag == await note_service.get_owner_notes_etag(
+            owner_id, variant="page-1"
+        )
+        assert etag != await note_service.get_owner_notes_etag(
+            owner_id, variant="page-2"
+        )
+        # e.g. one note is deleted and another one is created
+        mock_note_repository.get_owner_version.return_value = 9
+        assert etag != await note_service.get_owner_notes_etag(
+            owner_id, variant="page-1"
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("before", "expected_numbers", "expected_next_before"),
+        ((None, [5, 4], 4), (3, [2, 1], None), (100, [5, 4], 4), (1, [], None)),
+    )
+    async def test_get_revisions(
+        self,
+        before,
+        expected_numbers,
+        expected_next_before,
+        mock_note_repository,
+        note_service,
+    ):
+        note_id = uuid.uuid4()
+        note_created_at = datetime(2026, 1, 1)
+        mock_note_repository.get_current_revision = mock.AsyncMock(
+            return_value=mock.Mock(number=5, created_at=note_created_at)
+        )
+
+        async def get_revisions(note_id, before, limit):
+            return [
+                mock.Mock(number=number, replaced_at=datetime(2026, 1, 1 + number))
+                for number in range(before - 1, max(before - 1 - limit, 0), -1)
+            ]
+
+        mock_note_repository.get_revisions = mock.AsyncMock(side_effect=get_revisions)
+
+        revisions_page = await note_service.get_revisions(
+            note_id=note_id, limit=2, before=before
+        )
+
+        assert [item.number for item in revisions_page.items] == expected_numbers
+        assert revisions_page.next_before == expected_next_before
+        # revision is created when the previous one is replaced
+        for item in revisions_page.items:
+            expected_created_at = (
+                datetime(2026, 1, item.number) if item.number > 1 else note_created_at
+            )
+            assert item.created_at == expected_created_at
+
+    @pytest.mark.asyncio
+    async def test_get_revisions_note_not_found(
+        self, mock_note_repository, note_service
+    ):
+        mock_note_repository.get_current_revision = mock.AsyncMock(
+            side_effect=NoSuchRowError("...")
+        )
+
+        with pytest.raises(NoteNotFoundError):
+            await note_service.get_revisions(note_id=uuid.uuid4())
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(("md_content_format",), ((True,), (False,)))
+    async def test_get_revision(
+        self, md_content_format, mock_note_repository, note_service
+    ):
+        note_id = uuid.uuid4()
+        mock_note_repository.get_revision_content = mock.AsyncMock(
+            return_value="# old md"
+        )
+
+        revision = await note_service.get_revision(
+            note_id=note_id, number=3, md_content_format=md_content_format
+        )
+
+        mock_note_repository.get_revision_content.assert_awaited_once_with(
+            note_id=note_id, number=3
+        )
+        assert revision.number == 3
+        assert revision.content == (
+            "# old md" if md_content_format else markdown.markdown("# old md")
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_revision_not_found(self, mock_note_repository, note_service):
+        mock_note_repository.get_revision_content = mock.AsyncMock(
+            side_effect=NoSuchRowError("...")
+        )
+
+        with pytest.raises(NoteRevisionNotFoundError):
+            await note_service.get_revision(note_id=uuid.uuid4(), number=3)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("found_amount", "expected_next_offset"), ((3, None), (4, 23))
+    )
+    async def test_search(
+        self, found_amount, expected_next_offset, mock_note_repository, note_service
+    ):
+        owner_id = uuid.uuid4()
+        found_notes = [
+            mock.Mock(
+                id=uuid.uuid4(),
+                title=f"title {i}",
+                owner_id=owner_id,
+                created_at=datetime.now(),
+                updated_at=datetime.now(),
+                version=1,
+                rank=1 / i,
+                headline=f"<b>match</b> {i}",
+            )
+            for i in range(1, found_amount + 1)
+        ]
+        mock_note_repository.search = mock.AsyncMock(return_value=found_notes)
+
+        found_page = await note_service.search(
+            owner_id=owner_id, query="match", limit=3, offset=20
+        )
+
+        called_kwargs = mock_note_repository.search.call_args.kwargs
+        assert called_kwargs["limit"] == 4
+        assert called_kwargs["offset"] == 20
+        assert called_kwargs["specification"].query == "match"
+        assert found_page.next_offset == expected_next_offset
+        assert [note.id for note in found_page.items] == [
+            note.id for note in found_notes[:3]
+        ]
+
+    @pytest.mark.asyncio
+    async def test_suggest_titles(self, mock_note_repository, note_service):
+        owner_id = uuid.uuid4()
+        suggested_titles = [
+            mock.Mock(id=uuid.uuid4(), title="Daily routine", similarity=0.6),
+            mock.Mock(id=uuid.uuid4(), title="Dairy products", similarity=0.3),
+        ]
+        mock_note_repository.search_titles = mock.AsyncMock(
+            return_value=suggested_titles
+        )
+
+        suggestions = await note_service.suggest_titles(
+            owner_id=owner_id, fragment="dai", limit=5
+        )
+
+        mock_note_repository.search_titles.assert_awaited_once_with(
+            owner_id=owner_id,
+            fragment="dai",
+            similarity_threshold=TITLE_SIMILARITY_THRESHOLD,
+            limit=5,
+        )
+        assert [suggestion.title for suggestion in suggestions] == [
+            "Daily routine",
+            "Dairy products",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_one_by_id_rendered_on_write(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        stored_html = "<p>stored html</p>"
+        exp_note_orm = expected_notes_with(
+            content_html=stored_html, renderer_version=MARKDOWN_RENDERER_VERSION
+        )
+        mock_note_repository.get_one_by_id = mock.AsyncMock(return_value=exp_note_orm)
+        mock_note_repository.update_rendered_bodies = mock.AsyncMock()
+
+        note = await note_service.get_one_by_id(note_id=exp_note_orm.id)
+        await asyncio.sleep(0)
+
+        assert note.content == stored_html
+        mock_note_repository.update_rendered_bodies.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_get_one_by_id_outdated_renderer_version(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        exp_note_orm = expected_notes_with(
+            content_html="<p>outdated html</p>",
+            renderer_version=MARKDOWN_RENDERER_VERSION - 1,
+        )
+        mock_note_repository.get_one_by_id = mock.AsyncMock(return_value=exp_note_orm)
+        mock_note_repository.update_rendered_bodies = mock.AsyncMock()
+
+        note = await note_service.get_one_by_id(note_id=exp_note_orm.id)
+        # let background re-rendering task run
+        await asyncio.sleep(0)
+
+        expected_html = markdown.markdown(exp_note_orm.content)
+        assert note.content == expected_html
+        mock_note_repository.update_rendered_bodies.assert_awaited_once_with(
+            rendered_bodies=RenderedBodies(
+                contents={exp_note_orm.body_hash: expected_html},
+                renderer_version=MARKDOWN_RENDERER_VERSION,
+            )
+        )
+
     @pytest.mark.asyncio
     @pytest.mark.parametrize(("md_content_format",), ((True,), (False,)))
     async def test_get_one_by_id_unexisted(
@@ -167,18 +919,28 @@ class TestNoteService:
         )
 
         mock_note_repository.create_one = mock.AsyncMock(return_value=exp_note_id)
-        mock_note_repository.filter_by = mock.AsyncMock(return_value=[])
+        mock_note_repository.filter_by = mock.AsyncMock()
 
         created_note_id = await note_service.create_one(new_note=expexted_note_sch)
 
         assert created_note_id == exp_note_id
-        mock_note_repository.filter_by.assert_awaited_once()
+        mock_note_repository.filter_by.assert_not_awaited()
         mock_note_repository.create_one.assert_awaited_once()
 
         called_note_orm = mock_note_repository.create_one.call_args.kwargs["note"]
         assert called_note_orm.title == exp_note_orm.title
         assert called_note_orm.content == exp_note_orm.content
         assert called_note_orm.owner_id == exp_note_orm.owner_id
+        assert mock_note_repository.create_one.call_args.kwargs[
+            "rendered_bodies"
+        ] == RenderedBodies(
+            contents={
+                content_hash(exp_note_orm.content): markdown.markdown(
+                    exp_note_orm.content
+                )
+            },
+            renderer_version=MARKDOWN_RENDERER_VERSION,
+        )
 
     @pytest.mark.asyncio
     async def test_create_one_title_already_exists(
@@ -187,25 +949,23 @@ class TestNoteService:
         mock_note_repository,
         note_service,
     ):
-        exp_note_id = uuid.uuid4()
-        same_note_title = "Same note title"
-        existed_note_with_same_title = expected_notes_with(
-            title=same_note_title, amount=1
-        )
         expexted_note_sch = NoteCreateShema(
-            title=same_note_title,
+            title="Same note title",
             content="# SOme md content",
             owner_id=uuid.uuid4(),
         )
 
-        mock_note_repository.create_one = mock.AsyncMock(return_value=exp_note_id)
-        mock_note_repository.filter_by = mock.AsyncMock(
-            return_value=[existed_note_with_same_title]
+        mock_note_repository.create_one = mock.AsyncMock(
+            side_effect=RowAlreadyExistsError("...")
         )
+        mock_note_repository.filter_by = mock.AsyncMock()
 
         with pytest.raises(NoteAlreadyExistsError):
             _ = await note_service.create_one(new_note=expexted_note_sch)
 
+        mock_note_repository.create_one.assert_awaited_once()
+        mock_note_repository.filter_by.assert_not_awaited()
+
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
         ("title", "content", "owner_id"),
@@ -226,33 +986,122 @@ class TestNoteService:
         content,
         owner_id,
         mock_note_repository,
-        expected_notes_with,
         note_service,
     ):
         exp_note_id = uuid.uuid4()
-        existed_note_orm_on_update = expected_notes_with(amount=1)
         note_update_schema = NoteUpdateShema(
             title=title, content=content, owner_id=owner_id
         )
 
-        mock_note_repository.get_one_by_id = mock.AsyncMock(
-            return_value=existed_note_orm_on_update
+        mock_note_repository.get_one_by_id = mock.AsyncMock()
+        mock_note_repository.update_by_id = mock.AsyncMock(
+            return_value=mock.Mock(
+                version=2, owner_id=uuid.uuid4(), previous_owner_id=uuid.uuid4()
+            )
         )
-        mock_note_repository.filter_by = mock.AsyncMock(return_value=[])
-        mock_note_repository.update_one = mock.AsyncMock()
+        mock_note_repository.filter_by = mock.AsyncMock()
 
-        await note_service.update_one(
-            note_id=exp_note_id, updated_note=note_update_schema
+        version = await note_service.update_one(
+            note_id=exp_note_id, updated_note=note_update_schema, expected_version=1
         )
 
-        mock_note_repository.get_one_by_id.assert_awaited_once_with(note_id=exp_note_id)
-        mock_note_repository.filter_by.assert_awaited_once()
-        mock_note_repository.update_one.assert_awaited_once()
+        assert version == 2
+        mock_note_repository.get_one_by_id.assert_not_awaited()
+        mock_note_repository.filter_by.assert_not_awaited()
+        mock_note_repository.update_by_id.assert_awaited_once()
+
+        called_kwargs = mock_note_repository.update_by_id.call_args.kwargs
+        assert called_kwargs["note_id"] == exp_note_id
+        assert called_kwargs["expected_version"] == 1
+        assert called_kwargs["values"] == note_update_schema.model_dump(
+            exclude_unset=True, exclude_none=True
+        )
+        rendered_bodies = called_kwargs["rendered_bodies"]
+        if content:
+            assert rendered_bodies.contents == {
+                content_hash(content): markdown.markdown(content)
+            }
+            assert rendered_bodies.renderer_version == MARKDOWN_RENDERER_VERSION
+        else:
+            assert rendered_bodies is None
+
+    @pytest.mark.asyncio
+    async def test_patch_content(
+        self, expected_notes_with, mock_note_repository, note_service
+    ):
+        current_note = expected_notes_with(content="# title\n\nsome text\n")
+        base_updated_at = current_note.updated_at
+        new_updated_at = datetime.now()
+
+        async def update_one(note, rendered_bodies, base_updated_at):
+            note.updated_at = new_updated_at
+
+        mock_note_repository.get_one_by_id = mock.AsyncMock(return_value=current_note)
+        mock_note_repository.update_one = mock.AsyncMock(side_effect=update_one)
+
+        patch_result = await note_service.patch_content(
+            note_id=current_note.id,
+            patch=NoteContentPatchShema(
+                base_updated_at=base_updated_at,
+                edits=[
+                    NoteContentEditShema(offset=2, delete=5, insert="new title"),
+                    NoteContentEditShema(offset=9, delete=4, insert="other"),
+                ],
+            ),
+        )
 
-        called_note = mock_note_repository.update_one.call_args.kwargs["note"]
-        assert called_note.title == title
-        assert called_note.content == content
-        assert called_note.owner_id == owner_id
+        assert patch_result.updated_at == new_updated_at
+        called_kwargs = mock_note_repository.update_one.call_args.kwargs
+        assert called_kwargs["note"].content == "# new title\n\nother text\n"
+        assert called_kwargs["base_updated_at"] == base_updated_at
+        assert called_kwargs["rendered_bodies"].contents == {
+            content_hash("# new title\n\nother text\n"): markdown.markdown(
+                "# new title\n\nother text\n"
+            )
+        }
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("base_shift", "edit", "update_error", "expected_error"),
+        (
+            # the note was changed before it was read
+            (timedelta(seconds=-1), (0, 0, "x"), None, NoteVersionConflictError),
+            # the note was changed after it was read
+            (timedelta(0), (0, 0, "x"), StaleRowError("..."), NoteVersionConflictError),
+            (timedelta(0), (0, 0, "x"), NoSuchRowError("..."), NoteNotFoundError),
+            (timedelta(0), (100, 1, ""), None, InvalidContentPatchError),
+        ),
+    )
+    async def test_patch_content_failed(
+        self,
+        base_shift,
+        edit,
+        update_error,
+        expected_error,
+        expected_notes_with,
+        mock_note_repository,
+        note_service,
+    ):
+        current_note = expected_notes_with(content="# some md")
+        offset, delete, insert = edit
+        mock_note_repository.get_one_by_id = mock.AsyncMock(return_value=current_note)
+        mock_note_repository.update_one = mock.AsyncMock(side_effect=update_error)
+
+        with pytest.raises(expected_error):
+            await note_service.patch_content(
+                note_id=current_note.id,
+                patch=NoteContentPatchShema(
+                    base_updated_at=current_note.updated_at + base_shift,
+                    edits=[
+                        NoteContentEditShema(
+                            offset=offset, delete=delete, insert=insert
+                        )
+                    ],
+                ),
+            )
+
+        if update_error is None:
+            mock_note_repository.update_one.assert_not_awaited()
 
     @pytest.mark.asyncio
     async def test_update_one_unexists(self, mock_note_repository, note_service):
@@ -263,7 +1112,7 @@ class TestNoteService:
             owner_id=uuid.uuid4(),
         )
 
-        mock_note_repository.get_one_by_id = mock.AsyncMock(
+        mock_note_repository.update_by_id = mock.AsyncMock(
             side_effect=NoSuchRowError("...")
         )
 
@@ -272,42 +1121,126 @@ class TestNoteService:
                 note_id=exp_note_id, updated_note=note_update_schema
             )
 
-            mock_note_repository.get_one_by_id.assert_awaited_once_with(
-                note_id=exp_note_id
+    @pytest.mark.asyncio
+    async def test_update_one_version_conflict(
+        self, mock_note_repository, note_service
+    ):
+        mock_note_repository.update_by_id = mock.AsyncMock(
+            side_effect=StaleRowError("...")
+        )
+
+        with pytest.raises(NoteVersionConflictError):
+            await note_service.update_one(
+                note_id=uuid.uuid4(),
+                updated_note=NoteUpdateShema(title="some_title"),
+                expected_version=1,
             )
 
     @pytest.mark.asyncio
     async def test_update_one_title_already_exists(
-        self, expected_notes_with, mock_note_repository, note_service
+        self, mock_note_repository, note_service
     ):
         exp_note_id = uuid.uuid4()
-        same_note_title = "some_same_title"
-        note_orm_on_update = expected_notes_with(title=same_note_title, amount=1)
-        existed_note_with_same_title = expected_notes_with(
-            title=same_note_title, amount=1
-        )
         note_update_schema = NoteUpdateShema(
-            title=same_note_title,
+            title="some_same_title",
             content="### Md content updated",
             owner_id=uuid.uuid4(),
         )
 
-        mock_note_repository.get_one_by_id = mock.AsyncMock(
-            return_value=note_orm_on_update
-        )
-        mock_note_repository.filter_by = mock.AsyncMock(
-            return_value=[existed_note_with_same_title]
+        mock_note_repository.update_by_id = mock.AsyncMock(
+            side_effect=RowAlreadyExistsError("...")
         )
+        mock_note_repository.filter_by = mock.AsyncMock()
 
         with pytest.raises(NoteAlreadyExistsError):
             await note_service.update_one(
                 note_id=exp_note_id, updated_note=note_update_schema
             )
 
-            mock_note_repository.get_one_by_id.assert_awaited_once_with(
-                note_id=exp_note_id
+        mock_note_repository.update_by_id.assert_awaited_once()
+        mock_note_repository.filter_by.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_apply_batch(self, mock_note_repository, note_service):
+        owner_id = uuid.uuid4()
+        created_note_id = uuid.uuid4()
+        updated_note_id, conflicting_note_id, missing_note_id = (
+            uuid.uuid4(),
+            uuid.uuid4(),
+            uuid.uuid4(),
+        )
+        deleted_note_id, already_deleted_note_id = uuid.uuid4(), uuid.uuid4()
+        batch = NoteBatchShema(
+            create=[
+                NoteCreateShema(title="new", content="# new", owner_id=owner_id),
+                NoteCreateShema(title="new", content="# again", owner_id=owner_id),
+                NoteCreateShema(title="taken", content="# taken", owner_id=owner_id),
+            ],
+            update=[
+                NoteBatchUpdateShema(id=updated_note_id, content="*updated*"),
+                NoteBatchUpdateShema(id=conflicting_note_id, title="taken"),
+                NoteBatchUpdateShema(id=missing_note_id, title="missing"),
+            ],
+            delete=[deleted_note_id, already_deleted_note_id],
+        )
+        mock_note_repository.apply_batch = mock.AsyncMock(
+            return_value=NoteBatchResult(
+                created=[mock.Mock(id=created_note_id, owner_id=owner_id, title="new")],
+                updated=[
+                    mock.Mock(id=updated_note_id, updated=True, note_exists=True),
+                    mock.Mock(id=conflicting_note_id, updated=False, note_exists=True),
+                    mock.Mock(id=missing_note_id, updated=False, note_exists=False),
+                ],
+                deleted_ids=[deleted_note_id],
             )
-            mock_note_repository.filter_by.assert_awaited_once()
+        )
+
+        batch_result = await note_service.apply_batch(batch=batch)
+
+        assert [(item.id, item.status) for item in batch_result.created] == [
+            (created_note_id, NoteBatchItemStatus.CREATED),
+            (None, NoteBatchItemStatus.CONFLICT),
+            (None, NoteBatchItemStatus.CONFLICT),
+        ]
+        assert [(item.id, item.status) for item in batch_result.updated] == [
+            (updated_note_id, NoteBatchItemStatus.UPDATED),
+            (conflicting_note_id, NoteBatchItemStatus.CONFLICT),
+            (missing_note_id, NoteBatchItemStatus.NOT_FOUND),
+        ]
+        assert [(item.id, item.status) for item in batch_result.deleted] == [
+            (deleted_note_id, NoteBatchItemStatus.DELETED),
+            (already_deleted_note_id, NoteBatchItemStatus.NOT_FOUND),
+        ]
+
+        called_kwargs = mock_note_repository.apply_batch.call_args.kwargs
+        # repeated title is not sent to the database
+        assert [note.title for note in called_kwargs["new_notes"]] == ["new", "taken"]
+        updated_content, _, _ = called_kwargs["updated_notes"]
+        assert updated_content["content"] == "*updated*"
+        assert updated_content["title"] is None
+        # bodies of the whole batch are rendered together
+        assert called_kwargs["rendered_bodies"].contents == {
+            content_hash(content): markdown.markdown(content)
+            for content in ("# new", "# taken", "*updated*")
+        }
+        assert called_kwargs["deleted_note_ids"] == batch.delete
+
+    @pytest.mark.asyncio
+    async def test_apply_batch_titles_conflict(
+        self, mock_note_repository, note_service
+    ):
+        batch = NoteBatchShema(
+            update=[
+                NoteBatchUpdateShema(id=uuid.uuid4(), title="first"),
+                NoteBatchUpdateShema(id=uuid.uuid4(), title="second"),
+            ]
+        )
+        mock_note_repository.apply_batch = mock.AsyncMock(
+            side_effect=RowAlreadyExistsError("...")
+        )
+
+        with pytest.raises(NoteAlreadyExistsError):
+            await note_service.apply_batch(batch=batch)
 
     @pytest.mark.asyncio
     async def test_delete_one_success(
@@ -349,33 +1282,201 @@ class TestNoteService:
             )
 
     @pytest.mark.asyncio
-    async def test_delete_all_by_owner_id(
-        self, mock_note_repository, expected_notes_with, note_service
-    ):
+    async def test_delete_all_by_owner_id(self, mock_note_repository, note_service):
         note_owner_id = uuid.uuid4()
-        exp_notes_on_delete = expected_notes_with(owner_id=note_owner_id, amount=4)
-        mock_note_repository.filter_by = mock.AsyncMock(
-            return_value=exp_notes_on_delete
+        batch_size = note_service.deletion_batch_size
+        mock_note_repository.filter_by = mock.AsyncMock()
+        mock_note_repository.delete_batch_by_owner_id = mock.AsyncMock(
+            side_effect=[batch_size, batch_size, 3, 0]
         )
-        mock_note_repository.delete_all = mock.AsyncMock()
 
         await note_service.delete_all_by_owner_id(owner_id=note_owner_id)
 
-        mock_note_repository.filter_by.assert_awaited_once()
-        mock_note_repository.delete_all.assert_awaited_once()
-
-        called_ids = mock_note_repository.delete_all.call_args.kwargs["note_ids"]
-        assert sorted(called_ids) == sorted((note.id for note in exp_notes_on_delete))
+        mock_note_repository.filter_by.assert_not_awaited()
+        assert (
+            mock_note_repository.delete_batch_by_owner_id.await_args_list
+            == [mock.call(owner_id=note_owner_id, batch_size=batch_size)] * 4
+        )
 
     @pytest.mark.asyncio
     async def test_delete_all_by_owner_id_empty(
         self, mock_note_repository, note_service
     ):
         note_owner_id = uuid.uuid4()
-        mock_note_repository.filter_by = mock.AsyncMock(return_value=[])
-        mock_note_repository.delete_all = mock.AsyncMock()
+        mock_note_repository.delete_batch_by_owner_id = mock.AsyncMock(return_value=0)
 
         await note_service.delete_all_by_owner_id(owner_id=note_owner_id)
 
-        mock_note_repository.filter_by.assert_awaited_once()
-        mock_note_repository.delete_all.assert_awaited_once()
+        mock_note_repository.delete_batch_by_owner_id.assert_awaited_once_with(
+            owner_id=note_owner_id, batch_size=note_service.deletion_batch_size
+        )
+
+
+async def load_uncached(note_id, load):
+    return await load()
+
+
+@pytest.mark.asyncio
+class TestCachedNoteService:
+    @pytest.mark.parametrize(("md_content_format",), ((True,), (False,)))
+    async def test_get_one_by_id_cache_miss(
+        self,
+        md_content_format,
+        expected_notes_with,
+        mock_note_repository,
+        mock_note_cache,
+        cached_note_service,
+    ):
+        exp_note_orm = expected_notes_with(amount=1)
+        mock_note_repository.get_one_by_id = mock.AsyncMock(return_value=exp_note_orm)
+        mock_note_cache.get_or_load = mock.AsyncMock(side_effect=load_uncached)
+
+        note = await cached_note_service.get_one_by_id(
+            note_id=exp_note_orm.id, md_content_format=md_content_format
+        )
+
+        mock_note_repository.get_one_by_id.assert_awaited_once_with(
+            note_id=exp_note_orm.id
+        )
+        assert note.id == exp_note_orm.id
+        assert note.content == (
+            exp_note_orm.content
+            if md_content_format
+            else markdown.markdown(exp_note_orm.content)
+        )
+
+    async def test_get_one_by_id_cache_hit(
+        self, mock_note_repository, mock_note_cache, cached_note_service
+    ):
+        cached_note = NoteCachedShema(
+            id=uuid.uuid4(),
+            title="some title",
+            content="# some md",
+            content_html="<h1>some md</h1>",
+            options_fingerprint=(
+                cached_note_service.rendering_engine.options_fingerprint
+            ),
+            owner_id=uuid.uuid4(),
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+            version=1,
+        )
+        mock_note_repository.get_one_by_id = mock.AsyncMock()
+        mock_note_cache.get_or_load = mock.AsyncMock(return_value=cached_note)
+
+        note = await cached_note_service.get_one_by_id(note_id=cached_note.id)
+
+        mock_note_repository.get_one_by_id.assert_not_awaited()
+        assert type(note) is NoteOutputShema
+        assert note.content == cached_note.content_html
+        assert note.updated_at == cached_note.updated_at
+
+    async def test_get_one_by_id_unexisted(
+        self, mock_note_repository, mock_note_cache, cached_note_service
+    ):
+        mock_note_repository.get_one_by_id = mock.AsyncMock(
+            side_effect=NoSuchRowError("...")
+        )
+        mock_note_cache.get_or_load = mock.AsyncMock(side_effect=load_uncached)
+
+        with pytest.raises(NoteNotFoundError):
+            await cached_note_service.get_one_by_id(note_id=uuid.uuid4())
+
+    async def test_update_one_invalidates(
+        self,
+        expected_notes_with,
+        mock_note_repository,
+        mock_note_cache,
+        cached_note_service,
+    ):
+        exp_note_orm = expected_notes_with(amount=1)
+        mock_note_repository.update_by_id = mock.AsyncMock(
+            return_value=mock.Mock(
+                version=2,
+                owner_id=exp_note_orm.owner_id,
+                previous_owner_id=exp_note_orm.owner_id,
+            )
+        )
+
+        await cached_note_service.update_one(
+            note_id=exp_note_orm.id, updated_note=NoteUpdateShema(title="new title")
+        )
+
+        mock_note_cache.invalidate.assert_awaited_once_with(exp_note_orm.id)
+
+    async def test_update_one_conflict_keeps_cache(
+        self,
+        expected_notes_with,
+        mock_note_repository,
+        mock_note_cache,
+        cached_note_service,
+    ):
+        exp_note_orm = expected_notes_with(amount=1)
+        mock_note_repository.update_by_id = mock.AsyncMock(
+            side_effect=RowAlreadyExistsError("...")
+        )
+
+        with pytest.raises(NoteAlreadyExistsError):
+            await cached_note_service.update_one(
+                note_id=exp_note_orm.id,
+                updated_note=NoteUpdateShema(title="taken title"),
+            )
+
+        mock_note_cache.invalidate.assert_not_awaited()
+
+    async def test_delete_one_invalidates(
+        self,
+        expected_notes_with,
+        mock_note_repository,
+        mock_note_cache,
+        cached_note_service,
+    ):
+        exp_note_orm = expected_notes_with(amount=1)
+        mock_note_repository.get_one_by_id = mock.AsyncMock(return_value=exp_note_orm)
+        mock_note_repository.delete_one = mock.AsyncMock()
+
+        await cached_note_service.delete_one(note_id=exp_note_orm.id)
+
+        mock_note_cache.invalidate.assert_awaited_once_with(exp_note_orm.id)
+
+    async def test_apply_batch_invalidates(
+        self, mock_note_repository, mock_note_cache, cached_note_service
+    ):
+        updated_id, conflicting_id, deleted_id = (uuid.uuid4() for _ in range(3))
+        mock_note_repository.apply_batch = mock.AsyncMock(
+            return_value=NoteBatchResult(
+                created=[],
+                updated=[
+                    mock.Mock(id=updated_id, updated=True, note_exists=True),
+                    mock.Mock(id=conflicting_id, updated=False, note_exists=True),
+                ],
+                deleted_ids=[deleted_id],
+            )
+        )
+
+        await cached_note_service.apply_batch(
+            NoteBatchShema(
+                update=[
+                    NoteBatchUpdateShema(id=updated_id, title="new title"),
+                    NoteBatchUpdateShema(id=conflicting_id, title="taken title"),
+                ],
+                delete=[deleted_id],
+            )
+        )
+
+        mock_note_cache.invalidate.assert_awaited_once_with(updated_id, deleted_id)
+
+    async def test_delete_all_by_owner_id_invalidates(
+        self, mock_note_repository, mock_note_cache, cached_note_service
+    ):
+        note_owner_id = uuid.uuid4()
+        mock_note_repository.delete_batch_by_owner_id = mock.AsyncMock(
+            side_effect=[cached_note_service.deletion_batch_size, 3, 0]
+        )
+
+        await cached_note_service.delete_all_by_owner_id(owner_id=note_owner_id)
+
+        assert (
+            mock_note_cache.invalidate_owner.await_args_list
+            == [mock.call(note_owner_id)] * 2
+        )
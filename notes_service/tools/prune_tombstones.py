@@ -0,0 +1,74 @@
+"""
+Deletes tombstones of deleted and moved notes saved more than
+TOMBSTONES_RETENTION_DAYS ago, so note_tombstones does not grow without
+bound. Clients which have not synced since then have to sync from scratch.
+Every batch is committed separately, so the tool can be stopped at any
+moment and started again.
+
+Usage (from notes_service directory):
+    python -m tools.prune_tombstones [--batch-size 1000] [--pause 0.1]
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from src.core.database import AsyncDatabase
+from src.core.settings import postgres_settings, TOMBSTONES_RETENTION_DAYS
+from src.repositories.note import NoteRepository
+from src.logger import logger
+
+
+async def prune_tombstones(
+    repository: NoteRepository, retention_days: int, batch_size: int, pause: float
+) -> None:
+    # tombstones keep naive UTC datetimes
+    deleted_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+        days=retention_days
+    )
+    deleted_total = 0
+    while True:
+        deleted = await repository.delete_tombstones_before(
+            deleted_before=deleted_before, batch_size=batch_size
+        )
+        if not deleted:
+            break
+
+        deleted_total += deleted
+        logger.info(f"Deleted {deleted_total} tombstones")
+        # leaves room for autovacuum and regular queries
+        await asyncio.sleep(pause)
+
+    logger.info(
+        f"All tombstones saved before {deleted_before.isoformat()} are pruned, "
+        f"{deleted_total} deleted in total"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.1)
+    parser.add_argument("--retention-days", type=int, default=TOMBSTONES_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    database = AsyncDatabase(
+        host=postgres_settings.host,
+        port=postgres_settings.port,
+        username=postgres_settings.user,
+        password=postgres_settings.password,
+        db=postgres_settings.db,
+    )
+    try:
+        await prune_tombstones(
+            repository=NoteRepository(database=database),
+            retention_days=args.retention_days,
+            batch_size=args.batch_size,
+            pause=args.pause,
+        )
+    finally:
+        await database.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Rewrites existing notes and note bodies, so their MarkDown and HTML are
+compressed by the current compression method of their columns. New and
+updated values are compressed by it anyway, only ones written before
+(or copied from them) are affected. Notes are rewritten first, bodies next.
+Every batch is committed separately, so the tool can be stopped at any
+moment and started again from the last reported id with --after-id,
+or from the last reported hash with --after-hash (notes are skipped then).
+
+Usage (from notes_service directory):
+    python -m tools.recompress_notes [--batch-size 500] [--pause 0.1]
+"""
+
+import argparse
+import asyncio
+from uuid import UUID
+
+from src.core.database import AsyncDatabase
+from src.core.settings import postgres_settings
+from src.models.note import CONTENT_COMPRESSION, CONTENT_COMPRESSION_THRESHOLD
+from src.repositories.note import NoteRepository
+from src.logger import logger
+
+
+async def recompress_notes(
+    repository: NoteRepository, after_id: UUID | None, batch_size: int, pause: float
+) -> None:
+    scanned_batches = rewritten_total = 0
+    while True:
+        batch = await repository.recompress_batch(
+            after_id=after_id,
+            batch_size=batch_size,
+            compression=CONTENT_COMPRESSION,
+            min_bytes=CONTENT_COMPRESSION_THRESHOLD,
+        )
+        if batch.last_id is None:
+            break
+
+        after_id = batch.last_id
+        scanned_batches += 1
+        rewritten_total += batch.rewritten
+        logger.info(
+            f"Rewritten MarkDown of {rewritten_total} notes "
+            f"in {scanned_batches} batches, last id - {after_id}"
+        )
+        # leaves room for autovacuum and regular queries
+        await asyncio.sleep(pause)
+
+    logger.info(
+        f"MarkDown of all notes is recompressed, {rewritten_total} rewritten in total"
+    )
+
+
+async def recompress_bodies(
+    repository: NoteRepository, after_hash: str | None, batch_size: int, pause: float
+) -> None:
+    scanned_batches = rewritten_total = 0
+    while True:
+        batch = await repository.recompress_bodies_batch(
+            after_hash=after_hash,
+            batch_size=batch_size,
+            compression=CONTENT_COMPRESSION,
+            min_bytes=CONTENT_COMPRESSION_THRESHOLD,
+        )
+        if batch.last_hash is None:
+            break
+
+        after_hash = batch.last_hash
+        scanned_batches += 1
+        rewritten_total += batch.rewritten
+        logger.info(
+            f"Rewritten HTML of {rewritten_total} note bodies "
+            f"in {scanned_batches} batches, last hash - {after_hash}"
+        )
+        await asyncio.sleep(pause)
+
+    logger.info(
+        f"HTML of all note bodies is recompressed, {rewritten_total} rewritten in total"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.1)
+    parser.add_argument("--after-id", type=UUID, default=None)
+    parser.add_argument("--after-hash", type=str, default=None)
+    args = parser.parse_args()
+
+    database = AsyncDatabase(
+        host=postgres_settings.host,
+        port=postgres_settings.port,
+        username=postgres_settings.user,
+        password=postgres_settings.password,
+        db=postgres_settings.db,
+    )
+    repository = NoteRepository(database=database)
+    try:
+        if args.after_hash is None:
+            await recompress_notes(
+                repository=repository,
+                after_id=args.after_id,
+                batch_size=args.batch_size,
+                pause=args.pause,
+            )
+        await recompress_bodies(
+            repository=repository,
+            after_hash=args.after_hash,
+            batch_size=args.batch_size,
+            pause=args.pause,
+        )
+    finally:
+        await database.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())